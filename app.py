@@ -3,6 +3,9 @@ from flask import Flask, render_template, request, jsonify, send_from_directory
 from backend.geolocation import parse_coordinates, get_timezone
 
 from backend.data import load_all_data
+from backend.strongs_store import get_store as get_strongs_store
+from backend import kjv_index
+from backend.field_selection import parse_fields, mongo_projection
 
 
 
@@ -15,6 +18,7 @@ import os
 import logging
 from colorama import Fore, Style
 import json
+import re
 
 # Enhanced PyMongo imports with error handling
 try:
@@ -53,6 +57,32 @@ app = Flask(
 from backend.routes import api
 app.register_blueprint(api)
 
+# JSON provider (orjson when installed) and gzip/brotli responses (see backend/encoding.py)
+from backend import encoding
+from config import JSON_ENCODER, COMPRESS_MIN_SIZE, COMPRESS_LEVEL
+encoding.init_json(app, JSON_ENCODER)
+
+# Server-Timing header / per-request phase log (see backend/timing.py)
+from backend import timing
+from config import SERVER_TIMING, SERVER_TIMING_LOG
+timing.init_app(app, header=SERVER_TIMING, log_json=SERVER_TIMING_LOG)
+# registered after timing so compression runs inside the timed request
+encoding.init_compression(app, min_size=COMPRESS_MIN_SIZE, level=COMPRESS_LEVEL)
+
+# Prometheus-style /metrics (see backend/metrics.py)
+from backend import metrics
+from config import METRICS_ENABLED, METRICS_TOKEN
+if METRICS_ENABLED:
+    if not METRICS_TOKEN:
+        print("⚠️ /metrics is served without a token (METRICS_ENABLED=1, METRICS_TOKEN unset)")
+    metrics.init_app(app, token=METRICS_TOKEN)
+
+# Token-protected ?__profile=1 and 1-in-N sampled profiling (see backend/profiling.py)
+from backend import profiling
+from config import PROFILE_TOKEN, PROFILE_SAMPLE_EVERY, PROFILE_DIR, PROFILE_MAX_ENTRIES
+profiling.init_app(app, token=PROFILE_TOKEN, sample_every=PROFILE_SAMPLE_EVERY,
+                   directory=PROFILE_DIR, max_entries=PROFILE_MAX_ENTRIES)
+
 
 # MongoDB setup
 mongo_client = None
@@ -80,7 +110,10 @@ def get_mongo_client():
                     connectTimeoutMS=10000,
                     socketTimeoutMS=10000,
                     maxPoolSize=10,
-                    retryWrites=True
+                    retryWrites=True,
+                    event_listeners=[
+                        listener() for listener in (timing.MongoCommandTimer, metrics.MongoCommandMetrics) if listener
+                    ]
                 )
                 
                 # Test the connection with ping
@@ -116,6 +149,15 @@ app.config['mongo_db'] = db
 mongo_client = client
 mongo_db = db
 
+# Indexes the routes depend on (backend/mongo_indexes.py); a no-op once this version is applied
+from config import MONGO_ENSURE_INDEXES
+if mongo_db is not None and MONGO_ENSURE_INDEXES:
+    import threading
+    from backend import mongo_indexes
+    from config import STRONG_COLLECTION, KJV_COLLECTION
+    threading.Thread(target=mongo_indexes.ensure_once, args=(mongo_db, STRONG_COLLECTION, KJV_COLLECTION),
+                     name='mongo-indexes', daemon=True).start()
+
 
 def check_mongo_connection():
     """Check MongoDB connection and database access with colored logs."""
@@ -399,29 +441,88 @@ def font_test():
 def font_comparison():
     return render_template('complete_font_comparison_test.html')
 
+# Heatmap rendering runs on an in-process job queue: one job per full moon,
+# deduplicated by output file, current month first, backfill after.
+from backend.jobs import JobRunner, JobQueueFull
+from config import HEATMAP_JOB_WORKERS, HEATMAP_JOB_MAX_QUEUED, HEATMAP_INCREMENTAL
+heatmap_jobs = JobRunner(max_workers=HEATMAP_JOB_WORKERS, max_queued=HEATMAP_JOB_MAX_QUEUED, name='heatmaps')
+
+
+def _heatmap_job(full_moon_time, output_path):
+    def run(job):
+        from backend.astronomy.map.generate_lunar_heatmaps import generate_heatmap_for_date
+        if os.path.exists(output_path):
+            return {'path': output_path, 'skipped': True}
+        generate_heatmap_for_date(full_moon_time, output_path, progress=job.report, incremental=HEATMAP_INCREMENTAL)
+        return {'path': output_path, 'skipped': False}
+    return run
+
+
 @app.route('/api/generate-heatmaps', methods=['POST'])
 def generate_heatmaps():
-    """Generate lunar month heatmap for current month"""
+    """Queue lunar month heatmap generation.
+
+    JSON body (optional): {"scope": "current" | "all"}. "current" renders only
+    the current month's map; "all" (default) also queues backfill for every
+    full moon in the CSV at lower priority. Maps that already exist are skipped.
+    """
     try:
         ensure_data_loaded()
 
-        # Import the heatmap generation function
-        import subprocess
-        import sys
-        import os
-
-        # Path to the heatmap generation script
-        script_path = os.path.join(BASE_DIR, 'backend', 'astronomy', 'map', 'generate_lunar_heatmaps.py')
-
-        # Run the script in background
-        process = subprocess.Popen([
-            sys.executable, script_path
-        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=BASE_DIR)
+        try:
+            from backend.astronomy.map.generate_lunar_heatmaps import (
+                load_parsed_full_moons,
+                ordered_full_moon_indices,
+                heatmap_filename,
+                heatmap_map_dir,
+            )
+        except ImportError as e:
+            return jsonify({
+                'status': 'error',
+                'message': f'Heatmap generation unavailable: {e}'
+            }), 503
+
+        body = request.get_json(silent=True) or {}
+        scope = body.get('scope', 'all')
+        if scope not in ('current', 'all'):
+            return jsonify({'status': 'error', 'message': "scope must be 'current' or 'all'"}), 400
+
+        from datetime import datetime, timezone
+        full_moons = load_parsed_full_moons()
+        ordered = ordered_full_moon_indices(full_moons, datetime.now(timezone.utc))
+        if scope == 'current':
+            ordered = ordered[:1]
+
+        map_dir = heatmap_map_dir()
+        jobs = []
+        created = 0
+        for priority, idx in enumerate(ordered):
+            full_moon_time = full_moons[idx]
+            filename = heatmap_filename(full_moon_time)
+            output_path = os.path.join(map_dir, filename)
+            if os.path.exists(output_path):
+                continue
+            try:
+                job, is_new = heatmap_jobs.submit(
+                    filename,
+                    _heatmap_job(full_moon_time, output_path),
+                    priority=priority,
+                    label=f'heatmap {filename}',
+                )
+            except JobQueueFull as e:
+                logging.warning(f"Heatmap queue full: {e}")
+                break
+            created += int(is_new)
+            jobs.append(job)
 
         return jsonify({
-            'status': 'generating',
-            'message': 'Heatmap generation started'
-        })
+            'status': 'generating' if jobs else 'up_to_date',
+            'message': f'{len(jobs)} heatmap job(s) active, {created} newly queued',
+            'job_id': jobs[0].id if jobs else None,
+            'jobs': [{'id': j.id, 'label': j.label, 'status': j.status, 'priority': j.priority} for j in jobs[:50]],
+            'queued': created,
+            'active': len(jobs),
+        }), 202
 
     except Exception as e:
         logging.error(f"Error starting heatmap generation: {e}")
@@ -430,6 +531,33 @@ def generate_heatmaps():
             'message': str(e)
         }), 500
 
+@app.route('/api/generate-heatmaps', methods=['GET'])
+def list_heatmap_jobs():
+    """Summarize heatmap jobs by status and list the ones still queued or running."""
+    jobs = heatmap_jobs.jobs()
+    counts = {}
+    for j in jobs:
+        counts[j.status] = counts.get(j.status, 0) + 1
+    active = sorted((j for j in jobs if j.status in ('queued', 'running')), key=lambda j: (j.status != 'running', j.priority))
+    return jsonify({
+        'counts': counts,
+        'active': [j.to_dict() for j in active[:50]],
+    })
+
+@app.route('/api/generate-heatmaps/<job_id>', methods=['GET'])
+def heatmap_job_status(job_id):
+    job = heatmap_jobs.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/generate-heatmaps/<job_id>', methods=['DELETE'])
+def cancel_heatmap_job(job_id):
+    job = heatmap_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
 @app.route('/api/strongs-data')
 def get_strongs_data():
     limit = int(request.args.get('limit', 100))
@@ -468,39 +596,24 @@ def get_strongs_data():
             else:
                 print(f"INFO: No MongoDB results for '{query}', falling back to JSON")
         
-        # Fallback to JSON
+        # Fallback to the resident lexicon (strongs.json, loaded once per process)
         print("INFO: MongoDB not available, falling back to JSON")
         try:
-            with open(os.path.join(BASE_DIR, 'backend', 'data', 'strongs.json'), 'r') as f:
-                all_data = json.load(f)
-            
-            print(f"INFO: JSON loaded with {len(all_data)} entries")
+            store = get_strongs_store()
+            print(f"INFO: JSON loaded with {len(store)} entries")
             
             if query:
-                # Filter JSON data with better matching
-                filtered = []
-                for entry in all_data:
-                    hebrew = entry.get('hebrew', '').lower()
-                    english = entry.get('english', '').lower()
-                    strongs_num = str(entry.get('strongsNumber', '')).lower()
-                    
-                    if (query.lower() in hebrew or 
-                        query.lower() in english or 
-                        query.lower() in strongs_num):
-                        filtered.append(entry)
-                        if len(filtered) >= limit:
-                            break
-                data = filtered
+                data = store.search(query, limit=limit)
                 print(f"INFO: JSON search for '{query}' found {len(data)} entries")
                 
                 # Log first few results for debugging
                 for i, result in enumerate(data[:3]):
                     strongs_num = result.get('strongsNumber', 'N/A')
-                    english = result.get('english', 'N/A')
-                    hebrew = result.get('hebrew', 'N/A')
-                    print(f"INFO: JSON result {i+1}: H{strongs_num} - {english} - {hebrew}")
+                    word = result.get('word', 'N/A')
+                    transliteration = result.get('transliteration', 'N/A')
+                    print(f"INFO: JSON result {i+1}: H{strongs_num} - {transliteration} - {word}")
             else:
-                data = all_data[:limit]
+                data = list(store.entries(limit=limit))
                 print(f"INFO: Loaded {len(data)} entries from JSON (no query)")
             
             return jsonify(data)
@@ -514,63 +627,54 @@ def get_strongs_data():
 @app.route('/api/kjv-data')
 def get_kjv_data():
     limit = int(request.args.get('limit', 100))
+    offset = max(request.args.get('offset', 0, type=int), 0)
     query = request.args.get('query', '').strip()
-    print(f"INFO: API /api/kjv-data called with query='{query}', limit={limit}")
+    # match=word: the last query word must match exactly, not as a prefix
+    prefix = request.args.get('match', 'prefix') != 'word'
+    # ?fields=book,text / ?view=summary: fewer verse fields; the summary view also skips strongsFrequency
+    try:
+        fields = parse_fields(request.args.get('fields'), request.args.get('view'),
+                              kjv_index.FIELDS, kjv_index.SUMMARY_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    frequencies = request.args.get('view') != 'summary'
+    print(f"INFO: API /api/kjv-data called with query='{query}', limit={limit}, offset={offset}")
     
     try:
         # Try MongoDB first
         if mongo_db is not None:
             print("INFO: Using MongoDB for KJV data")
-            collection = mongo_db["verses"]
-            
-            if query:
-                # Search verses by text content - Fixed regex query structure
-                print(f"DEBUG: Searching for '{query}' in text field")
-                matched_verses = list(collection.find({
-                    "text": {"$regex": query, "$options": "i"}
-                }, {'_id': 0}).limit(limit))
-                print(f"INFO: MongoDB search for '{query}' found {len(matched_verses)} verses")
-                
-                # Debug: Print first match if any
-                if matched_verses:
-                    print(f"DEBUG: First match text: {matched_verses[0].get('text', '')[:100]}")
-                
-                if len(matched_verses) == 0:
-                    # Try a direct test search
-                    test_egypt = list(collection.find({"text": {"$regex": "Egypt", "$options": "i"}}).limit(2))
-                    print(f"DEBUG: Direct Egypt search found {len(test_egypt)} verses")
-                    if test_egypt:
-                        print(f"DEBUG: Direct search result: {test_egypt[0].get('text', '')[:100]}")
-                
-                # Count Strong's number frequencies across matched verses
-                strongs_freq = {}
-                for verse in matched_verses:
-                    strongs_list = verse.get('strongsNumbers', [])
-                    for strongs_num in strongs_list:
-                        strongs_freq[strongs_num] = strongs_freq.get(strongs_num, 0) + 1
-                
-                # Sort Strong's numbers by frequency (descending)
-                sorted_strongs = sorted(strongs_freq.items(), key=lambda x: x[1], reverse=True)
-                print(f"INFO: Found {len(sorted_strongs)} unique Strong's numbers")
-                if sorted_strongs:
-                    print(f"INFO: Top 5 Strong's by frequency: {sorted_strongs[:5]}")
-                
-                # Return verses with frequency-sorted Strong's numbers
-                return jsonify({
-                    'verses': matched_verses,
-                    'strongsFrequency': sorted_strongs,
-                    'totalVerses': len(matched_verses)
-                })
-            else:
-                data = list(collection.find({}, {'_id': 0}).limit(limit))
-                print(f"INFO: Retrieved {len(data)} verses from MongoDB (no query)")
-                return jsonify({'verses': data, 'strongsFrequency': [], 'totalVerses': len(data)})
+            from config import KJV_COLLECTION
+            if kjv_index.mongo_index_available(mongo_db, KJV_COLLECTION):
+                # precomputed inverted index: exact totals, one page, frequencies over every match
+                result = kjv_index.mongo_search(mongo_db, KJV_COLLECTION, query, offset, limit, prefix,
+                                                fields=fields, frequencies=frequencies)
+                if request.args.get('format') == 'ndjson':
+                    return encoding.ndjson_response(result['verses'])
+                return jsonify(result)
+            collection = mongo_db[KJV_COLLECTION]
+
+            if request.args.get('format') == 'ndjson':
+                # stream matching verses one per line (no frequency summary)
+                verse_filter = {"text": {"$regex": re.escape(query), "$options": "i"}} if query else {}
+                return encoding.ndjson_response(
+                    collection.find(verse_filter, mongo_projection(fields)).skip(offset).limit(limit))
+
+            # page, exact count and a server-side $group of strongsNumbers, run concurrently
+            result = kjv_index.regex_search(mongo_db, KJV_COLLECTION, query, offset, limit,
+                                            fields=fields, frequencies=frequencies)
+            print(f"INFO: MongoDB search for '{query}' found {result['totalVerses']} verses")
+            if frequencies:
+                print(f"INFO: Found {len(result['strongsFrequency'])} unique Strong's numbers")
+            if result.get('strongsFrequency'):
+                print(f"INFO: Top 5 Strong's by frequency: {result['strongsFrequency'][:5]}")
+            return jsonify(result)
         
         # Fallback to JSON (only available locally)
         print("⚠️  INFO: Using JSON fallback for KJV data (only available in local development)")
         try:
-            verses_path = os.path.join(BASE_DIR, 'backend', 'data', 'verses.json')
-            if not os.path.exists(verses_path):
+            index = kjv_index.get_index()
+            if index is None:
                 print("⚠️  INFO: verses.json not found (expected in production deployment)")
                 return jsonify({
                     'verses': [],
@@ -578,52 +682,18 @@ def get_kjv_data():
                     'totalVerses': 0,
                     'message': 'Data source unavailable - MongoDB connection required'
                 })
-            
-            with open(verses_path, 'r') as f:
-                all_data = json.load(f)
-            
-            print(f"INFO: JSON loaded with {len(all_data)} verses")
-            
-            if query:
-                # Filter JSON data by text content
-                filtered = []
-                for entry in all_data:
-                    text = entry.get('text', '').lower()
-                    if query.lower() in text:
-                        filtered.append(entry)
-                        if len(filtered) >= limit:
-                            break
-                
-                # Count Strong's number frequencies
-                strongs_freq = {}
-                for verse in filtered:
-                    strongs_list = verse.get('strongsNumbers', [])
-                    for strongs_num in strongs_list:
-                        strongs_freq[strongs_num] = strongs_freq.get(strongs_num, 0) + 1
-                
-                # Sort Strong's numbers by frequency (descending)
-                sorted_strongs = sorted(strongs_freq.items(), key=lambda x: x[1], reverse=True)
-                print(f"INFO: JSON search for '{query}' found {len(filtered)} verses")
-                print(f"INFO: Found {len(sorted_strongs)} unique Strong's numbers")
-                if sorted_strongs:
-                    print(f"INFO: Top 5 Strong's by frequency: {sorted_strongs[:5]}")
-                
-                return jsonify({
-                    'verses': filtered,
-                    'strongsFrequency': sorted_strongs,
-                    'totalVerses': len(filtered)
-                })
-            else:
-                return jsonify({'verses': all_data[:limit], 'strongsFrequency': [], 'totalVerses': len(all_data[:limit])})
-            
-        except FileNotFoundError as e:
-            print(f"⚠️  INFO: verses.json not found (expected in production): {e}")
-            return jsonify({
-                'verses': [],
-                'strongsFrequency': [],
-                'totalVerses': 0,
-                'message': 'Data source unavailable - MongoDB connection required'
-            })
+
+            # resident verses with an inverted index, built once per process
+            result = index.search(query, offset, limit, prefix, fields=fields, frequencies=frequencies)
+            print(f"INFO: JSON search for '{query}' found {result['totalVerses']} verses")
+            if frequencies:
+                print(f"INFO: Found {len(result['strongsFrequency'])} unique Strong's numbers")
+            if result.get('strongsFrequency'):
+                print(f"INFO: Top 5 Strong's by frequency: {result['strongsFrequency'][:5]}")
+            if request.args.get('format') == 'ndjson':
+                return encoding.ndjson_response(result['verses'])
+            return jsonify(result)
+
         except Exception as e:
             print(f"ERROR: Failed to load verses.json: {e}")
             return jsonify({
@@ -1,7 +1,11 @@
 import os
+import hmac
 import logging
-from fastapi import FastAPI, Query
+import time
+from fastapi import FastAPI, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.routing import Match
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from typing import List
 from pydantic import BaseModel
 from skyfield.api import Loader, wgs84
@@ -14,6 +18,17 @@ os.makedirs(DATA_DIR, exist_ok=True)
 load = Loader(DATA_DIR)
 ts = load.timescale()
 
+# Prometheus metrics, served at /metrics to scrapes sending "Authorization: Bearer <METRICS_TOKEN>".
+# The route exists only when METRICS_TOKEN is set, unless METRICS_ENABLED=1 explicitly opens it without one
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1' if METRICS_TOKEN else '0').lower() in ('1', 'true', 'yes')
+REQUESTS = Counter('astro_http_requests_total', 'HTTP requests by route, method and status.',
+                   ['method', 'route', 'status'])
+REQUEST_SECONDS = Histogram('astro_http_request_duration_seconds', 'HTTP request latency by route.',
+                            ['method', 'route'])
+IN_FLIGHT = Gauge('astro_http_requests_in_flight', 'Requests currently being served.')
+EPHEMERIS_LOAD_SECONDS = Gauge('astro_ephemeris_load_seconds', 'Time taken to load the ephemeris file.')
+
 # Lazy-load ephemeris on first request to keep startup snappy
 _eph = None
 
@@ -21,7 +36,9 @@ def eph():
     global _eph
     if _eph is None:
         # de421.bsp is downloaded at build time into app/data
+        start = time.perf_counter()
         _eph = load('de421.bsp')
+        EPHEMERIS_LOAD_SECONDS.set(time.perf_counter() - start)
     return _eph
 
 app = FastAPI(title='Astro Service', version='0.1.0')
@@ -36,6 +53,29 @@ app.add_middleware(
     allow_headers=['*'],
 )
 
+def _route_template(request):
+    # label by the route pattern, not the raw path, to keep cardinality bounded
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, 'path', request.url.path)
+    return '<unmatched>'
+
+@app.middleware('http')
+async def observe_requests(request: Request, call_next):
+    IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = _route_template(request)
+        REQUEST_SECONDS.labels(request.method, route).observe(time.perf_counter() - start)
+        REQUESTS.labels(request.method, route, str(status)).inc()
+        IN_FLIGHT.dec()
+
 class IlluminationResp(BaseModel):
     iso: str
     percent: float
@@ -58,6 +98,18 @@ def preload_ephemeris():
 def health():
     return {'ok': True}
 
+def metrics(request: Request):
+    if METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode('utf-8'), f'Bearer {METRICS_TOKEN}'.encode('utf-8')):
+            return Response('unauthorized\n', status_code=401, media_type='text/plain')
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+if METRICS_ENABLED:
+    if not METRICS_TOKEN:
+        logging.getLogger("uvicorn").warning("/metrics is served without a token (METRICS_ENABLED=1, METRICS_TOKEN unset)")
+    app.add_api_route('/metrics', metrics, methods=['GET'])
+
 @app.get('/illumination/moon', response_model=IlluminationResp)
 def moon_illumination(iso: str = Query(..., description='UTC ISO8601, e.g., 2025-08-10T12:00:00Z')):
     dt = datetime.fromisoformat(iso.replace('Z', '+00:00')).astimezone(timezone.utc)
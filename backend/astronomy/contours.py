@@ -0,0 +1,277 @@
+"""
+Vector export of class grids (month-length, day/twilight) as GeoJSON and SVG.
+
+A class grid is a uint8 (lat, lon) array on a regular grid, like the ones
+generate_lunar_heatmaps saves. Each class region is traced with marching
+squares, simplified with Douglas-Peucker, and written as
+  - GeoJSON in lat/lon: one MultiPolygon Feature per class, and
+  - an SVG in the same north-pole azimuthal equidistant frame as the PNGs.
+Regions that cross the antimeridian are split at ±180°, as GeoJSON expects.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+
+from backend.astronomy.projection import forward, pixel_frame, LON0_DOWN
+
+# marching-squares case (tl*8 + tr*4 + br*2 + bl) -> cell edges joined.
+# Saddles (5, 10) keep diagonal corners apart, i.e. regions are 4-connected.
+_SEGMENTS = {
+    1: (('left', 'bottom'),),
+    2: (('bottom', 'right'),),
+    3: (('left', 'right'),),
+    4: (('top', 'right'),),
+    5: (('top', 'right'), ('left', 'bottom')),
+    6: (('top', 'bottom'),),
+    7: (('top', 'left'),),
+    8: (('top', 'left'),),
+    9: (('top', 'bottom'),),
+    10: (('top', 'left'), ('bottom', 'right')),
+    11: (('top', 'right'),),
+    12: (('left', 'right'),),
+    13: (('bottom', 'right'),),
+    14: (('left', 'bottom'),),
+}
+
+# edge midpoints in doubled cell coordinates (2*row, 2*col) relative to the top-left corner
+_EDGE_OFFSETS = {
+    'top': (0, 1),
+    'right': (1, 2),
+    'bottom': (2, 1),
+    'left': (1, 0),
+}
+
+
+def trace_rings(mask):
+    """Closed boundary rings of a boolean mask, in fractional (row, col) cell coordinates.
+
+    The mask is zero-padded, so every ring closes; coordinates may reach
+    -0.5 and n - 0.5 on the outer edges.
+    """
+    padded = np.pad(np.asarray(mask, dtype=bool), 1)
+    tl = padded[:-1, :-1]
+    tr = padded[:-1, 1:]
+    br = padded[1:, 1:]
+    bl = padded[1:, :-1]
+    cases = tl * 8 + tr * 4 + br * 2 + bl * 1
+
+    # each midpoint lies on exactly two segments; link them into rings
+    neighbours = {}
+    for case, segments in _SEGMENTS.items():
+        rows, cols = np.nonzero(cases == case)
+        for a, b in segments:
+            (ar, ac), (br_, bc) = _EDGE_OFFSETS[a], _EDGE_OFFSETS[b]
+            for r, c in zip(rows.tolist(), cols.tolist()):
+                p = (2 * r + ar, 2 * c + ac)
+                q = (2 * r + br_, 2 * c + bc)
+                neighbours.setdefault(p, []).append(q)
+                neighbours.setdefault(q, []).append(p)
+
+    rings = []
+    seen = set()
+    for start in neighbours:
+        if start in seen:
+            continue
+        ring = [start]
+        seen.add(start)
+        prev, cur = None, start
+        while True:
+            a, b = neighbours[cur]
+            nxt = b if a == prev else a
+            if nxt == start:
+                break
+            ring.append(nxt)
+            seen.add(nxt)
+            prev, cur = cur, nxt
+        ring.append(start)
+        # doubled padded coordinates -> fractional unpadded (row, col)
+        rings.append(np.asarray(ring, dtype=float) / 2.0 - 1.0)
+    return rings
+
+
+def douglas_peucker(points, tolerance):
+    """Simplify an open polyline ((n, 2) array); endpoints are kept."""
+    points = np.asarray(points, dtype=float)
+    if len(points) < 3 or tolerance <= 0:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+        seg = points[j] - points[i]
+        rel = points[i + 1:j] - points[i]
+        norm = math.hypot(seg[0], seg[1])
+        if norm == 0.0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / norm
+        k = int(np.argmax(dist))
+        if dist[k] > tolerance:
+            k += i + 1
+            keep[k] = True
+            stack.append((i, k))
+            stack.append((k, j))
+    return points[keep]
+
+
+def simplify_ring(ring, tolerance):
+    """Douglas-Peucker for a closed ring (first point == last point)."""
+    body = ring[:-1]
+    if len(body) < 4 or tolerance <= 0:
+        return ring
+    # split at the vertex farthest from the start so both halves are open lines
+    far = int(np.argmax(np.hypot(*(body - body[0]).T)))
+    first = douglas_peucker(body[:far + 1], tolerance)
+    second = douglas_peucker(np.vstack([body[far:], body[:1]]), tolerance)
+    return np.vstack([first, second[1:]])
+
+
+def _signed_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+
+def _contains(ring, point):
+    """Even-odd point-in-polygon test."""
+    x, y = point
+    xi, yi = ring[:-1, 0], ring[:-1, 1]
+    xj, yj = ring[1:, 0], ring[1:, 1]
+    crosses = (yi > y) != (yj > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = xi + (y - yi) * (xj - xi) / (yj - yi)
+    return bool(np.count_nonzero(crosses & (x < x_cross)) % 2)
+
+
+def _nest(rings):
+    """Group rings into polygons [outer, *holes] by even-odd nesting depth."""
+    areas = [abs(_signed_area(r)) for r in rings]
+    order = sorted(range(len(rings)), key=lambda i: -areas[i])
+    parents = {}
+    depth = {}
+    for pos, i in enumerate(order):
+        probe = rings[i][0]
+        parent = None
+        # the smallest larger ring containing this one is its parent
+        for j in reversed(order[:pos]):
+            if _contains(rings[j], probe):
+                parent = j
+                break
+        parents[i] = parent
+        depth[i] = 0 if parent is None else depth[parent] + 1
+    polygons = {i: [rings[i]] for i in order if depth[i] % 2 == 0}
+    for i in order:
+        if depth[i] % 2 == 1:
+            polygons[parents[i]].append(rings[i])
+    return list(polygons.values())
+
+
+def grid_to_features(classes, lats, lons, names, tolerance=None):
+    """GeoJSON Features (one MultiPolygon per class present) for a class grid.
+
+    classes: uint8 (len(lats), len(lons)) grid on a regular lat/lon grid
+    names: sequence mapping class code -> label (e.g. CLASS_CODES)
+    tolerance: Douglas-Peucker tolerance in degrees (default: one grid step)
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    dlat = lats[1] - lats[0] if len(lats) > 1 else -1.0
+    dlon = lons[1] - lons[0] if len(lons) > 1 else 1.0
+    if tolerance is None:
+        tolerance = min(abs(dlat), abs(dlon))
+
+    # repeat the first column at lon + 360 so regions reach +180 when the grid wraps
+    wraps = abs(lons[0] + dlon * len(lons) - (lons[0] + 360.0)) < 1e-6
+    grid = np.hstack([classes, classes[:, :1]]) if wraps else classes
+
+    features = []
+    for code in np.unique(classes).tolist():
+        polygons = []
+        rings = []
+        for ring in trace_rings(grid == code):
+            lat = np.clip(lats[0] + ring[:, 0] * dlat, -90.0, 90.0)
+            lon = np.clip(lons[0] + ring[:, 1] * dlon, -180.0, 180.0)
+            ring = simplify_ring(np.column_stack([lon, lat]), tolerance)
+            if len(ring) >= 4 and _signed_area(ring) != 0.0:
+                rings.append(ring)
+        for polygon in _nest(rings):
+            out = []
+            for k, ring in enumerate(polygon):
+                # GeoJSON: exterior counter-clockwise, holes clockwise
+                if (_signed_area(ring) > 0) != (k == 0):
+                    ring = ring[::-1]
+                out.append([[round(float(x), 4), round(float(y), 4)] for x, y in ring])
+            polygons.append(out)
+        features.append({
+            'type': 'Feature',
+            'properties': {'class': names[code]},
+            'geometry': {'type': 'MultiPolygon', 'coordinates': polygons},
+        })
+    return features
+
+
+def write_geojson(path, features, properties=None):
+    """Write a FeatureCollection; properties go on the collection itself."""
+    collection = {'type': 'FeatureCollection', 'features': features}
+    if properties:
+        collection['properties'] = properties
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(collection, f, separators=(',', ':'))
+    return path
+
+
+def _densify(ring, max_step_deg=1.0):
+    # straight lat/lon edges are curves in the projection; add vertices so they bend
+    out = [ring[:1]]
+    for a, b in zip(ring[:-1], ring[1:]):
+        n = max(1, int(math.ceil(float(np.max(np.abs(b - a))) / max_step_deg)))
+        t = (np.arange(1, n + 1) / n)[:, None]
+        out.append(a + (b - a) * t)
+    return np.vstack(out)
+
+
+def _svg_color(rgba):
+    r, g, b = rgba[:3]
+    alpha = rgba[3] / 255.0 if len(rgba) > 3 else 1.0
+    return f'rgb({r},{g},{b})', round(alpha, 3)
+
+
+def write_svg(path, features, colors, size_px=2000, margin_ratio=0.05, orientation=LON0_DOWN, stroke_width=None):
+    """Write features projected like the heatmap PNGs (same size_px / margin / orientation).
+
+    colors: class label -> (r, g, b[, a]) as in the generators' CMAP.
+    """
+    scale, cx, cy = pixel_frame(size_px, margin_ratio)
+    if stroke_width is None:
+        stroke_width = max(1.0, size_px * 0.0008)
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size_px}" height="{size_px}" viewBox="0 0 {size_px} {size_px}">'
+    ]
+    for feature in features:
+        label = feature['properties']['class']
+        fill, opacity = _svg_color(colors.get(label, (128, 128, 128, 128)))
+        parts = []
+        for polygon in feature['geometry']['coordinates']:
+            for ring in polygon:
+                ring = _densify(np.asarray(ring, dtype=float))
+                x, y = forward(ring[:, 1], ring[:, 0], orientation=orientation)
+                xs = cx + x * scale
+                ys = cy + y * scale
+                parts.append('M' + 'L'.join(f'{px:.1f} {py:.1f}' for px, py in zip(xs, ys)) + 'Z')
+        if not parts:
+            continue
+        lines.append(
+            f'<path class="cls-{label}" d="{"".join(parts)}" fill="{fill}" fill-opacity="{opacity}" '
+            f'fill-rule="evenodd" stroke="{fill}" stroke-width="{stroke_width:.2f}"><title>{label}</title></path>'
+        )
+    lines.append('</svg>')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+    return path
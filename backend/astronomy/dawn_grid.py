@@ -0,0 +1,397 @@
+"""
+Vectorized dawn solver for whole latitude x longitude grids.
+
+Mirrors astral's NOAA time_of_transit / dawn / sunrise arithmetic and the
+fallback chain of backend.astronomy.sun.get_event_with_fallback('dawn', ...)
+(astronomical -> nautical -> civil -> sunrise -> migrated) using NumPy
+arrays, so map sweeps can solve ~65k cells in one pass instead of calling
+astral per point. Times agree with astral to float rounding; callers that
+need bit-identical datetimes re-solve the few cells they keep with the
+scalar solver (see exact_dawn).
+
+first_dawn_grid memoizes "first dawn after T" for a whole lat x lon block
+(optionally as .npz files under CACHE_DIR) so repeated map sweeps over the
+same full moon read arrays instead of re-solving up to 10 dates per cell.
+"""
+
+from datetime import datetime, timedelta, timezone
+import hashlib
+import math
+import os
+import threading
+
+import numpy as np
+import pytz
+
+from astral import refraction_at_zenith
+from astral.julian import julianday
+from astral.sun import SUN_APPARENT_RADIUS
+
+# Tag codes returned by dawn_utc_grid, indexed like get_event_with_fallback's tags
+DAWN_TAGS = ('astronomical', 'nautical', 'civil', 'sunrise', 'migrated', 'not_found')
+NOT_FOUND = DAWN_TAGS.index('not_found')
+
+CACHE_DIR = os.getenv(
+    'DAWN_GRID_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'map', '.cache', 'dawn'),
+)
+
+_first_dawn_cache = {}
+_first_dawn_lock = threading.Lock()
+
+# (zenith, tag index) in get_event_with_fallback order
+_DAWN_STEPS = (
+    (90.0 + 18, 0),
+    (90.0 + 12, 1),
+    (90.0 + 6, 2),
+    (90.0 + SUN_APPARENT_RADIUS, 3),
+)
+
+
+def tz_offset_minutes(lons):
+    """Fixed UTC offsets (minutes) matching map._tz_from_lon: 15° = 1 hour."""
+    return np.round(np.asarray(lons, dtype=float) / 15.0) * 60.0
+
+
+def _sun_declination_eq_time(jc):
+    # NOAA series, same term order as astral.sun
+    l0 = (280.46646 + jc * (36000.76983 + 0.0003032 * jc)) % 360.0
+    m = 357.52911 + jc * (35999.05029 - 0.0001537 * jc)
+    e = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+    mrad = np.radians(m)
+    c = (
+        np.sin(mrad) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+        + np.sin(mrad + mrad) * (0.019993 - 0.000101 * jc)
+        + np.sin(mrad + mrad + mrad) * 0.000289
+    )
+    omega = 125.04 - 1934.136 * jc
+    lambd = (l0 + c) - 0.00569 - 0.00478 * np.sin(np.radians(omega))
+    seconds = 21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))
+    e0 = 23.0 + (26.0 + (seconds / 60.0)) / 60.0
+    oc = e0 + 0.00256 * np.cos(np.radians(omega))
+    declination = np.degrees(np.arcsin(np.sin(np.radians(oc)) * np.sin(np.radians(lambd))))
+
+    y = np.tan(np.radians(oc) / 2.0)
+    y = y * y
+    sinm = np.sin(np.radians(m))
+    etime = (
+        y * np.sin(2.0 * np.radians(l0))
+        - 2.0 * e * sinm
+        + 4.0 * e * y * sinm * np.cos(2.0 * np.radians(l0))
+        - 0.5 * y * y * np.sin(4.0 * np.radians(l0))
+        - 1.25 * e * e * np.sin(2.0 * np.radians(m))
+    )
+    return declination, np.degrees(etime) * 4.0
+
+
+def _transit_minutes(day, lat, lon, zenith):
+    """Rising transit of zenith on `day`, in minutes after 00:00 UTC (NaN if never)."""
+    lat = np.clip(lat, -89.8, 89.8)
+    zen = math.radians(zenith + refraction_at_zenith(zenith))
+    jd = julianday(day)
+    lat_rad = np.radians(lat)
+    adjustment = 0.0
+    time_utc = None
+    for _ in range(2):
+        jc = (jd + adjustment - 2451545.0) / 36525.0
+        declination, eqtime = _sun_declination_eq_time(jc)
+        decl_rad = np.radians(declination)
+        h = (math.cos(zen) - np.sin(lat_rad) * np.sin(decl_rad)) / (np.cos(lat_rad) * np.cos(decl_rad))
+        with np.errstate(invalid='ignore'):
+            hour_angle = np.arccos(h)
+        delta = -lon - np.degrees(hour_angle)
+        offset = delta * 4.0 - eqtime
+        offset = np.where(offset < -720.0, offset + 1440, offset)
+        time_utc = 720.0 + offset
+        adjustment = time_utc / 1440.0
+    return time_utc
+
+
+def _dawn_minutes(day, lat, lon, offset_min, zenith):
+    """astral.dawn/sunrise for `day` in a fixed-offset zone, as minutes from day 00:00 UTC.
+
+    Applies astral's retry on the neighbouring UTC date when the local date
+    of the transit does not match; NaN where astral would raise.
+    """
+    t0 = _transit_minutes(day, lat, lon, zenith)
+    local_day = np.floor((t0 + offset_min) / 1440.0)
+    out = np.where(local_day == 0, t0, np.nan)
+    for shift in (1, -1):
+        # tot_date < date -> search day+1; tot_date > date -> search day-1
+        need = (local_day == -shift)
+        if not np.any(need):
+            continue
+        t1 = _transit_minutes(day + timedelta(days=shift), lat, lon, zenith)
+        ok = need & (np.floor((t1 + offset_min) / 1440.0) == -shift)
+        out = np.where(ok, t1 + shift * 1440.0, out)
+    return out
+
+
+def dawn_utc_grid(day, lats, lons, offsets=None):
+    """Vectorized get_event_with_fallback('dawn', lat, lon, tz, day).
+
+    lats/lons are 1-D; the result is shaped (len(lats), len(lons)).
+    offsets: per-longitude fixed UTC offsets in minutes (default: tz_offset_minutes).
+    Returns (minutes, tags): minutes after `day` 00:00 UTC (NaN when not found)
+    and int8 indices into DAWN_TAGS.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    if offsets is None:
+        offsets = tz_offset_minutes(lons)
+    lat = lats[:, None] + np.zeros((1, lons.size))
+    lon = np.zeros((lats.size, 1)) + lons[None, :]
+    off = np.zeros((lats.size, 1)) + np.asarray(offsets, dtype=float)[None, :]
+
+    minutes = np.full(lat.shape, np.nan)
+    tags = np.full(lat.shape, NOT_FOUND, dtype=np.int8)
+    todo = np.ones(lat.shape, dtype=bool)
+    for zenith, tag in _DAWN_STEPS:
+        if not todo.any():
+            break
+        m = _dawn_minutes(day, lat[todo], lon[todo], off[todo], zenith)
+        hit = ~np.isnan(m)
+        idx = np.flatnonzero(todo)[hit]
+        minutes.flat[idx] = m[hit]
+        tags.flat[idx] = tag
+        todo.flat[idx] = False
+
+    # Migrate latitude toward the equator one degree at a time (astronomical only)
+    idx = np.flatnonzero(todo)
+    mig = lat.flat[idx].copy()
+    while idx.size:
+        mig = np.where(mig > 0, mig - 1, mig + 1)
+        m = _dawn_minutes(day, mig, lon.flat[idx], off.flat[idx], 90.0 + 18)
+        hit = ~np.isnan(m)
+        minutes.flat[idx[hit]] = m[hit]
+        tags.flat[idx[hit]] = DAWN_TAGS.index('migrated')
+        # the scalar loop stops once it has stepped onto the equator
+        keep = ~hit & (np.abs(mig) >= 1)
+        idx, mig = idx[keep], mig[keep]
+    return minutes, tags
+
+
+def minutes_to_utc(day, minutes):
+    """Convert minutes after `day` 00:00 UTC back to an aware UTC datetime."""
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(minutes=float(minutes))
+
+
+def exact_dawn(get_event_with_fallback, day, lat, lon, tz):
+    """Scalar dawn in UTC via get_event_with_fallback, or (None, tag)."""
+    try:
+        dawn_dt, tag = get_event_with_fallback('dawn', lat, lon, tz, day)
+    except Exception:
+        return None, 'error'
+    if dawn_dt is None:
+        return None, tag
+    return dawn_dt.astimezone(pytz.UTC), tag
+
+
+def earliest_dawn_by_lon(day, lats, lons, get_event_with_fallback, tz_from_lon, tol_minutes=1.0 / 60.0):
+    """For each longitude, the (utc, lat, tag) with the earliest dawn on `day`.
+
+    Solves the whole grid with dawn_utc_grid, then re-solves only the cells
+    within tol_minutes of each column minimum with the scalar solver, scanning
+    them in `lats` order with a strict '<' so ties resolve exactly like the
+    per-point sweep. Returns {lon: (utc, lat, tag)}; longitudes with no dawn
+    are omitted.
+    """
+    lats = list(lats)
+    lons = list(lons)
+    minutes, _ = dawn_utc_grid(day, lats, lons)
+    best_by_lon = {}
+    for j, lon in enumerate(lons):
+        col = minutes[:, j]
+        if np.all(np.isnan(col)):
+            continue
+        cutoff = np.nanmin(col) + tol_minutes
+        tz = tz_from_lon(lon)
+        best = None
+        for i in np.flatnonzero(col <= cutoff):
+            dawn_utc, tag = exact_dawn(get_event_with_fallback, day, lats[i], lon, tz)
+            if dawn_utc is None:
+                continue
+            if best is None or dawn_utc < best[0]:
+                best = (dawn_utc, lats[i], tag)
+        if best is not None:
+            best_by_lon[lon] = best
+    return best_by_lon
+
+
+def _dawn_cells(day, lat, lon, off):
+    """dawn_utc_grid for paired 1-D (lat, lon) cells rather than a full grid."""
+    minutes = np.full(lat.shape, np.nan)
+    todo = np.ones(lat.shape, dtype=bool)
+    for zenith, _tag in _DAWN_STEPS:
+        if not todo.any():
+            break
+        m = _dawn_minutes(day, lat[todo], lon[todo], off[todo], zenith)
+        idx = np.flatnonzero(todo)[~np.isnan(m)]
+        minutes[idx] = m[~np.isnan(m)]
+        todo[idx] = False
+    return minutes, todo
+
+
+def refine_lat_golden(day, lons, lat_guess, span=1.0, tol=1e-3):
+    """Golden-section search for the latitude of earliest dawn near lat_guess.
+
+    All longitudes are refined together: lat_guess is per-longitude and the
+    bracket is [lat_guess - span, lat_guess + span], clipped to [-90, 90].
+    Returns (lats, minutes): refined latitudes and their dawn in minutes after
+    `day` 00:00 UTC (NaN when the bracket has no dawn). The dawn minimum is
+    assumed unimodal inside the bracket.
+    """
+    lons = np.asarray(lons, dtype=float)
+    off = tz_offset_minutes(lons)
+    a = np.clip(np.asarray(lat_guess, dtype=float) - span, -90.0, 90.0)
+    b = np.clip(np.asarray(lat_guess, dtype=float) + span, -90.0, 90.0)
+    inv_phi = (math.sqrt(5.0) - 1.0) / 2.0
+
+    def f(lat):
+        m, _ = _dawn_cells(day, lat, lons, off)
+        return np.where(np.isnan(m), np.inf, m)
+
+    c = b - inv_phi * (b - a)
+    d = a + inv_phi * (b - a)
+    fc, fd = f(c), f(d)
+    while np.max(b - a) > tol:
+        left = fc < fd
+        b = np.where(left, d, b)
+        a = np.where(left, a, c)
+        c_new = b - inv_phi * (b - a)
+        d_new = a + inv_phi * (b - a)
+        c, d = c_new, d_new
+        fc, fd = f(c), f(d)
+    lat = (a + b) / 2.0
+    return lat, _dawn_cells(day, lat, lons, off)[0]
+
+
+
+def first_dawn_after_grid(dt_utc, lats, lons, max_days=10):
+    """Vectorized map._first_dawn_after_with_tag over a lat x lon grid.
+
+    Each longitude starts from the local date of dt_utc in its fixed-offset
+    zone and tries up to max_days dates. Returns (seconds, tags): seconds
+    after dt_utc of the first dawn strictly later than dt_utc (NaN when none)
+    and int8 indices into DAWN_TAGS (NOT_FOUND when none).
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    offsets = tz_offset_minutes(lons)
+    dt_utc = dt_utc.astimezone(timezone.utc)
+    midnight = datetime(dt_utc.year, dt_utc.month, dt_utc.day, tzinfo=timezone.utc)
+    base_minutes = (dt_utc - midnight).total_seconds() / 60.0
+    # local start date of each longitude, in days from dt_utc's UTC date
+    start_shift = np.floor((base_minutes + offsets) / 1440.0).astype(int)
+
+    seconds = np.full((lats.size, lons.size), np.nan)
+    tags = np.full((lats.size, lons.size), NOT_FOUND, dtype=np.int8)
+    for shift in np.unique(start_shift).tolist():
+        cols = np.flatnonzero(start_shift == shift)
+        todo = np.ones((lats.size, cols.size), dtype=bool)
+        for i in range(max_days):
+            if not todo.any():
+                break
+            day_off = shift + i
+            minutes, day_tags = dawn_utc_grid(midnight.date() + timedelta(days=day_off), lats, lons[cols], offsets[cols])
+            after = (minutes + day_off * 1440.0 - base_minutes) * 60.0
+            with np.errstate(invalid='ignore'):
+                hit = todo & (after > 0)
+            block_s = seconds[:, cols]
+            block_t = tags[:, cols]
+            block_s[hit] = after[hit]
+            block_t[hit] = day_tags[hit]
+            seconds[:, cols] = block_s
+            tags[:, cols] = block_t
+            todo &= ~hit
+    return seconds, tags
+
+
+class FirstDawnGrid:
+    """First dawn after dt_utc for every (lat, lon) of a block, as arrays."""
+
+    def __init__(self, dt_utc, lats, lons, seconds, tags):
+        self.dt_utc = dt_utc
+        self.lats = list(lats)
+        self.lons = list(lons)
+        self.seconds = seconds
+        self.tags = tags
+        self._row = {float(v): i for i, v in enumerate(self.lats)}
+        self._col = {float(v): j for j, v in enumerate(self.lons)}
+
+    def covers(self, lat, lon):
+        return float(lat) in self._row and float(lon) in self._col
+
+    def lookup(self, lat, lon):
+        """(dawn_utc, tag) like _first_dawn_after_with_tag, or (None, 'not_found')."""
+        i, j = self._row[float(lat)], self._col[float(lon)]
+        s = self.seconds[i, j]
+        if s != s:
+            return None, 'not_found'
+        return self.dt_utc.astimezone(pytz.UTC) + timedelta(seconds=float(s)), DAWN_TAGS[self.tags[i, j]]
+
+    def earliest_by_lat(self, exact, tol_seconds=1.0):
+        """{lat: (dawn_utc, lon, tag) or None}: earliest dawn across the block's longitudes.
+
+        Cells within tol_seconds of a row minimum are re-solved with
+        exact(lat, lon) -> (dawn_utc, tag) in longitude order with a strict
+        '<', so ties resolve like a per-point sweep.
+        """
+        out = {}
+        for i, lat in enumerate(self.lats):
+            row = self.seconds[i]
+            if np.all(np.isnan(row)):
+                out[lat] = None
+                continue
+            with np.errstate(invalid='ignore'):
+                near = np.flatnonzero(row <= np.nanmin(row) + tol_seconds)
+            best = None
+            for j in near.tolist():
+                d, tag = exact(lat, self.lons[j])
+                if d and (best is None or d < best[0]):
+                    best = (d, self.lons[j], tag)
+            out[lat] = best
+        return out
+
+
+def _first_dawn_path(key):
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"first_dawn_{key[0][:19].replace(':', '-')}_{digest}.npz")
+
+
+def first_dawn_grid(dt_utc, lats, lons, max_days=10, use_disk=False):
+    """Memoized FirstDawnGrid for (dt_utc, lats, lons, max_days).
+
+    With use_disk the arrays are also saved to / loaded from CACHE_DIR, so
+    later runs for the same full moon skip the solve entirely.
+    """
+    key = (dt_utc.astimezone(timezone.utc).isoformat(),
+           tuple(float(v) for v in lats), tuple(float(v) for v in lons), max_days)
+    with _first_dawn_lock:
+        hit = _first_dawn_cache.get(key)
+    if hit is not None:
+        return hit
+    path = _first_dawn_path(key)
+    seconds = tags = None
+    if use_disk and os.path.exists(path):
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                seconds, tags = data['seconds'], data['tags']
+            if seconds.shape != (len(lats), len(lons)):
+                seconds = tags = None
+        except Exception:
+            seconds = tags = None
+    if seconds is None:
+        seconds, tags = first_dawn_after_grid(dt_utc, lats, lons, max_days=max_days)
+        if use_disk:
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                tmp = path + '.tmp.npz'
+                np.savez(tmp, seconds=seconds, tags=tags)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+    grid = FirstDawnGrid(dt_utc, lats, lons, seconds, tags)
+    with _first_dawn_lock:
+        _first_dawn_cache[key] = grid
+    return grid
@@ -21,6 +21,18 @@ try:
 	from .moon import find_prev_next_full_moon
 except Exception:
 	from moon import find_prev_next_full_moon
+try:
+	from . import dawn_grid
+except Exception:
+	try:
+		import dawn_grid
+	except Exception:
+		# numpy missing: fall back to the per-point sweep
+		dawn_grid = None
+try:
+	from .projection import azimuthal_eq_coords, LON0_UP
+except Exception:
+	from projection import azimuthal_eq_coords, LON0_UP
 
 # Try to load skyfield for accurate sun/moon subpoint calculations. If unavailable, we'll skip plotting.
 _skyfield_available = False
@@ -44,21 +56,8 @@ def _tz_from_lon(lon):
 
 
 def _azimuthal_eq_coords(lat_deg, lon_deg, center_lon_deg=0, R=1.0):
-	"""
-	Azimuthal equidistant projection centered on the North Pole (lat=90°).
-	Returns (x, y) where x to the right, y down (SVG coordinates will flip y as needed).
-	"""
-	# convert to radians
-	phi = math.radians(lat_deg)  # latitude
-	# invert longitude delta so that increasing longitude maps in the
-	# opposite rotational direction (clockwise motion on the plot)
-	delta_lambda = math.radians(center_lon_deg - lon_deg)
-	# c = pi/2 - phi
-	c = (math.pi / 2.0) - phi
-	rho = R * c
-	x = rho * math.sin(delta_lambda)
-	y = -rho * math.cos(delta_lambda)
-	return x, y
+	"""Azimuthal equidistant projection centered on the North Pole (see projection.py)."""
+	return azimuthal_eq_coords(lat_deg, lon_deg, center_lon_deg=center_lon_deg, R=R, orientation=LON0_UP)
 
 
 def generate_dawn_map_svg(
@@ -68,12 +67,18 @@ def generate_dawn_map_svg(
 	lat_step=1,
 	lon_step=1,
 	size_px=2000,
-	margin_ratio=0.05
+	margin_ratio=0.05,
+	vectorized=True,
+	refine_lat=False
 ):
 	"""
 	Compute, for each integer longitude, the latitude where local dawn of the 1st
 	of (year,month) occurs earliest in UTC. Project points with azimuthal equidistant
 	centered on the north pole and write a zoom-friendly SVG.
+
+	vectorized: use the NumPy grid solver (dawn_grid) instead of one astral call
+	per point; the output is identical. refine_lat: additionally golden-section
+	search each longitude's latitude between grid rows (off by default).
 	"""
 	if year is None or month is None:
 		now = datetime.utcnow()
@@ -90,27 +95,52 @@ def generate_dawn_map_svg(
 	lons = list(range(-180, 180, lon_step))
 	lats = list(range(-90, 91, lat_step))
 
-	for lon in lons:
-		best = None  # tuple (utc_datetime, lat, tag)
-		tz = _tz_from_lon(lon)
-		for lat in lats:
-			try:
-				dawn_dt, tag = get_event_with_fallback('dawn', lat, lon, tz, first_of_month)
-			except Exception:
-				dawn_dt = None
-				tag = 'error'
-			if dawn_dt is None:
-				continue
-			# dawn_dt should be timezone-aware in tz; convert to UTC for comparison
-			try:
-				dawn_utc = dawn_dt.astimezone(pytz.UTC)
-			except Exception:
-				continue
-			if best is None or dawn_utc < best[0]:
-				best = (dawn_utc, lat, tag)
-		if best is not None:
-			points_by_lon.append((lon, best[1], best[0], best[2]))
-		# if best is None we skip that longitude (no dawn found in sweep)
+	if vectorized and dawn_grid is not None:
+		# Solve the whole lat x lon grid in one NumPy pass, then re-solve only the
+		# near-minimal cells per longitude with astral so the SVG is unchanged.
+		best_by_lon = dawn_grid.earliest_dawn_by_lon(first_of_month, lats, lons, get_event_with_fallback, _tz_from_lon)
+		for lon in lons:
+			best = best_by_lon.get(lon)
+			if best is not None:
+				points_by_lon.append((lon, best[1], best[0], best[2]))
+		if refine_lat and points_by_lon:
+			# optional sub-grid latitude via golden-section search (changes the output)
+			ref_lats, ref_min = dawn_grid.refine_lat_golden(
+				first_of_month,
+				[p[0] for p in points_by_lon],
+				[p[1] for p in points_by_lon],
+				span=lat_step,
+			)
+			refined = []
+			for (lon, lat, utc_dt, tag), r_lat, r_min in zip(points_by_lon, ref_lats, ref_min):
+				r_utc = dawn_grid.minutes_to_utc(first_of_month, r_min) if r_min == r_min else None
+				if r_utc is not None and r_utc < utc_dt:
+					refined.append((lon, float(r_lat), r_utc, tag))
+				else:
+					refined.append((lon, lat, utc_dt, tag))
+			points_by_lon = refined
+	else:
+		for lon in lons:
+			best = None  # tuple (utc_datetime, lat, tag)
+			tz = _tz_from_lon(lon)
+			for lat in lats:
+				try:
+					dawn_dt, tag = get_event_with_fallback('dawn', lat, lon, tz, first_of_month)
+				except Exception:
+					dawn_dt = None
+					tag = 'error'
+				if dawn_dt is None:
+					continue
+				# dawn_dt should be timezone-aware in tz; convert to UTC for comparison
+				try:
+					dawn_utc = dawn_dt.astimezone(pytz.UTC)
+				except Exception:
+					continue
+				if best is None or dawn_utc < best[0]:
+					best = (dawn_utc, lat, tag)
+			if best is not None:
+				points_by_lon.append((lon, best[1], best[0], best[2]))
+			# if best is None we skip that longitude (no dawn found in sweep)
 
 	# Prepare SVG projection scaling
 	# For azimuthal eq. with R=1, max rho = pi (south pole).
@@ -199,30 +229,26 @@ def generate_dawn_map_svg(
 
 def _first_dawn_after(dt_utc, lat, lon, max_days=10):
 	"""Return the first dawn (UTC datetime) after dt_utc at given lat/lon using fixed-offset tz approximation."""
-	tz = _tz_from_lon(lon)
-	# local start date
-	local = dt_utc.astimezone(tz)
-	start_date = local.date()
-	for i in range(0, max_days):
-		cand_date = start_date + timedelta(days=i)
-		try:
-			dawn_local, tag = get_event_with_fallback('dawn', lat, lon, tz, cand_date)
-		except Exception:
-			dawn_local = None
-		if dawn_local:
-			try:
-				dawn_utc = dawn_local.astimezone(pytz.UTC)
-			except Exception:
-				continue
-			if dawn_utc > dt_utc:
-				return dawn_utc
-	return None
+	return _first_dawn_after_with_tag(dt_utc, lat, lon, max_days=max_days)[0]
+
+
+# (dt_utc, lat, lon, max_days) -> (dawn_utc, tag); the debug sweeps ask for the same cells repeatedly
+_first_dawn_memo = {}
 
 
 def _first_dawn_after_with_tag(dt_utc, lat, lon, max_days=10):
 	"""Return tuple (dawn_utc, tag) for first dawn after dt_utc or (None, tag).
 	Tag comes from get_event_with_fallback and helps identify secondary indicators.
+	Results are memoized per (dt_utc, lat, lon, max_days).
 	"""
+	key = (dt_utc, lat, lon, max_days)
+	hit = _first_dawn_memo.get(key)
+	if hit is None:
+		hit = _first_dawn_memo[key] = _solve_first_dawn_after(dt_utc, lat, lon, max_days)
+	return hit
+
+
+def _solve_first_dawn_after(dt_utc, lat, lon, max_days):
 	tz = _tz_from_lon(lon)
 	local = dt_utc.astimezone(tz)
 	start_date = local.date()
@@ -244,6 +270,45 @@ def _first_dawn_after_with_tag(dt_utc, lat, lon, max_days=10):
 	return None, 'not_found'
 
 
+def _first_dawn_block(prev_full, lats, lons):
+	"""Memoized first-dawn grid for a lat x lon block (None without numpy).
+
+	Saved under dawn_grid.CACHE_DIR so reruns for the same full moon skip the solve.
+	"""
+	if dawn_grid is None:
+		return None
+	return dawn_grid.first_dawn_grid(prev_full, lats, lons, use_disk=True)
+
+
+def _first_dawn_lookup(prev_full, lat, lon, grid=None):
+	"""(dawn_utc, tag) for one cell: the exact memo when solved, else the grid value."""
+	if grid is None or (prev_full, lat, lon, 10) in _first_dawn_memo or not grid.covers(lat, lon):
+		return _first_dawn_after_with_tag(prev_full, lat, lon)
+	return grid.lookup(lat, lon)
+
+
+def _earliest_dawn_by_lat(prev_full, lats, lon_range, grid=None):
+	"""{lat: (dawn_utc, lon, tag) or None}: earliest first dawn after prev_full across lon_range.
+
+	Ties go to the first longitude in lon_range order. With a first-dawn grid
+	only the cells near each row minimum are re-solved exactly.
+	"""
+	exact = lambda lat, lon: _first_dawn_after_with_tag(prev_full, lat, lon)
+	if grid is not None:
+		found = grid.earliest_by_lat(exact)
+		return {lat: found[lat] for lat in lats}
+	chosen = {}
+	for lat in lats:
+		best = None
+		for lon in lon_range:
+			d, dtag = exact(lat, lon)
+			if d:
+				if best is None or d < best[0]:
+					best = (d, lon, dtag)
+		chosen[lat] = best
+	return chosen
+
+
 def generate_flip_test_svg(out_path=None):
 	"""Perform the limited sweeps described and plot flip points to an SVG.
 
@@ -437,24 +502,10 @@ def generate_true_points_svg(prev_full, out_path=None, max_west=-90):
 		out_path = os.path.join(os.path.dirname(__file__), 'true_points.svg')
 
 	# compute chosen_by_lat similar to debug generator, but keep the tag
-	chosen_by_lat = {}
 	lon_range = list(range(0, max_west-1, -1))
-	for lat in range(0, 86):
-		best = None
-		for lon in lon_range:
-			d, dtag = _first_dawn_after_with_tag(prev_full, lat, lon)
-			if d:
-				if best is None or d < best[0]:
-					best = (d, lon, dtag)
-		chosen_by_lat[lat] = (best[1], best[2]) if best else None
-	for lat in range(-1, -86, -1):
-		best = None
-		for lon in lon_range:
-			d, dtag = _first_dawn_after_with_tag(prev_full, lat, lon)
-			if d:
-				if best is None or d < best[0]:
-					best = (d, lon, dtag)
-		chosen_by_lat[lat] = (best[1], best[2]) if best else None
+	lats = list(range(0, 86)) + list(range(-1, -86, -1))
+	earliest = _earliest_dawn_by_lat(prev_full, lats, lon_range, grid=_first_dawn_block(prev_full, lats, lon_range))
+	chosen_by_lat = {lat: ((best[1], best[2]) if best else None) for lat, best in earliest.items()}
 
 	# fetch sun and moon subpoints at prev_full (use astro-service)
 	sun_pos = None
@@ -582,34 +633,18 @@ if __name__ == "__main__":
 		# Determine chosen (earliest-dawn) longitude for each latitude within the search range.
 		# This enforces the rule: the plotted point for a latitude is the longitude with the
 		# earliest UTC dawn (if any). We'll compute for north and south separately.
-		chosen_by_lat = {}
+		# One first-dawn grid serves the precompute and the frame scan below;
+		# only cells near each latitude's minimum are re-solved exactly.
 		lon_range = list(range(0, max_west-1, -1))  # 0, -1, ... max_west
-		# north
-		for lat in range(0, 86):
-			best = None  # (dawn_utc, lon)
-			for lon in lon_range:
-				d = _first_dawn_after(prev_full, lat, lon)
-				f_log.write(f'precompute lat={lat} lon={lon} dawn={d}\n')
-				if d:
-					if best is None or d < best[0]:
-						best = (d, lon)
-			if best:
-				chosen_by_lat[lat] = best[1]
-			else:
-				chosen_by_lat[lat] = None
-		# south
-		for lat in range(-1, -86, -1):
-			best = None
+		lats = list(range(0, 86)) + list(range(-1, -86, -1))  # north, then south
+		grid = _first_dawn_block(prev_full, lats, lon_range)
+		earliest = _earliest_dawn_by_lat(prev_full, lats, lon_range, grid=grid)
+		chosen_by_lat = {}
+		for lat in lats:
 			for lon in lon_range:
-				d = _first_dawn_after(prev_full, lat, lon)
+				d, _ = _first_dawn_lookup(prev_full, lat, lon, grid)
 				f_log.write(f'precompute lat={lat} lon={lon} dawn={d}\n')
-				if d:
-					if best is None or d < best[0]:
-						best = (d, lon)
-			if best:
-				chosen_by_lat[lat] = best[1]
-			else:
-				chosen_by_lat[lat] = None
+			chosen_by_lat[lat] = earliest[lat][1] if earliest[lat] else None
 
 		# now perform scanning frames: for each latitude, scan from lon=0 westward but
 		# continue scanning until we reach the chosen longitude (if any). Mark is_final=True
@@ -623,7 +658,7 @@ if __name__ == "__main__":
 				continue
 			lon = 0
 			while lon >= max_west:
-				d, dtag = _first_dawn_after_with_tag(prev_full, lat, lon)
+				d, dtag = _first_dawn_lookup(prev_full, lat, lon, grid)
 				f_log.write(f'green_scan lat={lat} test_lon={lon} dawn={d} tag={dtag}\n')
 				is_final = (lon == chosen and d is not None)
 				write_frame(highlight=(lon, lat, d, dtag), note=f'scanning lat={lat} lon={lon} dawn={d} tag={dtag}', is_final=is_final)
@@ -642,7 +677,7 @@ if __name__ == "__main__":
 				continue
 			lon = 0
 			while lon >= max_west:
-				d, dtag = _first_dawn_after_with_tag(prev_full, lat, lon)
+				d, dtag = _first_dawn_lookup(prev_full, lat, lon, grid)
 				f_log.write(f'green_scan lat={lat} test_lon={lon} dawn={d} tag={dtag}\n')
 				is_final = (lon == chosen and d is not None)
 				write_frame(highlight=(lon, lat, d, dtag), note=f'scanning lat={lat} lon={lon} dawn={d} tag={dtag}', is_final=is_final)
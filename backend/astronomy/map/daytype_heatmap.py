@@ -12,6 +12,7 @@ from datetime import datetime, timezone
 from PIL import Image, ImageDraw, ImageFont
 
 from backend.astronomy.moon import find_prev_next_full_moon
+from backend.astronomy.projection import azimuthal_eq_coords, grid_pixels, LON0_UP
 from config import ASTRO_API_BASE
 
 OUT = os.path.join(os.path.dirname(__file__), 'daytype_heatmap.png')
@@ -61,13 +62,8 @@ def get_subsolar(prev_full):
 
 
 def _azimuthal_eq_coords(lat_deg, lon_deg, center_lon_deg=0, R=1.0):
-    phi = math.radians(lat_deg)
-    delta_lambda = math.radians(center_lon_deg - lon_deg)
-    c = (math.pi / 2.0) - phi
-    rho = R * c
-    x = rho * math.sin(delta_lambda)
-    y = -rho * math.cos(delta_lambda)
-    return x, y
+    """Azimuthal equidistant projection centered on the North Pole (see projection.py)."""
+    return azimuthal_eq_coords(lat_deg, lon_deg, center_lon_deg=center_lon_deg, R=R, orientation=LON0_UP)
 
 
 def generate_heatmap(prev_full=None, out_path=OUT, size_px=SIZE_PX, lat_step=LAT_STEP, lon_step=LON_STEP):
@@ -99,10 +95,13 @@ def generate_heatmap(prev_full=None, out_path=OUT, size_px=SIZE_PX, lat_step=LAT
     base_px = max(1, int(size_px * 0.002))
     half_px = base_px // 2
 
+    # projected pixel of every grid cell (cached between renders)
+    grid_x, grid_y = grid_pixels(lats, lons, size_px, MARGIN_RATIO, LON0_UP)
+
     # draw background graticule lightly first (optional)
     # classify and draw
-    for lat in lats:
-        for lon in lons:
+    for i, lat in enumerate(lats):
+        for j, lon in enumerate(lons):
             alt = sun_altitude_from_subsolar(lat, lon, sub_lat, sub_lon)
             if alt > 0:
                 cls = 'day'
@@ -114,7 +113,7 @@ def generate_heatmap(prev_full=None, out_path=OUT, size_px=SIZE_PX, lat_step=LAT
                 cls = 'astronomical'
             else:
                 cls = 'night'
-            x, y = proj(lat, lon)
+            x, y = int(grid_x[i, j]), int(grid_y[i, j])
             # draw small rect centered
             x0 = x - half_px
             y0 = y - half_px
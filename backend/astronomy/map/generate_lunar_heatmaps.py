@@ -7,17 +7,21 @@ Generates heatmaps for current and next lunar months with CSV-based naming
 import os
 import sys
 import math
+import bisect
 import logging
 from datetime import datetime, timezone, timedelta
 from PIL import Image, ImageDraw, ImageFont
 import pytz
 from tqdm import tqdm
+import numpy as np
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 
 from backend.astronomy.moon import find_prev_next_full_moon, find_first_dawn_after, count_dawn_cycles
 from backend.data import load_full_moon_times
+from backend.astronomy.projection import azimuthal_eq_coords, grid_pixels, LON0_DOWN
+from backend.astronomy.contours import grid_to_features, write_geojson, write_svg
 
 # Global parsed full moon times to avoid re-parsing
 parsed_full_moon_times = None
@@ -52,15 +56,25 @@ CMAP = {
     'unknown': (128, 128, 128, 128)       # Gray for unknown
 }
 
+# uint8 codes used for the persisted per-month class grids (index = code)
+CLASS_CODES = ('unknown', '29', '30', '29-secondary', '30-secondary')
+_CLASS_INDEX = {c: i for i, c in enumerate(CLASS_CODES)}
+
+# Class grids are kept out of frontend/static so they are never shipped
+GRID_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'grids')
+
+# Shared backdrop of the SVG heatmaps, written next to them
+BASE_MAP_NAME = 'base-map.jpg'
+
+# Incremental mode (opt-in, approximate): spacing (degrees) of the coarse
+# sample, and the share of samples the realigned neighbour grid must match
+# before it is trusted
+INCREMENTAL_SAMPLE_DEG = 2.0
+INCREMENTAL_MIN_AGREEMENT = 0.9
+
 def _azimuthal_eq_coords(lat_deg, lon_deg, center_lon_deg=0, R=1.0):
-    """Azimuthal equidistant projection centered on the North Pole"""
-    phi = math.radians(lat_deg)
-    delta_lambda = math.radians(center_lon_deg - lon_deg) + math.pi
-    c = (math.pi / 2.0) - phi
-    rho = R * c
-    x = rho * math.sin(delta_lambda)
-    y = -rho * math.cos(delta_lambda)
-    return x, y
+    """Azimuthal equidistant projection centered on the North Pole (see projection.py)."""
+    return azimuthal_eq_coords(lat_deg, lon_deg, center_lon_deg=center_lon_deg, R=R, orientation=LON0_DOWN)
 
 def get_local_timezone(lat, lon):
     """Approximate local timezone from lat/lon"""
@@ -113,8 +127,206 @@ def get_days_in_current_month(lat, lon, tzname='UTC', target_date=None):
         logging.warning(f"Failed to calculate days for lat={lat}, lon={lon}: {e}")
         return 'unknown'
 
-def generate_heatmap_for_date(target_date, output_path):
-    """Generate heatmap for a specific date"""
+def heatmap_grid_path(full_moon_time):
+    """Path of the persisted uint8 class grid for a full moon."""
+    return os.path.join(GRID_DIR, full_moon_time.strftime('%Y-%m-%d_%H-%M-%S') + '.npy')
+
+def save_class_grid(full_moon_time, classes):
+    path = heatmap_grid_path(full_moon_time)
+    os.makedirs(GRID_DIR, exist_ok=True)
+    tmp = path + '.tmp.npy'
+    np.save(tmp, classes.astype(np.uint8))
+    os.replace(tmp, path)
+    return path
+
+def load_neighbour_grid(now_utc, shape):
+    """Class grid of the previous (else next) full moon, if one was saved with this shape.
+
+    Returns (grid, full_moon_time) or (None, None).
+    """
+    times = sorted(load_parsed_full_moons())
+    i = bisect.bisect_right(times, now_utc) - 1
+    for j in (i - 1, i + 1):
+        if not 0 <= j < len(times):
+            continue
+        path = heatmap_grid_path(times[j])
+        if not os.path.exists(path):
+            continue
+        try:
+            grid = np.load(path, allow_pickle=False)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable class grid {path}: {e}")
+            continue
+        if grid.shape == tuple(shape) and grid.dtype == np.uint8:
+            return grid, times[j]
+    return None, None
+
+def predict_from_neighbour(prev_grid, sample, classes):
+    """Shift prev_grid in longitude and relabel its classes to best fit the sampled cells.
+
+    Month-length regions keep their shape between lunations but drift in
+    longitude and swap 29/30, so the neighbour grid is only useful once
+    realigned. Returns (predicted grid, share of samples it matches).
+    """
+    rows, cols = np.nonzero(sample)
+    observed = classes[rows, cols].astype(np.int64)
+    n = len(CLASS_CODES)
+    best = None
+    for shift in range(prev_grid.shape[1]):
+        predicted = prev_grid[rows, (cols - shift) % prev_grid.shape[1]].astype(np.int64)
+        table = np.bincount(predicted * n + observed, minlength=n * n).reshape(n, n)
+        score = int(table.max(axis=1).sum())
+        if best is None or score > best[0]:
+            best = (score, shift, table.argmax(axis=1))
+    score, shift, mapping = best
+    return mapping.astype(np.uint8)[np.roll(prev_grid, shift, axis=1)], score / max(1, len(rows))
+
+def classify_month_grid(lats, lons, target_date, progress=None, prev_grid=None,
+                        sample_deg=INCREMENTAL_SAMPLE_DEG, min_agreement=INCREMENTAL_MIN_AGREEMENT):
+    """Class code (see CLASS_CODES) of every (lat, lon) cell as a uint8 grid.
+
+    With prev_grid (an adjacent month's grid) only a coarse lattice every
+    sample_deg is computed up front. prev_grid is realigned to it
+    (predict_from_neighbour) and each lattice block is then either filled
+    from its corners, when they agree and the prediction is uniform there,
+    or computed cell by cell; so only the band around the predicted
+    boundaries and islands is recomputed. If the prediction matches fewer
+    than min_agreement of the samples, the whole grid is computed.
+    This is approximate: a block filled from its corners is not checked
+    cell by cell, so an island smaller than sample_deg that neither the
+    corners nor the neighbour grid show is lost. Only prev_grid=None
+    matches a full render exactly.
+    Returns (classes, mode) with mode 'full', 'incremental' or 'fallback'.
+    """
+    shape = (len(lats), len(lons))
+    classes = np.zeros(shape, dtype=np.uint8)
+    known = np.zeros(shape, dtype=bool)
+    date_str = target_date.strftime('%Y-%m-%d')
+    step = abs(lats[0] - lats[1]) if len(lats) > 1 else 1.0
+
+    def compute(mask, desc):
+        cells = np.argwhere(mask & ~known)
+        total = len(cells)
+        with tqdm(total=total, desc=f"{desc} for {date_str}") as pbar:
+            for k, (row, col) in enumerate(cells):
+                if progress:
+                    progress(k, total)
+                cls = get_days_in_current_month(lats[row], lons[col], target_date=target_date)
+                classes[row, col] = _CLASS_INDEX.get(cls, 0)
+                known[row, col] = True
+                pbar.update(1)
+
+    mode = 'full'
+    if prev_grid is not None:
+        stride = max(1, int(round(sample_deg / step)))
+        # lattice rows include the last row; columns wrap around in longitude
+        row_marks = sorted(set(range(0, shape[0], stride)) | {shape[0] - 1})
+        col_marks = list(range(0, shape[1], stride))
+        sample = np.zeros(shape, dtype=bool)
+        sample[np.ix_(row_marks, col_marks)] = True
+        compute(sample, "Sampling heatmap")
+        predicted, agreement = predict_from_neighbour(prev_grid, sample, classes)
+        logging.info(f"Neighbour grid matches {agreement:.0%} of samples for {date_str}")
+
+        mode = 'fallback'
+        if agreement >= min_agreement:
+            blocks = []
+            flagged = np.zeros((len(row_marks) - 1, len(col_marks)), dtype=bool)
+            for bi, (r0, r1) in enumerate(zip(row_marks, row_marks[1:])):
+                rows = np.arange(r0, r1 + 1)
+                for bj, c0 in enumerate(col_marks):
+                    c1 = col_marks[(bj + 1) % len(col_marks)]
+                    cols = (c0 + np.arange(((c1 - c0) % shape[1]) + 1)) % shape[1]
+                    corners = {classes[r0, c0], classes[r0, c1], classes[r1, c0], classes[r1, c1]}
+                    block = predicted[np.ix_(rows, cols)]
+                    flagged[bi, bj] = len(corners) > 1 or block.min() != block.max()
+                    blocks.append((bi, bj, rows, cols, corners.pop()))
+            # refine one block beyond every flagged block to catch nearby islands
+            grown = flagged.copy()
+            grown[1:] |= flagged[:-1]
+            grown[:-1] |= flagged[1:]
+            grown |= np.roll(flagged, 1, axis=1) | np.roll(flagged, -1, axis=1)
+            refine = np.zeros(shape, dtype=bool)
+            for bi, bj, rows, cols, value in blocks:
+                if grown[bi, bj]:
+                    refine[np.ix_(rows, cols)] = True
+                else:
+                    classes[np.ix_(rows, cols)] = value
+            compute(refine, "Updating heatmap boundaries")
+            return classes, 'incremental'
+
+    compute(np.ones(shape, dtype=bool), "Generating heatmap")
+    return classes, mode
+
+def load_base_map():
+    """The world map the heatmaps are drawn on, at SIZE_PX (white when map.png is missing)."""
+    try:
+        base_path = os.path.join(os.path.dirname(__file__), 'map.png')
+        if os.path.exists(base_path):
+            base_img = Image.open(base_path).convert('RGBA')
+            return base_img.resize((SIZE_PX, SIZE_PX), Image.Resampling.LANCZOS)
+    except Exception:
+        pass
+    return Image.new('RGBA', (SIZE_PX, SIZE_PX), (255,255,255,255))
+
+def draw_longitude_ticks(draw):
+    """Tick marks every 15° of longitude around the edge of the map."""
+    half = SIZE_PX / 2.0
+    try:
+        for i in range(24):
+            angle = i * 15.0
+            x_outer = half + (half - 10) * math.sin(math.radians(angle))
+            y_outer = half + (half - 10) * math.cos(math.radians(angle))
+            x_inner = half + (half - 20) * math.sin(math.radians(angle))
+            y_inner = half + (half - 20) * math.cos(math.radians(angle))
+            draw.line([x_outer, y_outer, x_inner, y_inner], fill=(100,100,100), width=1)
+    except Exception:
+        pass
+
+def export_base_map(map_dir):
+    """Write the base map (with longitude ticks) once per directory; heatmap.js layers each month's SVG over it."""
+    path = os.path.join(map_dir, BASE_MAP_NAME)
+    if not os.path.exists(path):
+        base_img = load_base_map().convert('RGB')
+        draw_longitude_ticks(ImageDraw.Draw(base_img))
+        os.makedirs(map_dir, exist_ok=True)
+        base_img.save(path, quality=85)
+    return path
+
+def heatmap_vector_paths(output_path):
+    """(geojson, svg) paths written next to a heatmap PNG."""
+    stem = os.path.splitext(output_path)[0]
+    return stem + '.geojson', stem + '.svg'
+
+def export_heatmap_vectors(classes, lats, lons, output_path, full_moon_time=None):
+    """Write the class boundaries of a month grid as GeoJSON (lat/lon) and SVG (projected)."""
+    geojson_path, svg_path = heatmap_vector_paths(output_path)
+    features = grid_to_features(classes, lats, lons, CLASS_CODES)
+    properties = {'lat_step': LAT_STEP, 'lon_step': LON_STEP}
+    if full_moon_time is not None:
+        properties['full_moon_utc'] = full_moon_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+    write_geojson(geojson_path, features, properties)
+    write_svg(svg_path, features, CMAP, size_px=SIZE_PX, margin_ratio=MARGIN_RATIO, orientation=LON0_DOWN)
+    export_base_map(os.path.dirname(output_path))
+    logging.info(f'Saved vector boundaries to {geojson_path} and {svg_path}')
+    return geojson_path, svg_path
+
+def _month_grid_axes():
+    lats = [85 - i * LAT_STEP for i in range(int((85 - (-85)) / LAT_STEP) + 1)]
+    lons = [(-180) + i * LON_STEP for i in range(int(360 / LON_STEP))]
+    return lats, lons
+
+def generate_heatmap_for_date(target_date, output_path, progress=None, incremental=False, vectors=True):
+    """Generate heatmap for a specific date.
+
+    progress: optional callable(done, total) invoked per grid cell; it may
+    raise to abort rendering (used for job cancellation).
+    incremental: start from the previous (or next) month's saved class grid
+    when there is one (see classify_month_grid; faster but approximate).
+    The class grid of every render is saved under GRID_DIR either way.
+    vectors: also write <name>.geojson and <name>.svg class boundaries
+    next to the PNG (see export_heatmap_vectors).
+    """
     if target_date.tzinfo is None:
         now_utc = pytz.UTC.localize(target_date)
     else:
@@ -125,66 +337,47 @@ def generate_heatmap_for_date(target_date, output_path):
     # Load parsed times once
     load_parsed_full_moons()
 
-    # Projection setup
-    R = 1.0
-    rho_max = math.pi * R
-    half = SIZE_PX / 2.0
-    scale = (half * (1 - MARGIN_RATIO)) / rho_max
-    cx = cy = half
-
-    def proj(lat, lon):
-        x_rel, y_rel = _azimuthal_eq_coords(lat, lon, center_lon_deg=0, R=R)
-        return int(round(cx + x_rel * scale)), int(round(cy + y_rel * scale))
-
-    try:
-        base_path = os.path.join(os.path.dirname(__file__), 'map.png')
-        if os.path.exists(base_path):
-            base_img = Image.open(base_path).convert('RGBA')
-            base_img = base_img.resize((SIZE_PX, SIZE_PX), Image.Resampling.LANCZOS)
-        else:
-            base_img = Image.new('RGBA', (SIZE_PX, SIZE_PX), (255,255,255,255))
-    except Exception:
-        base_img = Image.new('RGBA', (SIZE_PX, SIZE_PX), (255,255,255,255))
+    # Tile positions come from projection.grid_pixels below
+    base_img = load_base_map()
 
     overlay = Image.new('RGBA', (SIZE_PX, SIZE_PX), (255,255,255,0))
     overlay_draw = ImageDraw.Draw(overlay)
 
     # Grid
-    lats = [85 - i * LAT_STEP for i in range(int((85 - (-85)) / LAT_STEP) + 1)]
-    lons = [(-180) + i * LON_STEP for i in range(int(360 / LON_STEP))]
+    lats, lons = _month_grid_axes()
 
     base_px = 1  # Single pixel for higher resolution
     half_px = 0
 
-    total_points = len(lats) * len(lons)
-
-    # Generate heatmap
-    with tqdm(total=total_points, desc=f"Generating heatmap for {date_str}") as pbar:
-        for lat in lats:
-            for lon in lons:
-                cls = get_days_in_current_month(lat, lon, target_date=target_date)
-                x, y = proj(lat, lon)
-                x0 = x - half_px
-                y0 = y - half_px
-                x1 = x + half_px
-                y1 = y + half_px
-                if x1 < 0 or y1 < 0 or x0 >= SIZE_PX or y0 >= SIZE_PX:
-                    pbar.update(1)
-                    continue
-                overlay_draw.rectangle([x0, y0, x1, y1], fill=CMAP[cls])
-                pbar.update(1)
-
-    # Longitude tick marks
-    try:
-        for i in range(24):
-            angle = i * 15.0
-            x_outer = cx + (half - 10) * math.sin(math.radians(angle))
-            y_outer = cy + (half - 10) * math.cos(math.radians(angle))
-            x_inner = cx + (half - 20) * math.sin(math.radians(angle))
-            y_inner = cy + (half - 20) * math.cos(math.radians(angle))
-            overlay_draw.line([x_outer, y_outer, x_inner, y_inner], fill=(100,100,100), width=1)
-    except Exception:
-        pass
+    # projected pixel of every grid cell (cached between renders)
+    grid_x, grid_y = grid_pixels(lats, lons, SIZE_PX, MARGIN_RATIO, LON0_DOWN)
+
+    # Classify every cell, reusing an adjacent month's grid when asked to
+    prev_grid = None
+    if incremental:
+        prev_grid, prev_time = load_neighbour_grid(now_utc, (len(lats), len(lons)))
+        if prev_grid is not None:
+            logging.info(f"Incremental render for {date_str} from the {prev_time} grid")
+    classes, mode = classify_month_grid(lats, lons, target_date, progress=progress, prev_grid=prev_grid)
+    if prev_grid is not None and mode != 'incremental':
+        logging.info(f"Incremental render for {date_str} fell back to a full render")
+    save_class_grid(now_utc, classes)
+    if vectors:
+        export_heatmap_vectors(classes, lats, lons, output_path, now_utc)
+
+    # Draw tiles
+    for row in range(len(lats)):
+        for col in range(len(lons)):
+            x, y = int(grid_x[row, col]), int(grid_y[row, col])
+            x0 = x - half_px
+            y0 = y - half_px
+            x1 = x + half_px
+            y1 = y + half_px
+            if x1 < 0 or y1 < 0 or x0 >= SIZE_PX or y0 >= SIZE_PX:
+                continue
+            overlay_draw.rectangle([x0, y0, x1, y1], fill=CMAP[CLASS_CODES[classes[row, col]]])
+
+    draw_longitude_ticks(overlay_draw)
 
     # Composite images
     try:
@@ -199,14 +392,72 @@ def generate_heatmap_for_date(target_date, output_path):
     logging.info(f'Saved heatmap to {output_path}')
     return output_path
 
-def generate_all_heatmaps():
+def heatmap_map_dir():
+    """Directory the frontend serves month-length heatmaps from."""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.normpath(os.path.join(base_dir, '..', '..', '..', 'frontend', 'static', 'img', 'map'))
+
+def heatmap_filename(full_moon_time):
+    """Format filename as YYYY-MM-DD_HH:MM:SS.png (matches heatmap.js)."""
+    return full_moon_time.strftime('%Y-%m-%d_%H:%M:%S') + '.png'
+
+def ordered_full_moon_indices(full_moons, now_utc):
+    """Indices of full_moons, closest to now_utc first, then alternating forward/backward."""
+    current_full_moon_idx = None
+    min_diff = float('inf')
+
+    for i, full_moon_time in enumerate(full_moons):
+        diff = abs((full_moon_time - now_utc).total_seconds())
+        if diff < min_diff:
+            min_diff = diff
+            current_full_moon_idx = i
+
+    if current_full_moon_idx is None:
+        # Fallback to original order if no current month found
+        return list(range(len(full_moons)))
+
+    ordered_indices = [current_full_moon_idx]
+
+    # Alternate between forward and backward from current
+    forward_idx = current_full_moon_idx + 1
+    backward_idx = current_full_moon_idx - 1
+    direction = 1  # Start with forward
+
+    while len(ordered_indices) < len(full_moons):
+        if direction == 1 and forward_idx < len(full_moons):
+            ordered_indices.append(forward_idx)
+            forward_idx += 1
+        elif direction == -1 and backward_idx >= 0:
+            ordered_indices.append(backward_idx)
+            backward_idx -= 1
+
+        direction *= -1  # Switch direction
+    return ordered_indices
+
+def backfill_heatmap_vectors(full_moon_time, output_path):
+    """Write missing vector files for an existing PNG from its saved class grid."""
+    if all(os.path.exists(p) for p in heatmap_vector_paths(output_path)):
+        return False
+    lats, lons = _month_grid_axes()
+    path = heatmap_grid_path(full_moon_time)
+    if not os.path.exists(path):
+        return False
+    try:
+        classes = np.load(path, allow_pickle=False)
+    except Exception:
+        return False
+    if classes.shape != (len(lats), len(lons)):
+        return False
+    export_heatmap_vectors(classes, lats, lons, output_path, full_moon_time)
+    return True
+
+def generate_all_heatmaps(incremental=False):
     """Generate heatmaps for all full moons in the CSV, starting with current month and alternating forward/backward"""
     # Load full moon times
     full_moon_df = load_full_moon_times()
     full_moons = [pytz.UTC.localize(datetime.strptime(s, '%Y-%m-%d %H:%M:%S.%f')) for s in full_moon_df['Full Moon Time (UTC)']]
 
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    map_dir = os.path.join(base_dir, '..', '..', '..', 'frontend', 'static', 'img', 'map')
+    map_dir = heatmap_map_dir()
     os.makedirs(map_dir, exist_ok=True)
 
     # Count existing files
@@ -218,42 +469,14 @@ def generate_all_heatmaps():
 
     # Find current date and closest full moon
     now_utc = datetime.now(timezone.utc)
-    current_full_moon_idx = None
-    min_diff = float('inf')
 
-    for i, full_moon_time in enumerate(full_moons):
-        diff = abs((full_moon_time - now_utc).total_seconds())
-        if diff < min_diff:
-            min_diff = diff
-            current_full_moon_idx = i
+    # Create ordered list starting with current month and alternating forward/backward
+    ordered_indices = ordered_full_moon_indices(full_moons, now_utc)
 
     print(f"Current date: {now_utc}")
-    print(f"Closest full moon index: {current_full_moon_idx}")
-    if current_full_moon_idx is not None:
-        print(f"Closest full moon time: {full_moons[current_full_moon_idx]}")
-
-    # Create ordered list starting with current month and alternating forward/backward
-    ordered_indices = []
-    if current_full_moon_idx is not None:
-        ordered_indices.append(current_full_moon_idx)
-
-        # Alternate between forward and backward from current
-        forward_idx = current_full_moon_idx + 1
-        backward_idx = current_full_moon_idx - 1
-        direction = 1  # Start with forward
-
-        while len(ordered_indices) < len(full_moons):
-            if direction == 1 and forward_idx < len(full_moons):
-                ordered_indices.append(forward_idx)
-                forward_idx += 1
-            elif direction == -1 and backward_idx >= 0:
-                ordered_indices.append(backward_idx)
-                backward_idx -= 1
-
-            direction *= -1  # Switch direction
-    else:
-        # Fallback to original order if no current month found
-        ordered_indices = list(range(len(full_moons)))
+    if ordered_indices:
+        print(f"Closest full moon index: {ordered_indices[0]}")
+        print(f"Closest full moon time: {full_moons[ordered_indices[0]]}")
 
     total_full_moons = len(full_moons)
     print(f"Total full moons in CSV: {total_full_moons}")
@@ -273,18 +496,19 @@ def generate_all_heatmaps():
         target_datetime = full_moon_time
 
         # Format filename as YYYY-MM-DD_HH:MM:SS.png
-        filename = full_moon_time.strftime('%Y-%m-%d_%H:%M:%S') + '.png'
+        filename = heatmap_filename(full_moon_time)
         output_path = os.path.join(map_dir, filename)
 
         # Check if file already exists
         if os.path.exists(output_path):
             logging.info(f"[{processed_count}/{total_full_moons}] Skipping {filename} - already exists")
             skipped_files.append(filename)
+            backfill_heatmap_vectors(full_moon_time, output_path)
             continue
 
         logging.info(f"[{processed_count}/{total_full_moons}] Generating heatmap for {full_moon_time}")
         try:
-            generate_heatmap_for_date(target_datetime, output_path)
+            generate_heatmap_for_date(target_datetime, output_path, incremental=incremental)
             generated_files.append(filename)
         except Exception as e:
             logging.error(f"Failed to generate heatmap for {full_moon_time}: {e}")
@@ -4,10 +4,16 @@ Generate Option A: produce a 0.1° day/twilight heatmap using the existing
 daytype_heatmap generator, then compute a continuous night/astronomical
 boundary by radial sampling, smooth it, write a per-azimuth CSV, and draw
 overlay lines + western-night crop.
+
+The boundary is traced for all azimuths at once: a coarse NumPy sample
+brackets the first -18° crossing along each meridian, vectorized bisection
+on the analytic altitude narrows it, and the result is snapped back to the
+radial sampling grid so the CSV/overlay match a step-by-step scan.
 """
 import os
 import math
 from datetime import datetime, timezone
+import numpy as np
 from backend.astronomy.map import daytype_heatmap
 from backend.astronomy.map.daytype_heatmap import (
     find_prev_next_full_moon,
@@ -17,6 +23,114 @@ from backend.astronomy.map.daytype_heatmap import (
 )
 from PIL import Image, ImageDraw, ImageFont
 
+NIGHT_ALT_DEG = -18.0
+
+
+def sun_altitude_grid(lat_deg, lon_deg, sub_lat, sub_lon):
+    """Vectorized sun_altitude_from_subsolar (degrees) for NumPy arrays."""
+    phi1 = np.asarray(lat_deg, dtype=float) * math.pi / 180.0
+    phi2 = sub_lat * math.pi / 180.0
+    dl = (sub_lon - np.asarray(lon_deg, dtype=float)) * math.pi / 180.0
+    cos_c = np.sin(phi1) * math.sin(phi2) + np.cos(phi1) * math.cos(phi2) * np.cos(dl)
+    return 90.0 - np.degrees(np.arccos(np.clip(cos_c, -1.0, 1.0)))
+
+
+def _meridian_lon(angles):
+    lon = np.degrees(np.asarray(angles, dtype=float))
+    return np.where(lon >= 180.0, lon - 360.0, lon)
+
+
+def trace_night_boundary(angles, sub_lat, sub_lon, rho_steps=800, rho_max=math.pi,
+                         threshold=NIGHT_ALT_DEG, coarse_steps=32, tol=1e-9):
+    """First crossing of `threshold` along each meridian, walking out from the north pole.
+
+    Along a meridian the altitude is a sinusoid in rho whose night arc (alt
+    below -18°) is shorter than pi, so the sign change between consecutive
+    coarse samples brackets the first crossing; bisection then narrows every
+    bracket together. The root is snapped to rho = j / rho_steps * rho_max
+    (checking the two neighbouring samples with the scalar formula), giving
+    the same (boundary_rhos, outer_night) as scanning every radial step.
+    """
+    lon = _meridian_lon(angles)
+
+    def alt(rho):
+        return sun_altitude_grid(90.0 - np.degrees(rho), lon, sub_lat, sub_lon)
+
+    # coarse bracket: first coarse sample at or above the threshold
+    coarse = np.linspace(0.0, rho_max, coarse_steps + 1)
+    above = sun_altitude_grid(90.0 - np.degrees(coarse)[None, :], lon[:, None], sub_lat, sub_lon) >= threshold
+    has_cross = above.any(axis=1)
+    first = np.argmax(above, axis=1)
+    lo = coarse[np.maximum(first - 1, 0)]
+    hi = coarse[first]
+
+    # bisection on the bracketed crossings (night at lo, not night at hi)
+    active = has_cross & (first > 0)
+    while active.any() and np.max(hi[active] - lo[active]) > tol:
+        mid = 0.5 * (lo + hi)
+        up = alt(mid) >= threshold
+        hi = np.where(active & up, mid, hi)
+        lo = np.where(active & ~up, mid, lo)
+    root = np.where(first > 0, hi, 0.0)
+
+    step = rho_max / rho_steps
+    boundary_rhos = []
+    outer_night = []
+    for i, angle in enumerate(angles):
+        lon_deg = math.degrees(angle)
+        if lon_deg >= 180.0:
+            lon_deg -= 360.0
+
+        def alt_at(j):
+            return sun_altitude_from_subsolar(math.degrees((math.pi / 2.0) - (j / rho_steps) * rho_max), lon_deg, sub_lat, sub_lon)
+
+        # first radial sample at or above the threshold, confirmed with the scalar formula
+        k = min(rho_steps, int(math.ceil(root[i] / step - 1e-9))) if has_cross[i] else rho_steps
+        while k > 0 and alt_at(k - 1) >= threshold:
+            k -= 1
+        while k < rho_steps and alt_at(k) < threshold:
+            k += 1
+        if k == 0:
+            boundary_rhos.append(0.0)
+            outer_night.append(None)
+        elif alt_at(k) < threshold:
+            # night all the way out to rho_max
+            boundary_rhos.append(rho_max)
+            outer_night.append(rho_max)
+        else:
+            boundary_rhos.append(((k - 1) / rho_steps) * rho_max)
+            outer_night.append(((k - 1) / rho_steps) * rho_max)
+    return boundary_rhos, outer_night
+
+
+def _circular_windows(vals, window):
+    vals = np.asarray(vals, dtype=float)
+    half = window // 2
+    idx = (np.arange(vals.size)[:, None] + np.arange(-half, half + 1)[None, :]) % vals.size
+    return vals[idx]
+
+
+def circular_median_filter(vals, window=7):
+    """Median over a centred window that wraps around the ends (odd window)."""
+    vals = np.asarray(vals, dtype=float)
+    if vals.size == 0:
+        return vals
+    wins = np.sort(_circular_windows(vals, window), axis=1)
+    return wins[:, window // 2]
+
+
+def circular_moving_average(vals, window=3):
+    """Mean over a centred window that wraps around the ends."""
+    vals = np.asarray(vals, dtype=float)
+    if vals.size == 0:
+        return vals
+    wins = _circular_windows(vals, window)
+    # add columns left to right so the result matches sum(win) / len(win)
+    total = wins[:, 0].copy()
+    for j in range(1, wins.shape[1]):
+        total += wins[:, j]
+    return total / wins.shape[1]
+
 
 def run(out_png=None, csv_out=None, size_px=2000, az_step=0.5, rho_steps=800):
     if out_png is None:
@@ -46,58 +160,14 @@ def run(out_png=None, csv_out=None, size_px=2000, az_step=0.5, rho_steps=800):
     n_angles = max(360, int(round(360.0 / az_step)))
     angles = [math.radians(i * az_step) for i in range(n_angles)]
 
-    boundary_rhos = []  # per-angle rho (rad) where alt crosses >= -18 (astronomical twilight edge)
-    outer_night = []  # maximum night rho per angle
-
-    for angle in angles:
-        found_boundary = None
-        max_night = None
-        for j in range(rho_steps + 1):
-            rho = (j / rho_steps) * rho_max
-            phi = (math.pi / 2.0) - rho
-            lat_deg = math.degrees(phi)
-            lon_deg = math.degrees(angle)
-            if lon_deg >= 180.0:
-                lon_deg -= 360.0
-            alt = sun_altitude_from_subsolar(lat_deg, lon_deg, sub_lat, sub_lon)
-            if alt < -18:
-                max_night = rho
-            if found_boundary is None and alt >= -18:
-                # first point outside night
-                found_boundary = rho
-                break
-        # prefer using the night-side rho as the boundary location (closest night pixel)
-        chosen_rho = max_night if max_night is not None else found_boundary
-        boundary_rhos.append(chosen_rho)
-        outer_night.append(max_night)
-
-    # Convert rhos to pixels, smooth with circular median + moving average
-    def median_filter(vals, window=7):
-        if not vals:
-            return vals
-        n = len(vals)
-        half = window // 2
-        out = []
-        for i in range(n):
-            win = [vals[(i + j) % n] for j in range(-half, half+1)]
-            out.append(sorted([v if v is not None else 0.0 for v in win])[len(win)//2])
-        return out
-
-    def moving_avg(vals, window=3):
-        if not vals:
-            return vals
-        n = len(vals)
-        half = window // 2
-        out = []
-        for i in range(n):
-            win = [vals[(i + j) % n] for j in range(-half, half+1)]
-            out.append(sum(win) / len(win))
-        return out
-
-    # map None -> 0 for smoothing then mask later
-    rhos_px = [ (rho * scale) if (rho is not None) else 0.0 for rho in boundary_rhos ]
-    rhos_med = median_filter(rhos_px, window=7)
-    rhos_smooth = moving_avg(rhos_med, window=3)
+    # per-angle rho (rad) of the last night sample before alt crosses -18 (astronomical
+    # twilight edge), and the maximum night rho per angle (None where there is none)
+    boundary_rhos, outer_night = trace_night_boundary(angles, sub_lat, sub_lon, rho_steps, rho_max)
+
+    # map None -> 0 for smoothing then mask later; smooth with circular median + moving average
+    rhos_px = np.array([(rho * scale) if (rho is not None) else 0.0 for rho in boundary_rhos])
+    rhos_med = circular_median_filter(rhos_px, window=7)
+    rhos_smooth = circular_moving_average(rhos_med, window=3).tolist()
 
     # Build XY points
     merged_xy = []
@@ -114,7 +184,7 @@ def run(out_png=None, csv_out=None, size_px=2000, az_step=0.5, rho_steps=800):
         x = cx + x_rel * scale
         y = cy + y_rel * scale
         merged_xy.append((x, y))
-        csv_rows.append((math.degrees(ang_rad), rho_px, lat_deg, lon_deg))
+        csv_rows.append((math.degrees(ang_rad), float(rho_px), lat_deg, lon_deg))
 
     # write CSV
     try:
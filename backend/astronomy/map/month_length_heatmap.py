@@ -16,6 +16,7 @@ import pytz
 
 from backend.astronomy.moon import find_prev_next_full_moon, find_first_dawn_after, count_dawn_cycles
 from backend.data import load_full_moon_times
+from backend.astronomy.projection import azimuthal_eq_coords, grid_pixels, LON0_DOWN
 from config import ASTRO_API_BASE  # Assuming this is needed for any API calls in dawn calculations
 
 OUT = os.path.join(os.path.dirname(__file__), 'month_length_heatmap.png')
@@ -60,21 +61,8 @@ def _rad2deg(r):
     return r * 180.0 / math.pi
 
 def _azimuthal_eq_coords(lat_deg, lon_deg, center_lon_deg=0, R=1.0):
-    """
-    Azimuthal equidistant projection centered on the North Pole (lat=90°).
-    Returns (x, y) where x to the right, y down (SVG coordinates will flip y as needed).
-    """
-    # convert to radians
-    phi = math.radians(lat_deg)  # latitude
-    # invert longitude delta so that increasing longitude maps in the
-    # opposite rotational direction (clockwise motion on the plot)
-    delta_lambda = math.radians(center_lon_deg - lon_deg) + math.pi  # Rotate 180 degrees clockwise
-    # c = pi/2 - phi
-    c = (math.pi / 2.0) - phi
-    rho = R * c
-    x = rho * math.sin(delta_lambda)
-    y = -rho * math.cos(delta_lambda)
-    return x, y
+    """Azimuthal equidistant projection centered on the North Pole (see projection.py)."""
+    return azimuthal_eq_coords(lat_deg, lon_deg, center_lon_deg=center_lon_deg, R=R, orientation=LON0_DOWN)
 
 def get_local_timezone(lat, lon):
     """
@@ -211,15 +199,18 @@ def generate_heatmap(out_path=OUT, size_px=SIZE_PX, lat_step=LAT_STEP, lon_step=
 
     total_points = len(lats) * len(lons)
 
+    # projected pixel of every grid cell (cached between renders)
+    grid_x, grid_y = grid_pixels(lats, lons, size_px, MARGIN_RATIO, LON0_DOWN)
+
     # CSV data collection
     csv_data = []
 
     # Classify and draw with progress bar
     with tqdm(total=total_points, desc=f"Generating heatmap for {date_str}") as pbar:
-        for lat in lats:
-            for lon in lons:
+        for i, lat in enumerate(lats):
+            for j, lon in enumerate(lons):
                 cls, debug_info = get_days_in_current_month(lat, lon, target_date=target_date)
-                x, y = proj(lat, lon)
+                x, y = int(grid_x[i, j]), int(grid_y[i, j])
                 x0 = x - half_px
                 y0 = y - half_px
                 x1 = x + half_px
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 import pytz
 from backend.data import full_moon_times, load_full_moon_times
 from backend.astronomy.sun import get_event_with_fallback
+from backend.timing import timed
 
 def find_prev_next_full_moon(now_utc):
     """Return previous and next full moon datetimes (UTC) from full_moon_times DataFrame."""
@@ -15,6 +16,7 @@ def find_prev_next_full_moon(now_utc):
     nxt = times[times > now_utc].min()
     return prev, nxt
 
+@timed('first-dawn')
 def find_first_dawn_after(dt_utc, lat, lon, tzname):
     """Return first dawn (or fallback) after dt_utc, in local time and tag."""
     # Start searching from the next day if dt_utc is after dawn for that day
@@ -30,6 +32,7 @@ def find_first_dawn_after(dt_utc, lat, lon, tzname):
                 return dawn, tag
     return None, 'not_found'
 
+@timed('dawn-cycles')
 def count_dawn_cycles(start_dawn, end_dawn, lat, lon, tzname):
     """Count number of dawn-to-dawn cycles between two dawn datetimes (inclusive of start, exclusive of end)."""
     dawns = [start_dawn]
@@ -2,6 +2,8 @@ from xml.etree import ElementTree as ET
 import math
 import os
 
+from projection import azimuthal_eq_coords, LON0_UP
+
 MAP = os.path.join(os.path.dirname(__file__), 'dawn_map.svg')
 CHOSEN = os.path.join(os.path.dirname(__file__), 'debug_frames', 'chosen_points_compact.csv')
 OUT = os.path.join(os.path.dirname(__file__), 'overlay_dawn_map.svg')
@@ -27,13 +29,8 @@ height = float(height)
 
 # helper projection copied from map.py
 def _azimuthal_eq_coords(lat_deg, lon_deg, center_lon_deg=0, R=1.0):
-    phi = math.radians(lat_deg)
-    delta_lambda = math.radians(center_lon_deg - lon_deg)
-    c = (math.pi / 2.0) - phi
-    rho = R * c
-    x = rho * math.sin(delta_lambda)
-    y = -rho * math.cos(delta_lambda)
-    return x, y
+    """Azimuthal equidistant projection centered on the North Pole (see projection.py)."""
+    return azimuthal_eq_coords(lat_deg, lon_deg, center_lon_deg=center_lon_deg, R=R, orientation=LON0_UP)
 
 # compute scale same as generate_dawn_map_svg
 R = 1.0
@@ -0,0 +1,146 @@
+"""
+North-pole azimuthal equidistant projection shared by the map generators.
+
+Two orientations are in use:
+  LON0_UP   - lon 0 points up, longitude increases clockwise
+              (map.py, overlay_chosen.py, daytype_heatmap.py)
+  LON0_DOWN - lon 0 points down, matching map.png
+              (map/map.py, generate_lunar_heatmaps.py, month_length_heatmap.py;
+              the "+ pi" variant in the heatmap scripts is the same mapping)
+
+forward/inverse work on scalars or NumPy arrays. grid_pixels caches the
+projected pixel positions of a lat/lon grid, in memory and as .npy files,
+so repeat renders skip the per-point trig.
+"""
+
+import math
+import os
+import threading
+
+import numpy as np
+
+LON0_UP = 'lon0_up'
+LON0_DOWN = 'lon0_down'
+ORIENTATIONS = (LON0_UP, LON0_DOWN)
+
+CACHE_DIR = os.getenv(
+    'PROJECTION_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'map', '.cache'),
+)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _check_orientation(orientation):
+    if orientation not in ORIENTATIONS:
+        raise ValueError(f"orientation must be one of {ORIENTATIONS}, got {orientation!r}")
+
+
+def forward(lat_deg, lon_deg, center_lon_deg=0, R=1.0, orientation=LON0_UP):
+    """(lat, lon) in degrees -> (x, y) with x right, y down; rho = R * colatitude."""
+    _check_orientation(orientation)
+    rho = R * (math.pi / 2.0 - np.radians(lat_deg))
+    if orientation == LON0_UP:
+        delta_lambda = np.radians(np.subtract(center_lon_deg, lon_deg))
+        return rho * np.sin(delta_lambda), -rho * np.cos(delta_lambda)
+    delta_lambda = np.radians(np.subtract(lon_deg, center_lon_deg))
+    return rho * np.sin(delta_lambda), rho * np.cos(delta_lambda)
+
+
+def inverse(x, y, center_lon_deg=0, R=1.0, orientation=LON0_UP):
+    """(x, y) -> (lat, lon) in degrees, lon wrapped to [-180, 180).
+
+    Points beyond the south pole (rho > pi * R) get NaN.
+    """
+    _check_orientation(orientation)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    rho = np.hypot(x, y)
+    lat = 90.0 - np.degrees(rho / R)
+    if orientation == LON0_UP:
+        lon = center_lon_deg - np.degrees(np.arctan2(x, -y))
+    else:
+        lon = center_lon_deg + np.degrees(np.arctan2(x, y))
+    lon = (lon + 180.0) % 360.0 - 180.0
+    outside = rho > math.pi * R
+    lat = np.where(outside, np.nan, lat)
+    lon = np.where(outside, np.nan, lon)
+    return lat, lon
+
+
+def azimuthal_eq_coords(lat_deg, lon_deg, center_lon_deg=0, R=1.0, orientation=LON0_UP):
+    """Scalar forward() returning plain floats (drop-in for _azimuthal_eq_coords)."""
+    x, y = forward(lat_deg, lon_deg, center_lon_deg=center_lon_deg, R=R, orientation=orientation)
+    return float(x), float(y)
+
+
+def pixel_frame(size_px, margin_ratio=0.05, R=1.0):
+    """(scale, cx, cy) used by every generator: the south pole touches the margin."""
+    half = size_px / 2.0
+    scale = (half * (1 - margin_ratio)) / (math.pi * R)
+    return scale, half, half
+
+
+def _cached(key, filename, build, use_disk):
+    with _cache_lock:
+        hit = _cache.get(key)
+    if hit is not None:
+        return hit
+    path = os.path.join(CACHE_DIR, filename)
+    value = None
+    if use_disk and os.path.exists(path):
+        try:
+            value = np.load(path, allow_pickle=False)
+        except Exception:
+            value = None
+    if value is None:
+        value = build()
+        if use_disk:
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                tmp = path + '.tmp.npy'
+                np.save(tmp, value)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+    value.setflags(write=False)
+    with _cache_lock:
+        _cache[key] = value
+    return value
+
+
+def grid_pixels(lats, lons, size_px, margin_ratio=0.05, orientation=LON0_UP, use_disk=True):
+    """Integer pixel (x, y) for every (lat, lon) of a regular grid.
+
+    Returns two int32 arrays shaped (len(lats), len(lons)), rounded the same
+    way as the generators' proj(): int(round(cx + x_rel * scale)).
+    """
+    _check_orientation(orientation)
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    key = ('grid', orientation, size_px, margin_ratio,
+           lats.size, float(lats[0]), float(lats[-1]), lons.size, float(lons[0]), float(lons[-1]))
+    filename = (f"aeqd_grid_{orientation}_{size_px}_{margin_ratio:g}"
+                f"_{lats.size}x{lons.size}_{lats[0]:g}_{lats[-1]:g}_{lons[0]:g}_{lons[-1]:g}.npy")
+
+    def build():
+        scale, cx, cy = pixel_frame(size_px, margin_ratio)
+        x_rel, y_rel = forward(lats[:, None], lons[None, :], orientation=orientation)
+        return np.stack([np.rint(cx + x_rel * scale), np.rint(cy + y_rel * scale)]).astype(np.int32)
+
+    xy = _cached(key, filename, build, use_disk)
+    return xy[0], xy[1]
+
+
+def clear_cache(disk=False):
+    """Drop in-memory tables (and the .npy files when disk=True)."""
+    with _cache_lock:
+        _cache.clear()
+    if disk and os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            if name.startswith('aeqd_') and name.endswith('.npy'):
+                try:
+                    os.remove(os.path.join(CACHE_DIR, name))
+                except OSError:
+                    pass
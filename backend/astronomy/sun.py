@@ -2,6 +2,8 @@ import os
 import requests
 import time
 from config import ASTRO_API_BASE
+from backend.timing import span, count
+from backend.metrics import ASTRO_CLIENT_SECONDS, ASTRO_CLIENT_ERRORS, DAWN_SOLVES
 
 # Returns both plain text and JSON for sun events and moon illumination
 def get_sun_events_for_date(lat, lon, timezone, date_, location_name=None):
@@ -58,12 +60,15 @@ def get_sun_events_for_date(lat, lon, timezone, date_, location_name=None):
             last_exc = None
             for attempt in range(3):
                 try:
-                    resp = requests.get(f"{ASTRO_API_BASE}/illumination/moon-batch", params=params, timeout=20)
-                    resp.raise_for_status()
-                    arr = resp.json()
+                    with span('astro'), ASTRO_CLIENT_SECONDS.labels('moon-batch').time():
+                        resp = requests.get(f"{ASTRO_API_BASE}/illumination/moon-batch", params=params, timeout=20)
+                        resp.raise_for_status()
+                        arr = resp.json()
                     break
                 except Exception as e:
                     last_exc = e
+                    count('astro-errors')
+                    ASTRO_CLIENT_ERRORS.labels('moon-batch').inc()
                     if attempt < 2:
                         time.sleep(0.5 * (attempt + 1))
                     else:
@@ -112,6 +117,14 @@ def get_event_with_fallback(event_type, lat, lon, timezone, date_):
     Try to get astronomical, nautical, civil, and sunrise/sunset for dawn/dusk events.
     Returns: (event_time, tag) where tag is 'astronomical', 'nautical', 'civil', 'sunrise'/'sunset', or 'migrated'.
     """
+    # timed as 'dawn'/'dusk' with a per-tag counter (see backend/timing.py)
+    with span(event_type):
+        event_time, tag = _solve_event_with_fallback(event_type, lat, lon, timezone, date_)
+    count(f"{event_type}-{tag}")
+    DAWN_SOLVES.labels(event_type, tag).inc()
+    return event_time, tag
+
+def _solve_event_with_fallback(event_type, lat, lon, timezone, date_):
     location = LocationInfo("Custom", "Custom", timezone, lat, lon)
     tags = []
     # For dawn: try astro -> nautical -> civil -> sunrise
@@ -141,6 +154,7 @@ def get_event_with_fallback(event_type, lat, lon, timezone, date_):
         migrated_lat = lat
         while abs(migrated_lat) > 0:
             migrated_lat = migrated_lat - 1 if migrated_lat > 0 else migrated_lat + 1
+            count('migrate-steps')
             location = LocationInfo("Custom", "Custom", timezone, migrated_lat, lon)
             try:
                 t = dawn(location.observer, date=date_, tzinfo=timezone, depression=18)
@@ -173,6 +187,7 @@ def get_event_with_fallback(event_type, lat, lon, timezone, date_):
         migrated_lat = lat
         while abs(migrated_lat) > 0:
             migrated_lat = migrated_lat - 1 if migrated_lat > 0 else migrated_lat + 1
+            count('migrate-steps')
             location = LocationInfo("Custom", "Custom", timezone, migrated_lat, lon)
             try:
                 t = dusk(location.observer, date=date_, tzinfo=timezone, depression=18)
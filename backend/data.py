@@ -11,6 +11,8 @@ import os
 import csv
 import logging
 
+from backend.timing import timed
+
 logging.basicConfig(level=logging.INFO)
 
 # Optional pandas for local/dev; on Vercel we fall back automatically
@@ -149,6 +151,7 @@ def _read_csv(path: str):
     return _read_csv_as_fallback_df(path)
 
 
+@timed('csv')
 def load_full_moon_times():
     global full_moon_times
     logging.info("Loading: %s", FULL_MOON_CSV)
@@ -157,6 +160,7 @@ def load_full_moon_times():
     return full_moon_times
 
 
+@timed('csv')
 def load_new_years_days():
     global new_years_days
     logging.info("Loading: %s", NEW_YEARS_CSV)
@@ -165,6 +169,7 @@ def load_new_years_days():
     return new_years_days
 
 
+@timed('csv')
 def load_spica_moon_crossings():
     global spica_moon_crossings
     logging.info("Loading: %s", SPICA_MOON_CSV)
@@ -173,6 +178,7 @@ def load_spica_moon_crossings():
     return spica_moon_crossings
 
 
+@timed('csv')
 def load_sun_hamal_crossings():
     global sun_hamal_crossings
     logging.info("Loading: %s", SUN_HAMAL_CSV)
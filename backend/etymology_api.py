@@ -4,137 +4,183 @@ Etymology Chain API
 Builds complete etymological trees from Strong's numbers back to primitive roots
 """
 
-from flask import request, jsonify
+from flask import request, jsonify, current_app, has_app_context
 from typing import List, Dict, Optional, Any
 
-def get_strongs_data_from_db(strongs_num: str):
-    """Get Strong's data directly from MongoDB instead of HTTP call"""
+from cachetools import TTLCache
+
+from backend.etymology_index import resolve_chains, resolve_tree, expand_tree, MAX_DEPTH
+from backend.http_cache import mark_degraded
+from backend.strongs_store import get_store, parse_number
+from config import ETYMOLOGY_CACHE_TTL
+
+# most numbers one /api/etymology-chains request may ask for
+MAX_BATCH = 200
+
+# computed derivative trees by (source, root, max_depth)
+_tree_cache = TTLCache(maxsize=1024, ttl=ETYMOLOGY_CACHE_TTL)
+
+def _mongo_db():
+    """The app's MongoDB database, or None when running without it."""
+    if has_app_context():
+        return current_app.config.get('mongo_db')
     try:
         from app import mongo_db
+        return mongo_db
+    except Exception:
+        return None
+
+def get_strongs_data_from_db(strongs_num: str):
+    """Get Strong's data directly from MongoDB instead of HTTP call.
+
+    Without MongoDB (or when it fails) the entry comes from the resident
+    lexicon (backend/strongs_store.py).
+    """
+    try:
+        mongo_db = _mongo_db()
         if mongo_db is not None:
-            collection = mongo_db["strongs"]
-            
-            # Extract numeric part for database query
-            if strongs_num.startswith('H'):
-                numeric_part = int(strongs_num[1:])
-            else:
-                numeric_part = int(strongs_num)
-            
+            from config import STRONG_COLLECTION
+            numeric_part = parse_number(strongs_num)
             # Search for exact Strong's number match using integer
-            result = collection.find_one({"strongsNumber": numeric_part}, {'_id': 0})
-            print(f"MongoDB query for strongsNumber: {numeric_part}, found: {result is not None}")
-            return result
+            return mongo_db[STRONG_COLLECTION].find_one({"strongsNumber": numeric_part}, {'_id': 0})
     except Exception as e:
         print(f"Error fetching {strongs_num} from MongoDB: {e}")
-    return None
+    return get_store().get(strongs_num)
 
 def build_etymology_chain(start_num: int, max_depth: int = 10) -> List[Dict[str, Any]]:
     """
     Build etymological chain starting from a Strong's number
     Returns list of entries from start_num to primitive root
     """
-    chain = []
-    current_num = start_num
-    depth = 0
-    
-    while current_num and depth < max_depth:
-        # Get Strong's data from MongoDB directly instead of HTTP call
+    return build_etymology_chains([start_num], max_depth).get(start_num, [])
+
+def build_etymology_chains(numbers: List[int], max_depth: int = 10) -> Dict[int, List[Dict[str, Any]]]:
+    """Chains for many numbers at once: precomputed table, one $graphLookup, or the in-process index."""
+    from config import STRONG_COLLECTION
+    db = _mongo_db()
+    if db is not None:
         try:
-            strongs_key = f'H{current_num}'
-            entry = get_strongs_data_from_db(strongs_key)
-            
-            if not entry:
-                print(f"No data found for {strongs_key}")
-                break
-                
-            print(f"Found data for {strongs_key}: {entry.get('word', 'unknown')}")
+            return resolve_chains(numbers, max_depth, db, STRONG_COLLECTION)
         except Exception as e:
-            print(f"Error fetching H{current_num}: {e}")
-            break
-            
-        etymology = entry.get('notes', {}).get('etymology', {})
-        chain_entry = {
-            'strongsNumber': entry.get('strongsNumber'),
-            'word': entry.get('word'),
-            'lemma': entry.get('lemma'),
-            'transliteration': entry.get('transliteration'),
-            'partOfSpeech': entry.get('partOfSpeech'),
-            'morphology': entry.get('morphology'),
-            'definitions': entry.get('definitions', []),
-            'etymology': {
-                'type': etymology.get('type'),
-                'description': etymology.get('description'),
-                'references': etymology.get('references', [])
-            },
-            'explanation': entry.get('notes', {}).get('explanation'),
-            'greekReferences': entry.get('greekReferences', [])
-        }
-        
-        chain.append(chain_entry)
-        
-        # Check if this is a primitive root
-        if etymology.get('type') == 'primitive':
-            break
-            
-        # Look for src reference to continue the chain
-        references = etymology.get('references', [])
-        next_num = None
-        for ref in references:
-            if ref.get('src'):
-                try:
-                    next_num = int(ref['src'])
-                    break
-                except (ValueError, TypeError):
-                    continue
-                    
-        if not next_num:
-            break
-            
-        current_num = next_num
-        depth += 1
-    
-    return chain
+            print(f"Error building etymology chains from MongoDB: {e}")
+    return resolve_chains(numbers, max_depth)
+
+def _chain_result(start_num: int, chain: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        'startingWord': f'H{start_num}',
+        'chainLength': len(chain),
+        'reachedPrimitive': chain[-1]['etymology']['type'] == 'primitive' if chain else False,
+        'chain': chain
+    }
+
+def _max_depth_arg(value) -> int:
+    try:
+        max_depth = int(value)
+        if max_depth < 1 or max_depth > MAX_DEPTH:
+            max_depth = 10
+    except (TypeError, ValueError):
+        max_depth = 10
+    return max_depth
 
 def etymology_chain_handler():
     """Handle etymology chain API requests"""
     strongs_num = request.args.get('strongs')
     if not strongs_num:
         return jsonify({'error': 'Missing strongs parameter'}), 400
-    
-    # Remove H prefix if present
-    if strongs_num.startswith('H'):
-        strongs_num = strongs_num[1:]
-    
-    try:
-        start_num = int(strongs_num)
-    except ValueError:
+
+    start_num = parse_number(strongs_num)
+    if start_num is None:
         return jsonify({'error': 'Invalid Strong\'s number format'}), 400
-    
+
     # Get max_depth parameter (optional)
-    max_depth = request.args.get('max_depth', 10)
-    try:
-        max_depth = int(max_depth)
-        if max_depth < 1 or max_depth > 20:
-            max_depth = 10
-    except ValueError:
-        max_depth = 10
-    
+    max_depth = _max_depth_arg(request.args.get('max_depth', 10))
+
     # Build the chain
     try:
         chain = build_etymology_chain(start_num, max_depth)
-        
+
         if not chain:
             return jsonify({'error': f'No data found for H{start_num}'}), 404
-        
-        # Add chain metadata
-        result = {
-            'startingWord': f'H{start_num}',
-            'chainLength': len(chain),
-            'reachedPrimitive': chain[-1]['etymology']['type'] == 'primitive' if chain else False,
-            'chain': chain
-        }
-        
-        return jsonify(result)
-        
+
+        return jsonify(_chain_result(start_num, chain))
+
+    except Exception as e:
+        return jsonify({'error': f'Error building etymology chain: {str(e)}'}), 500
+
+def etymology_chains_handler():
+    """Handle batch etymology chain requests.
+
+    GET ?strongs=H1,H3,7&max_depth=10 or POST {"strongs": [...], "max_depth": 10}
+    """
+    body = request.get_json(silent=True) if request.method == 'POST' else None
+    if not isinstance(body, dict):
+        body = {}
+    raw = body.get('strongs', request.args.get('strongs', ''))
+    if isinstance(raw, str):
+        raw = [part for part in raw.split(',') if part.strip()]
+    if not raw:
+        return jsonify({'error': 'Missing strongs parameter'}), 400
+    if len(raw) > MAX_BATCH:
+        return jsonify({'error': f'At most {MAX_BATCH} Strong\'s numbers per request'}), 400
+
+    numbers = [parse_number(value) for value in raw]
+    invalid = [str(value) for value, n in zip(raw, numbers) if n is None]
+    if invalid:
+        return jsonify({'error': 'Invalid Strong\'s number format', 'invalid': invalid}), 400
+
+    max_depth = _max_depth_arg(body.get('max_depth', request.args.get('max_depth', 10)))
+    try:
+        chains = build_etymology_chains(numbers, max_depth)
+    except Exception as e:
+        return jsonify({'error': f'Error building etymology chains: {str(e)}'}), 500
+
+    return jsonify({
+        'chains': {f'H{n}': _chain_result(n, chains[n]) for n in dict.fromkeys(numbers) if chains.get(n)},
+        'missing': [f'H{n}' for n in dict.fromkeys(numbers) if not chains.get(n)],
+    })
+
+def build_etymology_tree(root: int, max_depth: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Compact derivative tree of `root` (see backend/etymology_index.resolve_tree), cached."""
+    from config import STRONG_COLLECTION
+    db = _mongo_db()
+    key = ('mongo' if db is not None else 'local', root, max_depth)
+    if key in _tree_cache:
+        return _tree_cache[key]
+    if db is not None:
+        try:
+            tree = resolve_tree(root, max_depth, db, STRONG_COLLECTION)
+        except Exception as e:
+            print(f"Error building etymology tree from MongoDB: {e}")
+            # strongs.json has no etymology notes, so this is only the root: answer with it
+            # but keep it out of the cache (and out of HTTP caches) so MongoDB is retried
+            mark_degraded()
+            return resolve_tree(root, max_depth)
+    else:
+        tree = resolve_tree(root, max_depth)
+    _tree_cache[key] = tree
+    return tree
+
+def etymology_tree_args():
+    """(root, max_depth, format) from the request, or None if `root` is missing/invalid."""
+    root = parse_number(request.args.get('root', ''))
+    if root is None:
+        return None
+    max_depth = request.args.get('max_depth', type=int)
+    if max_depth is not None and max_depth < 1:
+        max_depth = None
+    fmt = request.args.get('format', 'compact')
+    return root, max_depth, ('full' if fmt == 'full' else 'compact')
+
+def etymology_tree_handler():
+    """Handle /api/etymology-tree: every word derived from a root, in one response"""
+    args = etymology_tree_args()
+    if args is None:
+        return jsonify({'error': 'Missing or invalid root parameter (e.g. root=H1)'}), 400
+    root, max_depth, fmt = args
+    try:
+        tree = build_etymology_tree(root, max_depth)
     except Exception as e:
-        return jsonify({'error': f'Error building etymology chain: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Error building etymology tree: {str(e)}'}), 500
+    if tree is None:
+        return jsonify({'error': f'No data found for H{root}'}), 404
+    return jsonify(expand_tree(tree) if fmt == 'full' else tree)
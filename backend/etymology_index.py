@@ -0,0 +1,500 @@
+"""
+Etymology chains: from a Strong's number back to its primitive root.
+
+Each entry points at its parent through the first numeric `src` in
+`notes.etymology.references` (entries marked `primitive` have none). The
+root closure is that walk done once for every number:
+
+    chain(n) = (n, parent(n), parent(parent(n)), ..., root)
+
+EtymologyIndex computes the closure for the whole lexicon in one pass,
+sharing work between chains and detecting cycles (a chain stops before it
+would repeat a number). Each chain also gets a status:
+
+    primitive  ends at an entry whose etymology type is 'primitive'
+    root       ends at an entry without a parent that is not marked primitive
+    missing    ends because the next parent is not in the lexicon
+    cycle      the references loop; the chain holds every number once
+
+Where chains come from, fastest first:
+  1. the precomputed `<strongs>_etymology` collection
+     ({_id: n, chain: [...], status}), written offline by
+         python -m backend.etymology_index build-mongo
+  2. live data: one $graphLookup aggregation over the Strong's collection
+     (this needs `src` stored with the same type as `strongsNumber`; hops it
+     cannot follow are fetched with batched finds);
+  3. without MongoDB, an in-process index over the resident lexicon.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import threading
+
+from cachetools import TTLCache
+
+from backend.strongs_store import get_store, parse_number
+from backend.timing import span
+
+PRIMITIVE, ROOT, MISSING, CYCLE = 'primitive', 'root', 'missing', 'cycle'
+MAX_DEPTH = 20
+
+
+def etymology_of(entry: dict) -> dict:
+    return (entry.get('notes') or {}).get('etymology') or {}
+
+
+def is_primitive(entry: dict) -> bool:
+    return etymology_of(entry).get('type') == 'primitive'
+
+
+def etymology_parent(entry: dict) -> Optional[int]:
+    """Strong's number the entry derives from (first numeric `src`), or None."""
+    if is_primitive(entry):
+        return None
+    for ref in etymology_of(entry).get('references') or ():
+        src = ref.get('src') if isinstance(ref, dict) else None
+        if src is None or isinstance(src, bool):
+            continue
+        number = parse_number(src)
+        if number is not None:
+            return number
+    return None
+
+
+def chain_entry(entry: dict) -> dict:
+    """One link of an /api/etymology-chain response."""
+    etymology = etymology_of(entry)
+    return {
+        'strongsNumber': entry.get('strongsNumber'),
+        'word': entry.get('word'),
+        'lemma': entry.get('lemma'),
+        'transliteration': entry.get('transliteration'),
+        'partOfSpeech': entry.get('partOfSpeech'),
+        'morphology': entry.get('morphology'),
+        'definitions': entry.get('definitions', []),
+        'etymology': {
+            'type': etymology.get('type'),
+            'description': etymology.get('description'),
+            'references': etymology.get('references', [])
+        },
+        'explanation': (entry.get('notes') or {}).get('explanation'),
+        'greekReferences': entry.get('greekReferences', [])
+    }
+
+
+class EtymologyIndex:
+    """Parent links and the precomputed root closure of a lexicon."""
+
+    def __init__(self, parents: Dict[int, Optional[int]], primitives: Iterable[int] = ()):
+        self.parents = parents
+        self.primitives = frozenset(primitives)
+        self._chains: Dict[int, Tuple[int, ...]] = {}
+        self._status: Dict[int, str] = {}
+        self._children: Optional[Dict[int, Tuple[int, ...]]] = None
+        for number in parents:
+            if number not in self._chains:
+                self._resolve(number)
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[dict]) -> 'EtymologyIndex':
+        parents: Dict[int, Optional[int]] = {}
+        primitives = []
+        for doc in docs:
+            number = parse_number(doc.get('strongsNumber'))
+            if number is None or number in parents:
+                continue
+            parents[number] = etymology_parent(doc)
+            if is_primitive(doc):
+                primitives.append(number)
+        return cls(parents, primitives)
+
+    def _resolve(self, start: int) -> None:
+        path: List[int] = []
+        position: Dict[int, int] = {}
+        node: Optional[int] = start
+        while True:
+            position[node] = len(path)
+            path.append(node)
+            parent = self.parents.get(node)
+            if parent is None:
+                tail, status = (), (PRIMITIVE if node in self.primitives else ROOT)
+                break
+            if parent not in self.parents:
+                tail, status = (), MISSING
+                break
+            if parent in self._chains:
+                tail, status = self._chains[parent], self._status[parent]
+                break
+            if parent in position:
+                # path[j:] is a cycle: each member's chain runs once around it
+                j = position[parent]
+                cycle = path[j:]
+                for k, member in enumerate(cycle):
+                    self._chains[member] = tuple(cycle[k:] + cycle[:k])
+                    self._status[member] = CYCLE
+                path = path[:j]
+                tail, status = tuple(cycle), CYCLE
+                break
+            node = parent
+        for i in range(len(path) - 1, -1, -1):
+            tail = (path[i],) + tail
+            self._chains[path[i]] = tail
+            self._status[path[i]] = status
+
+    def __len__(self) -> int:
+        return len(self._chains)
+
+    def __contains__(self, number) -> bool:
+        return parse_number(number) in self._chains
+
+    def chain(self, number, max_depth: Optional[int] = None) -> Optional[Tuple[int, ...]]:
+        """Numbers from `number` to its root, at most `max_depth` of them; None if unknown."""
+        chain = self._chains.get(parse_number(number))
+        if chain is None:
+            return None
+        return chain[:max_depth] if max_depth else chain
+
+    def status(self, number) -> Optional[str]:
+        return self._status.get(parse_number(number))
+
+    def closure(self) -> Dict[int, Tuple[int, ...]]:
+        return self._chains
+
+    def children(self) -> Dict[int, Tuple[int, ...]]:
+        """Reverse links: number -> numbers whose parent it is (sorted), built on first use."""
+        if self._children is None:
+            children: Dict[int, List[int]] = {}
+            for number, parent in self.parents.items():
+                if parent is not None and parent != number and parent in self.parents:
+                    children.setdefault(parent, []).append(number)
+            self._children = {n: tuple(sorted(c)) for n, c in children.items()}
+        return self._children
+
+    def derivatives(self, number) -> Tuple[int, ...]:
+        """Numbers derived directly from `number`."""
+        return self.children().get(parse_number(number), ())
+
+    def descendants(self, number, max_depth: Optional[int] = None) -> List[int]:
+        """Every number whose chain passes through `number` (breadth-first, `number` excluded)."""
+        return _walk(parse_number(number), self.children(), max_depth)[1:]
+
+
+# -------------------------------
+# Resolving chains (precomputed table, $graphLookup, in-process)
+# -------------------------------
+def table_name(source: str) -> str:
+    return f'{source}_etymology'
+
+
+# whether the precomputed table exists, re-checked every 5 minutes
+_table_checks = TTLCache(maxsize=8, ttl=300)
+
+
+def _table_available(db, source: str) -> bool:
+    available = _table_checks.get(source)
+    if available is None:
+        try:
+            available = bool(db.list_collection_names(filter={'name': table_name(source)}))
+        except Exception:
+            available = False
+        _table_checks[source] = available
+    return available
+
+
+def _chains_from_table(db, source: str, numbers: Sequence[int]) -> Dict[int, List[int]]:
+    return {doc['_id']: doc['chain'] for doc in db[table_name(source)].find({'_id': {'$in': list(numbers)}})}
+
+
+def _chains_from_graph(db, source: str, numbers: Sequence[int], max_depth: int,
+                       docs: Dict[int, dict]) -> Dict[int, List[int]]:
+    """Chains via $graphLookup; fills `docs` with every entry it saw."""
+    pipeline = [
+        {'$match': {'strongsNumber': {'$in': list(numbers)}}},
+        {'$graphLookup': {
+            'from': source,
+            'startWith': '$notes.etymology.references.src',
+            'connectFromField': 'notes.etymology.references.src',
+            'connectToField': 'strongsNumber',
+            'as': 'ancestors',
+            'maxDepth': max(0, max_depth - 2),
+        }},
+        {'$project': {'_id': 0, 'ancestors._id': 0}},
+    ]
+    for doc in db[source].aggregate(pipeline, allowDiskUse=True):
+        for ancestor in doc.pop('ancestors', ()):
+            docs.setdefault(ancestor.get('strongsNumber'), ancestor)
+        docs[doc.get('strongsNumber')] = doc
+
+    chains: Dict[int, List[int]] = {}
+    pending = {n: [n] for n in numbers if n in docs}
+    fetched = set()
+    while pending:
+        # follow parents through what we have; hops $graphLookup could not follow are fetched per round
+        wanted: Dict[int, List[int]] = {}
+        for start, chain in pending.items():
+            missing = _extend(chain, docs, max_depth)
+            if missing is None or missing in fetched:
+                chains[start] = chain
+            else:
+                wanted.setdefault(missing, []).append(start)
+        pending = {start: pending[start] for starts in wanted.values() for start in starts}
+        if wanted:
+            fetched.update(wanted)
+            for doc in db[source].find({'strongsNumber': {'$in': list(wanted)}}, {'_id': 0}):
+                docs.setdefault(doc.get('strongsNumber'), doc)
+    return chains
+
+
+def _extend(chain: List[int], docs: Dict[int, dict], max_depth: int) -> Optional[int]:
+    """Append parents found in `docs`; returns the next parent still to be fetched, or None when done."""
+    while len(chain) < max_depth:
+        parent = etymology_parent(docs[chain[-1]])
+        if parent is None or parent in chain:
+            return None
+        if parent not in docs:
+            return parent
+        chain.append(parent)
+    return None
+
+
+_local_index: Optional[EtymologyIndex] = None
+_local_lock = threading.Lock()
+
+
+def local_index() -> EtymologyIndex:
+    """Closure over the resident lexicon, computed once per process."""
+    global _local_index
+    if _local_index is None:
+        with _local_lock:
+            if _local_index is None:
+                with span('etymology-index'):
+                    _local_index = EtymologyIndex.from_documents(get_store().entries())
+    return _local_index
+
+
+def resolve_chains(numbers: Sequence[int], max_depth: int = 10, db=None,
+                   source: str = 'strongs') -> Dict[int, List[dict]]:
+    """Chains of entries (as in /api/etymology-chain) for each known number in `numbers`."""
+    numbers = list(dict.fromkeys(numbers))
+    if not numbers:
+        return {}
+    if db is None:
+        index = local_index()
+        store = get_store()
+        result = {}
+        for n in numbers:
+            chain = index.chain(n, max_depth)
+            if chain:
+                result[n] = [chain_entry(e) for e in store.get_many(chain)]
+        return result
+
+    docs: Dict[int, dict] = {}
+    with span('etymology'):
+        if _table_available(db, source):
+            chains = {n: c[:max_depth] for n, c in _chains_from_table(db, source, numbers).items()}
+        else:
+            chains = _chains_from_graph(db, source, numbers, max_depth, docs)
+        needed = {n for chain in chains.values() for n in chain if n not in docs}
+        if needed:
+            for doc in db[source].find({'strongsNumber': {'$in': list(needed)}}, {'_id': 0}):
+                docs.setdefault(doc.get('strongsNumber'), doc)
+    result = {}
+    for n, chain in chains.items():
+        links = [docs[c] for c in chain if c in docs]
+        if links:
+            result[n] = [chain_entry(doc) for doc in links]
+    return result
+
+
+# -------------------------------
+# Derivative trees (reverse index)
+# -------------------------------
+def _walk(root: int, children: Dict[int, Sequence[int]], max_depth: Optional[int] = None) -> List[int]:
+    """`root` and its descendants, breadth-first; cycles are cut at the first repeat."""
+    seen = {root}
+    order = [root]
+    level = [root]
+    depth = 0
+    while level and (max_depth is None or depth < max_depth):
+        depth += 1
+        following = []
+        for number in level:
+            for child in children.get(number, ()):
+                if child not in seen:
+                    seen.add(child)
+                    order.append(child)
+                    following.append(child)
+        level = following
+    return order
+
+
+def compact_tree(root: int, children: Dict[int, Sequence[int]], max_depth: Optional[int] = None) -> list:
+    """Nested [number, [child, ...]] lists; a leaf is just [number]. Cycles are cut at the first repeat."""
+    seen = {root}
+
+    def visit(number, depth):
+        kids = []
+        if max_depth is None or depth < max_depth:
+            for child in children.get(number, ()):
+                if child not in seen:
+                    seen.add(child)
+                    kids.append(visit(child, depth + 1))
+        return [number, kids] if kids else [number]
+
+    return visit(root, 0)
+
+
+def _children_from_table(db, source: str, root: int, max_depth: Optional[int]) -> Dict[int, List[int]]:
+    """Reverse links under `root` from the precomputed chains (one indexed query on `chain`)."""
+    children: Dict[int, List[int]] = {}
+    for doc in db[table_name(source)].find({'chain': root}, {'chain': 1}):
+        chain = doc['chain']
+        number = doc['_id']
+        if number == root or len(chain) < 2:
+            continue
+        if max_depth is not None and chain.index(root) > max_depth:
+            continue
+        children.setdefault(chain[1], []).append(number)
+    return {n: sorted(c) for n, c in children.items()}
+
+
+_mongo_indexes = TTLCache(maxsize=4, ttl=3600)
+_mongo_lock = threading.Lock()
+
+
+def mongo_index(db, source: str) -> EtymologyIndex:
+    """Index over the live Strong's collection (parent links only), rebuilt hourly."""
+    index = _mongo_indexes.get(source)
+    if index is None:
+        with _mongo_lock:
+            index = _mongo_indexes.get(source)
+            if index is None:
+                projection = {'_id': 0, 'strongsNumber': 1, 'notes.etymology.type': 1,
+                              'notes.etymology.references.src': 1}
+                with span('etymology-index'):
+                    index = EtymologyIndex.from_documents(db[source].find({}, projection))
+                _mongo_indexes[source] = index
+    return index
+
+
+TREE_FIELDS = ('word', 'transliteration', 'partOfSpeech', 'type', 'gloss')
+
+
+def _tree_row(entry: dict) -> list:
+    definitions = entry.get('definitions') or []
+    gloss = definitions[0] if definitions else ''
+    # "1) father of an individual" -> "father of an individual"
+    head, sep, rest = gloss.partition(') ')
+    if sep and len(head) <= 6 and head.replace('.', '').isalnum():
+        gloss = rest
+    return [entry.get('word'), entry.get('transliteration'), entry.get('partOfSpeech'),
+            etymology_of(entry).get('type'), gloss.strip()]
+
+
+def resolve_tree(root: int, max_depth: Optional[int] = None, db=None, source: str = 'strongs') -> Optional[dict]:
+    """All words derived from `root` as a compact tree, or None if `root` is unknown.
+
+    {"root": 1, "count": <descendants>, "depth": <levels>, "fields": [...],
+     "entries": {"<n>": [word, transliteration, partOfSpeech, type, gloss]},
+     "tree": [1, [[2], [3, [[4]]]]]}
+    """
+    if db is None:
+        index = local_index()
+        if root not in index:
+            return None
+        children = index.children()
+    elif _table_available(db, source):
+        children = _children_from_table(db, source, root, max_depth)
+    else:
+        index = mongo_index(db, source)
+        if root not in index:
+            return None
+        children = index.children()
+
+    with span('etymology-tree'):
+        numbers = _walk(root, children, max_depth)
+        tree = compact_tree(root, children, max_depth)
+        if db is None:
+            entries = get_store().get_many(numbers)
+        else:
+            projection = {'_id': 0, 'strongsNumber': 1, 'word': 1, 'transliteration': 1, 'partOfSpeech': 1,
+                          'definitions': {'$slice': 1}, 'notes.etymology.type': 1}
+            entries = list(db[source].find({'strongsNumber': {'$in': numbers}}, projection))
+    if not any(e.get('strongsNumber') == root for e in entries):
+        return None
+
+    def depth_of(node, d=0):
+        return max([depth_of(child, d + 1) for child in node[1]] if len(node) > 1 else [d])
+
+    return {
+        'root': root,
+        'count': len(numbers) - 1,
+        'depth': depth_of(tree),
+        'fields': list(TREE_FIELDS),
+        'entries': {str(e['strongsNumber']): _tree_row(e) for e in entries},
+        'tree': tree,
+    }
+
+
+def expand_tree(compact: dict) -> dict:
+    """The nested-object form of a resolve_tree() result."""
+    fields = compact['fields']
+    entries = compact['entries']
+
+    def expand(node):
+        row = entries.get(str(node[0])) or [None] * len(fields)
+        item = {'strongsNumber': node[0]}
+        item.update(zip(fields, row))
+        item['children'] = [expand(child) for child in node[1]] if len(node) > 1 else []
+        return item
+
+    return {'root': compact['root'], 'count': compact['count'], 'depth': compact['depth'],
+            'tree': expand(compact['tree'])}
+
+
+def build_mongo_table(db, source: str, batch_size: int = 1000) -> Dict[str, int]:
+    """Rewrite `<source>_etymology` from the Strong's collection; returns chain counts by status."""
+    from pymongo import InsertOne
+
+    projection = {'_id': 0, 'strongsNumber': 1, 'notes.etymology.type': 1, 'notes.etymology.references.src': 1}
+    index = EtymologyIndex.from_documents(db[source].find({}, projection))
+    name = table_name(source)
+    db.drop_collection(f'{name}_tmp')
+    tmp = db.create_collection(f'{name}_tmp')
+    counts: Dict[str, int] = {}
+    batch = []
+    for number, chain in index.closure().items():
+        status = index.status(number)
+        counts[status] = counts.get(status, 0) + 1
+        batch.append(InsertOne({'_id': number, 'chain': list(chain), 'status': status, 'root': chain[-1]}))
+        if len(batch) >= batch_size:
+            tmp.bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        tmp.bulk_write(batch, ordered=False)
+    tmp.rename(name, dropTarget=True)
+    # /api/etymology-tree reads every chain through a root with one multikey lookup
+    db[name].create_index('chain')
+    if counts.get(CYCLE):
+        logging.warning(f"Etymology: {counts[CYCLE]} entries are on or lead into reference cycles")
+    return counts
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description="Precompute Strong's etymology root chains")
+    parser.add_argument('command', choices=['build-mongo'])
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+    from config import MONGODB_URI, DATABASE_NAME, STRONG_COLLECTION
+    if not MONGODB_URI:
+        sys.exit('MONGODB_URI is not configured')
+    client = MongoClient(MONGODB_URI)
+    counts = build_mongo_table(client[DATABASE_NAME], STRONG_COLLECTION)
+    summary = ', '.join(f'{status}: {n}' for status, n in sorted(counts.items()))
+    print(f"✅ Wrote {sum(counts.values())} chains to '{table_name(STRONG_COLLECTION)}' ({summary})")
@@ -0,0 +1,61 @@
+"""
+Field selection for the list endpoints (/api/strongs-data, /api/kjv-data).
+
+Both used to return whole documents: every definition, note and reference
+of a Strong's entry, every strongsNumbers list of a verse, even when the
+caller only fills a list. A request can now ask for less:
+
+  ?fields=word,transliteration   only these top-level fields
+  ?view=summary                  the endpoint's summary fields
+
+The selection becomes a MongoDB projection (so unrequested fields never
+leave the server) or is applied to the resident documents. Fields an
+endpoint always needs, such as the strongsNumber its `after=` cursor is
+taken from, are added to every selection.
+"""
+
+from typing import Iterable, Optional, Sequence, Tuple
+
+Fields = Optional[Tuple[str, ...]]
+
+
+def parse_fields(fields: Optional[str], view: Optional[str], allowed: Sequence[str],
+                 summary: Sequence[str], required: Sequence[str] = ()) -> Fields:
+    """Selected fields from ?fields= / ?view=, or None for whole documents.
+
+    Raises ValueError for an unknown field or view.
+    """
+    if view and view not in ('summary', 'full'):
+        raise ValueError(f"Unknown view '{view}' (expected summary or full)")
+    if fields:
+        names = [name.strip() for name in fields.split(',') if name.strip()]
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown field(s) {', '.join(unknown)} (expected {', '.join(allowed)})")
+    elif view == 'summary':
+        names = list(summary)
+    else:
+        return None
+    return tuple(dict.fromkeys([*required, *names]))
+
+
+def mongo_projection(fields: Fields, keep_id: bool = False) -> Optional[dict]:
+    """find() projection for `fields`; _id is excluded unless keep_id (None: everything)."""
+    if keep_id and fields is None:
+        # pymongo reads an empty projection as "_id only"
+        return None
+    projection = {} if keep_id else {'_id': 0}
+    if fields is not None:
+        projection.update((name, 1) for name in fields)
+    return projection
+
+
+def select(doc: dict, fields: Fields) -> dict:
+    """`doc` reduced to `fields` (missing ones are left out, as MongoDB does)."""
+    if fields is None:
+        return doc
+    return {name: doc[name] for name in fields if name in doc}
+
+
+def select_all(docs: Iterable[dict], fields: Fields) -> list:
+    return [select(doc, fields) for doc in docs]
@@ -0,0 +1,229 @@
+"""
+Type-ahead search over Hebrew Strong's words.
+
+Queries and words are normalized the same way before they are compared:
+niqqud and cantillation are removed (so a pointed query matches the
+unpointed lexicon), final letters are folded to their medial forms
+(ך→כ, ם→מ, ן→נ, ף→פ, ץ→צ), maqaf becomes a space, and other punctuation
+(paseq, sof pasuq, geresh) is dropped.
+
+HebrewTrie holds the normalized words in a character trie. Every node keeps
+the best TOP_K Strong's numbers of its subtree, ranked by how often the
+number occurs in the KJV (most frequent first), then shorter words, then
+lower numbers. A prefix lookup is one step per query character plus
+reading that list, so the cost does not depend on the size of the lexicon.
+Exact matches come first, then prefix matches, and, if that does not fill
+the limit, words containing the query elsewhere.
+
+get_index() builds the trie once per language and process (from MongoDB
+when it is available, else from the resident lexicon) and rebuilds it
+after HEBREW_INDEX_TTL seconds.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import heapq
+import logging
+import os
+import threading
+import time
+import unicodedata
+
+from backend.strongs_store import get_store, parse_number
+from backend.timing import span
+
+TOP_K = 50
+
+_FINAL_FORMS = str.maketrans('ךםןףץ', 'כמנפצ')
+_MAQAF = '־'
+_DROPPED = frozenset('׀׃׆׳״')  # paseq, sof pasuq, nun hafukha, geresh, gershayim
+
+
+def normalize_hebrew(text: Optional[str]) -> str:
+    """Unpointed, final-letter-folded form of a Hebrew word or query."""
+    if not text:
+        return ''
+    chars = []
+    for ch in unicodedata.normalize('NFKD', text):
+        if ch == _MAQAF:
+            chars.append(' ')
+        elif ch in _DROPPED or unicodedata.category(ch) in ('Mn', 'Me', 'Cf'):
+            continue
+        else:
+            chars.append(ch)
+    return ' '.join(''.join(chars).translate(_FINAL_FORMS).split())
+
+
+class _Node:
+    __slots__ = ('children', 'entries', 'top')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.entries: Tuple = ()
+        self.top: Tuple = ()
+
+
+class HebrewTrie:
+    """Prefix trie over normalized words with per-node top-k lists."""
+
+    def __init__(self, words: Iterable[Tuple[int, str]], frequencies: Optional[Dict[int, int]] = None,
+                 top_k: int = TOP_K):
+        """words: (strongsNumber, word) pairs; frequencies: KJV occurrences per number."""
+        frequencies = frequencies or {}
+        self.top_k = top_k
+        self._root = _Node()
+        # (rank key, normalized word) per number; the key orders every result list
+        self._keys: Dict[int, tuple] = {}
+        self._words: List[Tuple[str, int]] = []
+        for number, word in words:
+            normalized = normalize_hebrew(word)
+            if not normalized or number in self._keys:
+                continue
+            self._keys[number] = (-frequencies.get(number, 0), len(normalized), number)
+            self._words.append((normalized, number))
+            node = self._root
+            for ch in normalized:
+                node = node.children.setdefault(ch, _Node())
+            node.entries += (number,)
+        self._fill_top(self._root)
+
+    def _fill_top(self, root: _Node) -> None:
+        # iterative post-order: children's top lists are merged into their parent's
+        key = self._keys.get
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+                continue
+            node.entries = tuple(sorted(node.entries, key=key))
+            merged = heapq.merge(node.entries, *(c.top for c in node.children.values()), key=key)
+            node.top = tuple(n for _, n in zip(range(self.top_k), merged))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def frequency(self, number: int) -> int:
+        key = self._keys.get(number)
+        return -key[0] if key else 0
+
+    def _find(self, normalized: str) -> Optional[_Node]:
+        node = self._root
+        for ch in normalized:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def _subtree(self, node: _Node) -> List[int]:
+        found, stack = [], [node]
+        while stack:
+            n = stack.pop()
+            found.extend(n.entries)
+            stack.extend(n.children.values())
+        return sorted(found, key=self._keys.get)
+
+    def search(self, query: str, limit: int = 20, infix: bool = True) -> List[int]:
+        """Strong's numbers for `query`: exact, then prefix, then (optionally) infix matches."""
+        normalized = normalize_hebrew(query)
+        if not normalized or limit <= 0:
+            return []
+        results: List[int] = []
+        node = self._find(normalized)
+        if node is not None:
+            prefixed = node.top if limit <= len(node.top) or len(node.top) < self.top_k else self._subtree(node)
+            results.extend(node.entries[:limit])
+            seen = set(results)
+            for number in prefixed:
+                if len(results) >= limit:
+                    break
+                if number not in seen:
+                    results.append(number)
+        if infix and len(results) < limit:
+            seen = set(results)
+            inner = [number for word, number in self._words
+                     if number not in seen and normalized in word and not word.startswith(normalized)]
+            results.extend(heapq.nsmallest(limit - len(results), inner, key=self._keys.get))
+        return results
+
+
+# -------------------------------
+# Frequencies and the per-process index
+# -------------------------------
+def _verse_frequencies(db=None, verses_collection: str = 'verses') -> Dict[int, int]:
+    """KJV occurrences per Strong's number (MongoDB, else backend/data/verses.json; {} if neither)."""
+    counts: Dict[int, int] = {}
+    if db is not None:
+        # materialized by backend.kjv_index.build_strongs_counts: one read instead of an $unwind of every verse
+        from backend.kjv_index import strongs_totals
+        totals = strongs_totals(db, verses_collection)
+        if totals:
+            for value, n in totals.items():
+                number = parse_number(value)
+                if number is not None:
+                    counts[number] = counts.get(number, 0) + n
+            return counts
+        pipeline = [{'$unwind': '$strongsNumbers'}, {'$group': {'_id': '$strongsNumbers', 'n': {'$sum': 1}}}]
+        try:
+            for doc in db[verses_collection].aggregate(pipeline, allowDiskUse=True, maxTimeMS=15000):
+                number = parse_number(doc['_id'])
+                if number is not None:
+                    counts[number] = counts.get(number, 0) + doc['n']
+            return counts
+        except Exception as e:
+            logging.warning(f"Hebrew search: could not count Strong's frequencies in MongoDB: {e}")
+            return {}
+    path = os.path.join(os.path.dirname(__file__), 'data', 'verses.json')
+    if os.path.exists(path):
+        import json
+        with open(path, 'r', encoding='utf-8') as f:
+            for verse in json.load(f):
+                for value in verse.get('strongsNumbers') or ():
+                    number = parse_number(value)
+                    if number is not None:
+                        counts[number] = counts.get(number, 0) + 1
+    return counts
+
+
+_indexes: Dict[Optional[str], Tuple[float, HebrewTrie]] = {}
+_frequencies: Optional[Tuple[float, Dict[int, int]]] = None
+_index_lock = threading.Lock()
+
+
+def _words(db, collection: str, language: Optional[str]) -> List[Tuple[int, str]]:
+    if db is not None:
+        query = {'language': language} if language else {}
+        return [(doc['strongsNumber'], doc.get('word') or '')
+                for doc in db[collection].find(query, {'_id': 0, 'strongsNumber': 1, 'word': 1})
+                if isinstance(doc.get('strongsNumber'), int)]
+    return [(entry['strongsNumber'], entry['word']) for entry in get_store().entries(language=language)]
+
+
+def get_index(db=None, language: Optional[str] = None, collection: str = 'strongs',
+              verses_collection: str = 'verses', ttl: float = 3600.0,
+              frequencies: Optional[Callable[[], Dict[int, int]]] = None) -> HebrewTrie:
+    """The trie for `language` (None = every entry), built on first use and after `ttl` seconds."""
+    global _frequencies
+    now = time.monotonic()
+    cached = _indexes.get(language)
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1]
+    with _index_lock:
+        cached = _indexes.get(language)
+        if cached is not None and now - cached[0] < ttl:
+            return cached[1]
+        with span('hebrew-index'):
+            if _frequencies is None or now - _frequencies[0] >= ttl:
+                counts = frequencies() if frequencies is not None else _verse_frequencies(db, verses_collection)
+                _frequencies = (now, counts)
+            trie = HebrewTrie(_words(db, collection, language), _frequencies[1])
+        _indexes[language] = (now, trie)
+        logging.info(f"Hebrew search: indexed {len(trie)} words (language={language or 'all'})")
+        return trie
+
+
+def reset_indexes() -> None:
+    global _frequencies
+    with _index_lock:
+        _indexes.clear()
+        _frequencies = None
@@ -0,0 +1,205 @@
+"""
+HTTP caching policy for the deterministic calendar and sun endpoints.
+
+A view decorated with @http_cached(policy) gets:
+  - a content ETag (hash of the JSON body) and a Cache-Control header
+    chosen by `policy`: `immutable` for periods that are over, otherwise a
+    max-age that runs out at the next local dawn (when the current day or
+    year can roll over);
+  - 304 Not Modified for a matching If-None-Match. The ETag each cache key
+    produced is remembered until the response would expire, so repeat
+    conditional requests are answered without recomputing the body (or the
+    max-age: a 304 carries what is left of the remembered one); a worker
+    that has not seen the key yet recomputes once and still replies 304
+    when the content matches.
+
+policy() runs inside the request and returns a CachePolicy, or None to
+serve the view uncached (e.g. invalid parameters, which the view rejects).
+A view whose answer is degraded (an upstream failed and it fell back to a
+partial result) calls mark_degraded(): the response is sent with
+`Cache-Control: no-store` and its ETag is not remembered, so neither the
+browser, the CDN nor the 304 memo keeps it.
+It only has to be cheap enough to build the key: a max-age given as a
+callable is evaluated when a full response needs it. The next dawn behind
+current_period_policy() is solved once per location and local date and
+kept until that dawn.
+"""
+
+from typing import Callable, Hashable, Optional, Union
+from datetime import datetime
+import functools
+import hashlib
+import math
+import time
+
+import pytz
+from cachetools import TLRUCache
+
+from backend.metrics import CACHE_REQUESTS
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# when no dawn can be found (or solving fails), revalidate after an hour
+FALLBACK_MAX_AGE = 3600
+MIN_MAX_AGE = 60
+
+
+class CachePolicy:
+    __slots__ = ('key', 'immutable', '_max_age')
+
+    def __init__(self, key: Hashable, max_age: Union[None, int, Callable[[], Optional[int]]] = None,
+                 immutable: bool = False):
+        self.key = key
+        self.immutable = immutable
+        self._max_age = IMMUTABLE_MAX_AGE if immutable else max_age
+
+    @property
+    def max_age(self) -> int:
+        if callable(self._max_age):
+            self._max_age = self._max_age()
+        if self.immutable:
+            return self._max_age
+        return max(MIN_MAX_AGE, int(self._max_age or FALLBACK_MAX_AGE))
+
+    def cache_control(self, max_age: Optional[int] = None) -> str:
+        if self.immutable:
+            return f'public, max-age={self.max_age}, immutable'
+        return f'public, max-age={self.max_age if max_age is None else max_age}'
+
+
+def _etag_ttu(key, value, now):
+    # value = (etag, expires_at); entries drop out of the memo when the response would expire
+    return value[1]
+
+
+# cache key -> (etag, expires_at monotonic)
+_etags = TLRUCache(maxsize=4096, ttu=_etag_ttu, timer=time.monotonic)
+
+
+def _dawn_ttu(key, value, now):
+    # value = (dawn or None, expires_at epoch seconds): a dawn is kept until it has passed
+    return value[1]
+
+
+# (lat, lon, tz, local date) -> (next dawn in UTC or None, expires_at)
+_dawns = TLRUCache(maxsize=4096, ttu=_dawn_ttu, timer=time.time)
+
+
+def next_dawn(lat: float, lon: float, tzname: str, now_utc: Optional[datetime] = None) -> Optional[datetime]:
+    """The next local dawn after now (any fallback tag), or None; memoized until that dawn."""
+    from backend.astronomy.moon import find_first_dawn_after
+    now_utc = now_utc or datetime.now(pytz.UTC)
+    key = (lat, lon, tzname, local_today(tzname, now_utc))
+    cached = _dawns.get(key)
+    if cached is not None and (cached[0] is None or cached[0] > now_utc):
+        CACHE_REQUESTS.labels('dawn', 'hit').inc()
+        return cached[0]
+    CACHE_REQUESTS.labels('dawn', 'miss').inc()
+    try:
+        dawn, _ = find_first_dawn_after(now_utc, lat, lon, tzname)
+    except Exception:
+        # not memoized: a transient failure should not pin the fallback
+        return None
+    if dawn is not None and dawn > now_utc:
+        _dawns[key] = (dawn, dawn.timestamp())
+    else:
+        dawn = None
+        _dawns[key] = (None, now_utc.timestamp() + FALLBACK_MAX_AGE)
+    return dawn
+
+
+def seconds_until_next_dawn(lat: float, lon: float, tzname: str, now_utc: Optional[datetime] = None) -> Optional[int]:
+    """Seconds from now to the next local dawn (any fallback tag), or None if none is found."""
+    now_utc = now_utc or datetime.now(pytz.UTC)
+    dawn = next_dawn(lat, lon, tzname, now_utc)
+    if dawn is None:
+        return None
+    return max(0, math.ceil((dawn - now_utc).total_seconds()))
+
+
+def known_timezone(tzname: Optional[str]) -> bool:
+    """Whether pytz knows `tzname` (policies return None otherwise and let the view answer)."""
+    try:
+        pytz.timezone(tzname)
+    except Exception:
+        return False
+    return True
+
+
+def mark_degraded() -> None:
+    """Send the current response with no-store and forget its ETag (see the module docstring)."""
+    from flask import g, has_request_context
+    if has_request_context():
+        g._http_cache_degraded = True
+
+
+def local_today(tzname: str, now_utc: Optional[datetime] = None):
+    now_utc = now_utc or datetime.now(pytz.UTC)
+    return now_utc.astimezone(pytz.timezone(tzname)).date()
+
+
+def current_period_policy(key: Hashable, lat: float, lon: float, tzname: str,
+                          expires_at: Optional[datetime] = None) -> CachePolicy:
+    """Policy for data that can change at the next local dawn (or at expires_at, if earlier).
+
+    The dawn is only looked up when a full response needs the max-age.
+    """
+    def max_age():
+        now_utc = datetime.now(pytz.UTC)
+        seconds = seconds_until_next_dawn(lat, lon, tzname, now_utc)
+        if expires_at is not None:
+            until = max(0, math.ceil((expires_at - now_utc).total_seconds()))
+            seconds = until if seconds is None else min(seconds, until)
+        return seconds
+
+    return CachePolicy(key, max_age)
+
+
+def _not_modified(etag: str, policy: CachePolicy, expires_at: float):
+    from flask import current_app
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    # what is left of the max-age the remembered response was sent with
+    remaining = max(0, math.ceil(expires_at - time.monotonic()))
+    response.headers['Cache-Control'] = policy.cache_control(remaining)
+    return response
+
+
+def http_cached(policy_fn: Callable[[], Optional[CachePolicy]]):
+    """Decorator adding ETag/Cache-Control and cheap 304s to a JSON view."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import g, make_response, request
+
+            try:
+                policy = policy_fn()
+            except Exception:
+                policy = None
+            if policy is None:
+                return view(*args, **kwargs)
+
+            remembered = _etags.get(policy.key)
+            if remembered is not None and request.if_none_match.contains_weak(remembered[0]):
+                CACHE_REQUESTS.labels('etag', 'hit').inc()
+                return _not_modified(remembered[0], policy, remembered[1])
+            CACHE_REQUESTS.labels('etag', 'miss').inc()
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            if g.pop('_http_cache_degraded', False):
+                CACHE_REQUESTS.labels('etag', 'degraded').inc()
+                response.headers['Cache-Control'] = 'no-store'
+                return response
+            try:
+                max_age = policy.max_age
+            except Exception:
+                # e.g. the dawn could not be solved: send the answer uncached rather than fail it
+                return response
+            etag = hashlib.sha1(response.get_data()).hexdigest()
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = policy.cache_control()
+            _etags[policy.key] = (etag, time.monotonic() + max_age)
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
@@ -0,0 +1,211 @@
+"""
+In-process background job runner.
+
+Long-running work (e.g. heatmap rendering) is queued here instead of being
+spawned as a child process. A small, bounded pool of daemon worker threads
+pulls jobs off a priority queue; identical jobs (same key) are deduplicated
+while queued or running, and each job exposes progress and can be cancelled.
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+_ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when its job has been cancelled."""
+
+
+class JobQueueFull(Exception):
+    """Raised by JobRunner.submit when the queue is at capacity."""
+
+
+class Job:
+    def __init__(self, key: str, fn: Callable[["Job"], Any], priority: int = 10, label: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.fn = fn
+        self.priority = priority
+        self.label = label or key
+        self.status = QUEUED
+        self.done = 0
+        self.total = 0
+        self.message: Optional[str] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+
+    # called from within the job function
+    def report(self, done: int, total: int, message: Optional[str] = None) -> None:
+        """Record progress and raise JobCancelled if cancellation was requested."""
+        self.done = done
+        self.total = total
+        if message is not None:
+            self.message = message
+        self.check_cancelled()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def progress(self) -> float:
+        if self.status == DONE:
+            return 1.0
+        return (self.done / self.total) if self.total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'key': self.key,
+            'label': self.label,
+            'status': self.status,
+            'priority': self.priority,
+            'progress': round(self.progress, 4),
+            'done': self.done,
+            'total': self.total,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobRunner:
+    """Bounded worker pool with a priority queue (lower priority runs first)."""
+
+    def __init__(self, max_workers: int = 1, max_queued: int = 2000, history: int = 500, name: str = 'jobs'):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queued = max_queued
+        self.history = history
+        self.name = name
+        self._cond = threading.Condition()
+        self._heap: List[Any] = []
+        self._seq = itertools.count()
+        self._jobs: Dict[str, Job] = {}
+        self._active_by_key: Dict[str, Job] = {}
+        self._finished: List[str] = []
+        self._workers: List[threading.Thread] = []
+
+    def _ensure_workers(self) -> None:
+        # workers are started lazily so importing the app does not spawn threads
+        self._workers = [t for t in self._workers if t.is_alive()]
+        while len(self._workers) < self.max_workers:
+            t = threading.Thread(target=self._work, name=f'{self.name}-worker-{len(self._workers)}', daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def submit(self, key: str, fn: Callable[[Job], Any], priority: int = 10, label: Optional[str] = None):
+        """Queue fn(job) under key. Returns (job, created).
+
+        If a job with the same key is already queued or running, that job is
+        returned instead (created=False). A queued duplicate submitted with a
+        more urgent priority is promoted.
+        """
+        with self._cond:
+            existing = self._active_by_key.get(key)
+            if existing is not None:
+                if existing.status == QUEUED and priority < existing.priority:
+                    existing.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._seq), existing))
+                    self._cond.notify()
+                return existing, False
+            queued = sum(1 for j in self._active_by_key.values() if j.status == QUEUED)
+            if queued >= self.max_queued:
+                raise JobQueueFull(f'{self.name}: {queued} jobs already queued')
+            job = Job(key, fn, priority=priority, label=label)
+            self._jobs[job.id] = job
+            self._active_by_key[key] = job
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self._ensure_workers()
+            self._cond.notify()
+            return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def find(self, key: str) -> Optional[Job]:
+        with self._cond:
+            return self._active_by_key.get(key)
+
+    def jobs(self) -> List[Job]:
+        with self._cond:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a job. Queued jobs never start; running jobs stop at their next report()."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in _ACTIVE_STATES:
+                return job
+            job._cancel.set()
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED)
+            return job
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        # caller holds self._cond
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        if self._active_by_key.get(job.key) is job:
+            del self._active_by_key[job.key]
+        self._finished.append(job.id)
+        while len(self._finished) > self.history:
+            self._jobs.pop(self._finished.pop(0), None)
+
+    def _next_job(self) -> Job:
+        with self._cond:
+            while True:
+                while not self._heap:
+                    self._cond.wait()
+                priority, _, job = heapq.heappop(self._heap)
+                # skip stale heap entries (cancelled, or re-pushed after promotion)
+                if job.status != QUEUED or priority != job.priority:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+                return job
+
+    def _work(self) -> None:
+        while True:
+            job = self._next_job()
+            try:
+                job.check_cancelled()
+                result = job.fn(job)
+            except JobCancelled:
+                with self._cond:
+                    self._finish(job, CANCELLED)
+                logging.info("Job %s (%s) cancelled", job.id, job.label)
+            except Exception as e:
+                with self._cond:
+                    self._finish(job, FAILED, error=str(e))
+                logging.exception("Job %s (%s) failed", job.id, job.label)
+            else:
+                with self._cond:
+                    job.result = result
+                    self._finish(job, DONE)
+                logging.info("Job %s (%s) done", job.id, job.label)
@@ -0,0 +1,569 @@
+"""
+Inverted index over KJV verse text, with Strong's frequencies per query.
+
+/api/kjv-data used to run an unanchored case-insensitive `$regex` over every
+verse and count `strongsNumbers` over the first `limit` matches only. This
+module answers the same queries from an index instead:
+
+  - verse text is folded like Strong's text (backend/strongs_index.fold:
+    case- and diacritic-insensitive) and split into words (runs of letters
+    and digits, so "Egypt's" is the two words egypt, s);
+  - every word has a posting list: the sorted ids (0-based position in the
+    corpus) of the verses it occurs in and, per verse, its word positions;
+  - a query is a phrase: its words must occur consecutively, and the last
+    word also matches as a prefix unless prefix=False (so "egypt" finds
+    Egypt, Egyptian and Egypt's, as the regex did, and "the lord" finds
+    "the LORD" but not "the word of the LORD");
+  - the result is the exact number of matching verses, one page of them and
+    the Strong's frequencies over *all* of them: each number counted once
+    per occurrence in a verse's strongsNumbers, most frequent first, ties by
+    number.
+
+KjvIndex holds the verses and the index in process (built once from
+backend/data/verses.json by get_index()). When a query matches most of the
+corpus, its frequencies are the corpus totals minus the counts of the
+verses it does not match. Frequency tables are kept per query in a small
+LRU cache, so repeated queries and pages cost a lookup.
+
+The same index can be precomputed into MongoDB (build_mongo_index):
+
+  <verses>_terms   {_id: word, n, v: [verse ids], o: [offsets], p: [positions]}
+  <verses>_search  the verse documents with _id = verse id
+  <verses>_freq    {_id: word, n, f: [[strongs, count], ...]} for every word
+                   found in at least FREQ_TABLE_MIN_VERSES verses
+
+mongo_search() reads the posting lists of the query's words (one indexed
+range read for the prefix), fetches only the requested page, and takes the
+frequencies from <verses>_freq when the query is a single word. Otherwise
+MongoDB counts them with a $match/$unwind/$group/$sort aggregation
+(frequency_pipeline) while the page is fetched; queries that match most of
+the corpus subtract the unmatched verses from the totals in
+
+  <verses>_strongs {_id: Strong's number, verses, occurrences}
+
+which build_strongs_counts() materializes with one server-side aggregation
+(also run by update_mongodb_strongs.py). Before the side collections exist,
+regex_search() keeps the old substring match but counts on the server too.
+
+    python -m backend.kjv_index build-mongo      # (re)build the side collections
+    python -m backend.kjv_index count-strongs    # only <verses>_strongs
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import threading
+
+from cachetools import LRUCache, TTLCache
+
+from backend.field_selection import mongo_projection, select_all
+from backend.strongs_index import fold
+from backend.timing import span
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'data', 'verses.json')
+# words in at least this many verses get a precomputed frequency table in MongoDB
+FREQ_TABLE_MIN_VERSES = 500
+
+_WORD_RE = re.compile(r'\w+')
+
+# verse fields ?fields= may select (backend/field_selection.py), and those of ?view=summary
+FIELDS = ('book', 'chapter', 'verse', 'text', 'strongsNumbers')
+SUMMARY_FIELDS = ('book', 'chapter', 'verse', 'text')
+
+Frequencies = List[Tuple[str, int]]
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Folded words of a verse or query."""
+    return _WORD_RE.findall(fold(text)) if text else []
+
+
+def _prefix_end(prefix: str) -> str:
+    """Smallest string greater than every string starting with `prefix`."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def ranked(counts: Dict[str, int]) -> Frequencies:
+    """(number, count) pairs, most frequent first, ties by number."""
+    return sorted(((number, n) for number, n in counts.items() if n > 0), key=lambda item: (-item[1], item[0]))
+
+
+def count_strongs(strongs_lists: Iterable[Sequence[str]]) -> Frequencies:
+    """Ranked (number, count) pairs over verses' strongsNumbers."""
+    return ranked(Counter(chain.from_iterable(strongs_lists)))
+
+
+class Postings:
+    """Sorted verse ids of one word (or of several, merged) with the word positions in each."""
+
+    __slots__ = ('ids', '_offsets', '_positions')
+
+    def __init__(self, ids: Sequence[int], offsets: Sequence[int], positions: Sequence[int]):
+        """Positions in verse ids[i] are positions[offsets[i]:offsets[i + 1]]."""
+        self.ids = ids
+        self._offsets = offsets
+        self._positions = positions
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def positions(self, verse: int) -> Sequence[int]:
+        i = bisect_left(self.ids, verse)
+        if i < len(self.ids) and self.ids[i] == verse:
+            return self._positions[self._offsets[i]:self._offsets[i + 1]]
+        return ()
+
+    @classmethod
+    def merge(cls, postings: Sequence['Postings']) -> 'Postings':
+        """Union of several words' postings (the expansions of a prefix)."""
+        if len(postings) == 1:
+            return postings[0]
+        by_verse: Dict[int, List[int]] = defaultdict(list)
+        for p in postings:
+            for i, verse in enumerate(p.ids):
+                by_verse[verse].extend(p._positions[p._offsets[i]:p._offsets[i + 1]])
+        ids, offsets, positions = [], [0], []
+        for verse in sorted(by_verse):
+            ids.append(verse)
+            positions.extend(sorted(by_verse[verse]))
+            offsets.append(len(positions))
+        return cls(ids, offsets, positions)
+
+
+_EMPTY = Postings((), (0,), ())
+
+
+def union_ids(postings: Sequence[Postings]) -> List[int]:
+    """Sorted ids of the verses in any of `postings` (a one-word query needs no positions)."""
+    if len(postings) == 1:
+        return list(postings[0].ids)
+    return sorted(set(chain.from_iterable(p.ids for p in postings)))
+
+
+def match_phrase(postings: Sequence[Postings]) -> List[int]:
+    """Sorted ids of the verses where the words of `postings` occur consecutively, in order."""
+    if not postings or any(len(p) == 0 for p in postings):
+        return []
+    if len(postings) == 1:
+        return list(postings[0].ids)
+    by_size = sorted(postings, key=len)
+    candidates = set(by_size[0].ids)
+    for p in by_size[1:]:
+        candidates.intersection_update(p.ids)
+        if not candidates:
+            return []
+    found = []
+    for verse in sorted(candidates):
+        starts = set(postings[0].positions(verse))
+        for offset, p in enumerate(postings[1:], 1):
+            starts.intersection_update(q - offset for q in p.positions(verse))
+            if not starts:
+                break
+        if starts:
+            found.append(verse)
+    return found
+
+
+class KjvIndex:
+    """Resident verses with a positional inverted index and cached Strong's frequencies."""
+
+    def __init__(self, verses: Iterable[dict], cache_size: int = 64):
+        self._verses: List[dict] = []
+        self._strongs: List[Tuple[str, ...]] = []
+        postings: Dict[str, Tuple[List[int], List[int], List[int]]] = {}
+        for verse_id, verse in enumerate(verses):
+            verse = {k: v for k, v in verse.items() if k != '_id'}
+            self._verses.append(verse)
+            self._strongs.append(tuple(sys.intern(str(s)) for s in verse.get('strongsNumbers') or ()))
+            local: Dict[str, List[int]] = defaultdict(list)
+            for position, word in enumerate(tokenize(verse.get('text'))):
+                local[word].append(position)
+            for word, positions in local.items():
+                entry = postings.get(word)
+                if entry is None:
+                    entry = postings[word] = ([], [0], [])
+                entry[0].append(verse_id)
+                entry[2].extend(positions)
+                entry[1].append(len(entry[2]))
+        # typed arrays: 4 bytes per verse id/offset and 2 per position instead of int objects
+        self._postings: Dict[str, Postings] = {
+            word: Postings(array('I', ids), array('I', offsets), array('H', positions))
+            for word, (ids, offsets, positions) in postings.items()}
+        self._words = sorted(self._postings)
+        self._totals = Counter(chain.from_iterable(self._strongs))
+        self._cache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_json(cls, path: str = DEFAULT_PATH) -> 'KjvIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self._verses)
+
+    def verse(self, verse_id: int) -> dict:
+        return self._verses[verse_id]
+
+    def strongs(self, verse_id: int) -> Tuple[str, ...]:
+        return self._strongs[verse_id]
+
+    def words(self) -> List[str]:
+        return self._words
+
+    def postings(self, word: str) -> Postings:
+        return self._postings.get(word, _EMPTY)
+
+    def expand(self, prefix: str) -> List[str]:
+        """Indexed words starting with `prefix`, in order."""
+        start = bisect_left(self._words, prefix)
+        return self._words[start:bisect_left(self._words, _prefix_end(prefix), start)]
+
+    def frequencies(self, ids: Sequence[int]) -> Frequencies:
+        """Ranked Strong's counts over the verses `ids` (sorted, distinct)."""
+        if len(ids) * 2 <= len(self._strongs):
+            return count_strongs(self._strongs[v] for v in ids)
+        matched = set(ids)
+        counts = self._totals.copy()
+        counts.subtract(chain.from_iterable(s for v, s in enumerate(self._strongs) if v not in matched))
+        return ranked(counts)
+
+    def _match(self, words: Tuple[str, ...], prefix: bool,
+               frequencies: bool = True) -> Tuple[List[int], Optional[Frequencies]]:
+        key = (words, prefix)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            ids, counted = cached
+            if counted is None and frequencies:
+                counted = self.frequencies(ids)
+                with self._lock:
+                    self._cache[key] = (ids, counted)
+            return ids, counted
+        last = [self.postings(w) for w in (self.expand(words[-1]) if prefix else words[-1:])]
+        if len(words) == 1:
+            ids = union_ids(last)
+        else:
+            postings = [self.postings(w) for w in words[:-1]]
+            postings.append(Postings.merge(last) if last else _EMPTY)
+            ids = match_phrase(postings)
+        counted = self.frequencies(ids) if frequencies else None
+        if self._cache.maxsize:
+            with self._lock:
+                self._cache[key] = (ids, counted)
+        return ids, counted
+
+    def search(self, query: str, offset: int = 0, limit: int = 100, prefix: bool = True,
+               fields: Optional[Sequence[str]] = None, frequencies: bool = True) -> dict:
+        """{'verses': one page, 'strongsFrequency': over all matches, 'totalVerses': exact count}.
+
+        `fields` limits the verses to those fields; without `frequencies`
+        the Strong's counts are neither computed nor returned.
+        """
+        words = tuple(tokenize(query))
+        if not words:
+            result = {'verses': select_all(self._verses[offset:offset + limit], fields), 'strongsFrequency': [],
+                      'totalVerses': len(self._verses)}
+        else:
+            with span('kjv-search'):
+                ids, counted = self._match(words, prefix, frequencies)
+            result = {'verses': select_all((self._verses[v] for v in ids[offset:offset + limit]), fields),
+                      'strongsFrequency': counted, 'totalVerses': len(ids)}
+        if not frequencies:
+            del result['strongsFrequency']
+        return result
+
+
+_index: Optional[KjvIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index(path: Optional[str] = None) -> Optional[KjvIndex]:
+    """The process-wide index of backend/data/verses.json, built on first use; None without the file."""
+    global _index
+    index = _index
+    if index is None:
+        path = path or DEFAULT_PATH
+        if not os.path.exists(path):
+            return None
+        with _index_lock:
+            if _index is None:
+                with span('kjv-index'):
+                    _index = KjvIndex.from_json(path)
+                logging.info(f"Indexed {len(_index)} KJV verses ({len(_index.words())} words)")
+            index = _index
+    return index
+
+
+def reset_index() -> None:
+    global _index
+    with _index_lock:
+        _index = None
+
+
+# -------------------------------
+# MongoDB side collections
+# -------------------------------
+def side_collection_names(source: str) -> Tuple[str, str, str]:
+    """(terms, search, freq) collection names for a verses collection."""
+    return f'{source}_terms', f'{source}_search', f'{source}_freq'
+
+
+def build_mongo_index(db, source: str, batch_size: int = 1000,
+                      min_verses: int = FREQ_TABLE_MIN_VERSES) -> Tuple[int, int, int]:
+    """Rebuild the side collections of `source`; returns (words, verses, frequency tables).
+
+    Collections are written under temporary names and renamed over the old
+    ones, so searches keep working while the index is rebuilt.
+    """
+    from pymongo import InsertOne
+
+    terms_name, search_name, freq_name = side_collection_names(source)
+    index = KjvIndex(db[source].find({}).sort('_id', 1))
+
+    def write(name, documents):
+        db.drop_collection(f'{name}_tmp')
+        # create it up front so the rename works even when nothing is inserted
+        tmp = db.create_collection(f'{name}_tmp')
+        batch = []
+        for document in documents:
+            batch.append(InsertOne(document))
+            if len(batch) >= batch_size:
+                tmp.bulk_write(batch, ordered=False)
+                batch = []
+        if batch:
+            tmp.bulk_write(batch, ordered=False)
+        tmp.rename(name, dropTarget=True)
+
+    def terms():
+        for word in index.words():
+            p = index.postings(word)
+            yield {'_id': word, 'n': len(p), 'v': list(p.ids), 'o': list(p._offsets), 'p': list(p._positions)}
+
+    tables = [0]
+
+    def frequency_tables():
+        for word in index.words():
+            p = index.postings(word)
+            if len(p) >= min_verses:
+                tables[0] += 1
+                yield {'_id': word, 'n': len(p),
+                       'f': [list(pair) for pair in count_strongs(index.strongs(v) for v in p.ids)]}
+
+    write(terms_name, terms())
+    write(search_name, (dict(index.verse(v), _id=v) for v in range(len(index))))
+    write(freq_name, frequency_tables())
+    build_strongs_counts(db, source)
+    return len(index.words()), len(index), tables[0]
+
+
+_available_cache = TTLCache(maxsize=8, ttl=300)
+
+
+def mongo_index_available(db, source: str) -> bool:
+    """Whether the side collections of `source` exist (checked at most every five minutes)."""
+    available = _available_cache.get(source)
+    if available is None:
+        names = side_collection_names(source)
+        try:
+            found = set(db.list_collection_names(filter={'name': {'$in': list(names)}}))
+        except Exception:
+            return False
+        available = _available_cache[source] = set(names) <= found
+    return available
+
+
+def _mongo_postings(doc: Optional[dict]) -> Postings:
+    return Postings(doc['v'], doc['o'], doc['p']) if doc else _EMPTY
+
+
+def mongo_search(db, source: str, query: str, offset: int = 0, limit: int = 100, prefix: bool = True,
+                 fields: Optional[Sequence[str]] = None, frequencies: bool = True) -> dict:
+    """Same result as KjvIndex.search(), from the precomputed side collections."""
+    terms_name, search_name, freq_name = side_collection_names(source)
+    words = tokenize(query)
+    if not words:
+        verses = list(db[search_name].find({}, mongo_projection(fields)).sort('_id', 1).skip(offset).limit(limit))
+        result = {'verses': verses, 'strongsFrequency': [], 'totalVerses': db[search_name].estimated_document_count()}
+        if not frequencies:
+            del result['strongsFrequency']
+        return result
+
+    with span('kjv-search'):
+        last = words[-1]
+        criteria = {'$gte': last, '$lt': _prefix_end(last)} if prefix else last
+        if len(words) == 1:
+            # positions only matter for phrases
+            expansions = list(db[terms_name].find({'_id': criteria}, {'v': 1}))
+            ids = union_ids([Postings(d['v'], (), ()) for d in expansions])
+        else:
+            docs = {doc['_id']: doc for doc in db[terms_name].find({'_id': {'$in': list(set(words[:-1]))}})}
+            postings = [_mongo_postings(docs.get(w)) for w in words[:-1]]
+            expansions = list(db[terms_name].find({'_id': criteria}))
+            postings.append(Postings.merge([_mongo_postings(d) for d in expansions]) if expansions else _EMPTY)
+            ids = match_phrase(postings)
+
+        page_ids = ids[offset:offset + limit]
+        projection = mongo_projection(fields, keep_id=True)
+        page = _submit(lambda: {doc.pop('_id'): doc
+                                for doc in db[search_name].find({'_id': {'$in': page_ids}}, projection)}
+                       if page_ids else {})
+        result = {'totalVerses': len(ids)}
+        if frequencies:
+            table = len(words) == 1 and len(expansions) == 1 and db[freq_name].find_one({'_id': expansions[0]['_id']})
+            if table:
+                result['strongsFrequency'] = [tuple(pair) for pair in table['f']]
+            else:
+                result['strongsFrequency'] = _mongo_frequencies(db, source, ids)
+        by_id = page.result()
+    return {'verses': [by_id[v] for v in page_ids if v in by_id], **result}
+
+
+def _mongo_frequencies(db, source: str, ids: List[int]) -> Frequencies:
+    """Ranked Strong's counts over the side-collection verses `ids`, counted by MongoDB."""
+    if not ids:
+        return []
+    search = db[side_collection_names(source)[1]]
+    size = search.estimated_document_count()
+    if len(ids) * 2 > size:
+        # mostly the whole corpus: subtract the verses it does not match from the totals
+        totals = strongs_totals(db, source)
+        if totals:
+            matched = set(ids)
+            rest = [v for v in range(size) if v not in matched]
+            counts = dict(totals)
+            for number, n in aggregate_frequencies(search, {'_id': {'$in': rest}}) if rest else ():
+                counts[number] = counts.get(number, 0) - n
+            return ranked(counts)
+    return aggregate_frequencies(search, {'_id': {'$in': ids}})
+
+
+# -------------------------------
+# Strong's frequencies in MongoDB
+# -------------------------------
+# the page, count and frequency queries of one request run side by side
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='kjv-query')
+
+
+def _submit(fn, *args):
+    """Run fn(*args) on the query pool, inside the caller's timing context."""
+    return _pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def frequency_pipeline(match: dict) -> List[dict]:
+    """$match -> $unwind -> $group -> $sort: ranked Strong's counts over the matching verses."""
+    return [{'$match': match},
+            {'$project': {'_id': 0, 'strongsNumbers': 1}},
+            {'$unwind': '$strongsNumbers'},
+            {'$group': {'_id': '$strongsNumbers', 'n': {'$sum': 1}}},
+            {'$sort': {'n': -1, '_id': 1}}]
+
+
+def aggregate_frequencies(collection, match: dict) -> Frequencies:
+    with span('kjv-frequencies'):
+        return [(doc['_id'], doc['n'])
+                for doc in collection.aggregate(frequency_pipeline(match), allowDiskUse=True)]
+
+
+def regex_search(db, source: str, query: str, offset: int = 0, limit: int = 100,
+                 fields: Optional[Sequence[str]] = None, frequencies: bool = True) -> dict:
+    """/api/kjv-data without the side collections: a case-insensitive substring match on `text`.
+
+    The page, the exact count and the frequency aggregation are three
+    concurrent queries; no verse is sent back just to be counted.
+    """
+    collection = db[source]
+    projection = mongo_projection(fields)
+    if not query:
+        verses = list(collection.find({}, projection).skip(offset).limit(limit))
+        result = {'verses': verses, 'strongsFrequency': [], 'totalVerses': collection.estimated_document_count()}
+        if not frequencies:
+            del result['strongsFrequency']
+        return result
+    match = {'text': {'$regex': re.escape(query), '$options': 'i'}}
+    with span('kjv-search'):
+        page = _submit(lambda: list(collection.find(match, projection).skip(offset).limit(limit)))
+        total = _submit(collection.count_documents, match)
+        result = {'verses': None}
+        if frequencies:
+            result['strongsFrequency'] = aggregate_frequencies(collection, match)
+        result['verses'] = page.result()
+        result['totalVerses'] = total.result()
+        return result
+
+
+def counts_collection_name(source: str) -> str:
+    return f'{source}_strongs'
+
+
+def build_strongs_counts(db, source: str) -> int:
+    """Rewrite `<source>_strongs` ({_id: Strong's number, verses, occurrences}) on the server.
+
+    Returns the number of Strong's numbers counted. $out replaces the old
+    collection in one step and keeps its indexes.
+    """
+    name = counts_collection_name(source)
+    db[source].aggregate([
+        {'$project': {'strongsNumbers': 1}},
+        {'$unwind': '$strongsNumbers'},
+        {'$group': {'_id': {'verse': '$_id', 'number': '$strongsNumbers'}, 'n': {'$sum': 1}}},
+        {'$group': {'_id': '$_id.number', 'verses': {'$sum': 1}, 'occurrences': {'$sum': '$n'}}},
+        {'$out': name},
+    ], allowDiskUse=True)
+    db[name].create_index([('occurrences', -1), ('_id', 1)])
+    _totals_cache.pop(source, None)
+    return db[name].estimated_document_count()
+
+
+_totals_cache = TTLCache(maxsize=8, ttl=300)
+
+
+def strongs_totals(db, source: str) -> Optional[Dict[str, int]]:
+    """Occurrences of every Strong's number in `source`, from `<source>_strongs`; None if it is missing."""
+    totals = _totals_cache.get(source)
+    if totals is None:
+        try:
+            totals = {doc['_id']: doc['occurrences']
+                      for doc in db[counts_collection_name(source)].find({}, {'occurrences': 1})}
+        except Exception as e:
+            logging.warning(f"KJV index: could not read {counts_collection_name(source)}: {e}")
+            return None
+        if not totals:
+            return None
+        _totals_cache[source] = totals
+    return totals
+
+
+if __name__ == '__main__':
+    import argparse
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description='KJV verse index')
+    parser.add_argument('command', choices=['build-mongo', 'count-strongs'])
+    parser.add_argument('--min-verses', type=int, default=FREQ_TABLE_MIN_VERSES,
+                        help='precompute frequency tables for words in at least this many verses')
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+    from config import MONGODB_URI, DATABASE_NAME, KJV_COLLECTION
+    if not MONGODB_URI:
+        sys.exit('MONGODB_URI is not configured')
+    client = MongoClient(MONGODB_URI)
+    if args.command == 'count-strongs':
+        counted = build_strongs_counts(client[DATABASE_NAME], KJV_COLLECTION)
+        print(f"✅ Counted {counted} Strong's numbers of '{KJV_COLLECTION}' into {counts_collection_name(KJV_COLLECTION)}")
+        sys.exit(0)
+    word_count, verse_count, table_count = build_mongo_index(client[DATABASE_NAME], KJV_COLLECTION,
+                                                             min_verses=args.min_verses)
+    print(f"✅ Indexed {verse_count} verses of '{KJV_COLLECTION}' ({word_count} words, "
+          f"{table_count} frequency tables) into {', '.join(side_collection_names(KJV_COLLECTION))}, "
+          f"{counts_collection_name(KJV_COLLECTION)}")
@@ -0,0 +1,304 @@
+"""
+Prometheus-style metrics for the Flask app, served at /metrics.
+
+A small in-process registry (Counter, Gauge, Histogram with labels) that
+renders the Prometheus text exposition format. The method names follow
+prometheus_client (labels/inc/dec/set/observe/time) but nothing beyond the
+standard library is needed, which keeps the Vercel bundle small.
+
+Values are per process: behind several gunicorn workers each worker
+exposes its own series, so scrape the workers individually or aggregate
+with sum() in queries.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import threading
+import time
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry: List['_Metric'] = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(v: float) -> str:
+    if math.isinf(v):
+        return '+Inf' if v > 0 else '-Inf'
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+class _Timer:
+    def __init__(self, observe):
+        self._observe = observe
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._observe(time.perf_counter() - self._start)
+        return False
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), register: bool = True):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if register:
+            with _registry_lock:
+                _registry.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[n] for n in self.labelnames)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(v) for v in values)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+        return child
+
+    def _unlabelled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; call labels() first")
+        return self.labels()
+
+    def _samples(self):
+        """(suffix, label values, extra label or None, value) for every child."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {_escape(self.documentation)}', f'# TYPE {self.name} {self.kind}']
+        for suffix, values, extra, value in self._samples():
+            lines.append(f'{self.name}{suffix}{_label_text(self.labelnames, values, extra)} {_format_value(value)}')
+        return lines
+
+
+class _Value:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = float(value)
+
+
+class Counter(_Metric):
+    """Monotonic count; name should end in _total."""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._children.items())
+        return [('', key, None, child.value) for key, child in items]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down."""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._unlabelled().dec(amount)
+
+    def set(self, value: float) -> None:
+        self._unlabelled().set(value)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._children.items())
+        return [('', key, None, child.value) for key, child in items]
+
+
+class _HistogramValue:
+    __slots__ = ('_lock', '_bounds', 'counts', 'sum')
+
+    def __init__(self, bounds):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        bounds = self._bounds
+        while i < len(bounds) and value > bounds[i]:
+            i += 1
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        return _Timer(self.observe)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket distribution of observed values (seconds by convention)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, register=True):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames, register)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    def time(self) -> _Timer:
+        return self._unlabelled().time()
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._children.items())
+        out = []
+        for key, child in items:
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            running = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                running += n
+                out.append(('_bucket', key, ('le', _format_value(bound)), running))
+            out.append(('_sum', key, None, total))
+            out.append(('_count', key, None, running))
+        return out
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text format."""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# -------------------------------
+# Metrics used across the app
+# -------------------------------
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests by route, method and status.', ('method', 'route', 'status'))
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route.', ('method', 'route'))
+HTTP_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requests currently being served.')
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Cache lookups by cache and result (hit/miss).', ('cache', 'result'))
+DAWN_SOLVES = Counter(
+    'dawn_solves_total', 'Dawn/dusk solves by event and fallback tag.', ('event', 'tag'))
+ASTRO_CLIENT_SECONDS = Histogram(
+    'astro_client_request_duration_seconds', 'astro-service request latency by endpoint.', ('endpoint',))
+ASTRO_CLIENT_ERRORS = Counter(
+    'astro_client_errors_total', 'Failed astro-service requests by endpoint.', ('endpoint',))
+MONGO_COMMAND_SECONDS = Histogram(
+    'mongo_command_duration_seconds', 'MongoDB command latency by command name.', ('command',),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0))
+MONGO_COMMAND_ERRORS = Counter(
+    'mongo_command_errors_total', 'Failed MongoDB commands by command name.', ('command',))
+
+
+try:
+    from pymongo import monitoring as _mongo_monitoring
+
+    class MongoCommandMetrics(_mongo_monitoring.CommandListener):
+        """Feeds MongoDB command latency and failures into the metrics above."""
+
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            MONGO_COMMAND_SECONDS.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+        def failed(self, event):
+            MONGO_COMMAND_SECONDS.labels(event.command_name).observe(event.duration_micros / 1e6)
+            MONGO_COMMAND_ERRORS.labels(event.command_name).inc()
+except ImportError:  # pragma: no cover
+    MongoCommandMetrics = None
+
+
+def init_app(app, path: str = '/metrics', token: Optional[str] = None) -> None:
+    """Record request metrics for a Flask app and serve them at `path`.
+
+    token: when set, /metrics requires `Authorization: Bearer <token>`.
+    """
+    from flask import Response, g, request
+
+    @app.before_request
+    def _metrics_begin():
+        HTTP_IN_FLIGHT.inc()
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _metrics_observe(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            # the URL rule (e.g. /api/generate-heatmaps/<job_id>) keeps label cardinality bounded
+            route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+            HTTP_REQUEST_SECONDS.labels(request.method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(request.method, route, response.status_code).inc()
+        return response
+
+    @app.teardown_request
+    def _metrics_end(exc):
+        HTTP_IN_FLIGHT.dec()
+
+    def metrics():
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('unauthorized\n', status=401, mimetype='text/plain')
+        return Response(render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule(path, 'metrics', metrics)
@@ -0,0 +1,284 @@
+"""
+MongoDB indexes the routes rely on, and a check that they are used.
+
+INDEXES declares every index by collection role:
+
+  strongs      unique strongsNumber; language + strongsNumber (language
+               lists and filtered lookups); word, transliteration and
+               definitions (the $or of regexes /api/strongs-data falls back
+               to without the trigram index; every branch needs an index or
+               the whole $or scans the collection)
+  verses       multikey strongsNumbers; text (the regex match of
+               kjv_index.regex_search)
+  etymology, strongs_search, verses_strongs
+               indexes of the side collections built by
+               backend/etymology_index.py, backend/strongs_index.py and
+               backend/kjv_index.py (only ensured once they exist)
+
+ensure_indexes() creates what is missing. An existing index on the same
+keys with other options (e.g. the old non-unique strongsNumber_1) is
+reported as a conflict, or dropped and rebuilt with rebuild=True.
+
+The app calls ensure_once() in the background after connecting: it compares
+a fingerprint of INDEXES (and of which side collections exist) with the one
+stored in `app_meta` and does nothing when they match, so each deployment
+that changes the declarations applies them once. check_query_plans() runs
+explain() on the filters the routes actually send (ROUTE_QUERIES) and fails
+if any winning plan contains a COLLSCAN.
+
+The unanchored, case-insensitive regexes cannot seek: with an index they
+scan its keys instead of the documents, which is smaller but still visits
+every entry. Older deployments may still have the strongs_text and
+verses_text text indexes; no route runs $text, so they can be dropped.
+
+    python -m backend.mongo_indexes ensure [--no-rebuild]
+    python -m backend.mongo_indexes check      # exit status 1 on a COLLSCAN
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import logging
+
+STRONGS, VERSES = 'strongs', 'verses'
+ETYMOLOGY, STRONGS_SEARCH, VERSES_STRONGS = 'etymology', 'strongs_search', 'verses_strongs'
+# side collections are built by separate commands; their indexes wait until they exist
+OPTIONAL = frozenset((ETYMOLOGY, STRONGS_SEARCH, VERSES_STRONGS))
+
+# (collection role, keys, options); every index is named so reports and drops are stable
+INDEXES: Tuple[Tuple[str, List[Tuple[str, object]], dict], ...] = (
+    (STRONGS, [('strongsNumber', 1)], {'name': 'strongsNumber_unique', 'unique': True}),
+    (STRONGS, [('language', 1), ('strongsNumber', 1)], {'name': 'language_strongsNumber'}),
+    (STRONGS, [('word', 1)], {'name': 'word'}),
+    (STRONGS, [('transliteration', 1)], {'name': 'transliteration'}),
+    (STRONGS, [('definitions', 1)], {'name': 'definitions'}),
+    (VERSES, [('strongsNumbers', 1)], {'name': 'strongsNumbers'}),
+    (VERSES, [('text', 1)], {'name': 'text'}),
+    (ETYMOLOGY, [('chain', 1)], {'name': 'chain'}),
+    (STRONGS_SEARCH, [('language', 1)], {'name': 'language'}),
+    (STRONGS_SEARCH, [('t', 1)], {'name': 't'}),
+    (VERSES_STRONGS, [('occurrences', -1), ('_id', 1)], {'name': 'occurrences'}),
+)
+
+
+def _strongs_regex(text: str) -> dict:
+    """The /api/strongs-data ?query=/?search= filter used without the trigram index."""
+    return {'$or': [{field: {'$regex': text, '$options': 'i'}}
+                    for field in ('word', 'transliteration', 'definitions')]}
+
+
+# the filters the routes send, one per distinct shape: (name, collection role, filter)
+ROUTE_QUERIES: Tuple[Tuple[str, str, dict], ...] = (
+    ('strongs-data ?strongs_num=', STRONGS, {'strongsNumber': 430}),
+    ('strongs-data ?language=', STRONGS, {'language': 'heb'}),
+    ('strongs-data ?after=', STRONGS, {'strongsNumber': {'$gt': 430}}),
+    ('hebrew-search / etymology entries', STRONGS, {'strongsNumber': {'$in': [1, 3, 430]}}),
+    ('strongs-data ?search= (regex fallback)', STRONGS, _strongs_regex('father')),
+    ('strongs-data ?search=&language= (regex fallback)', STRONGS, {**_strongs_regex('father'), 'language': 'heb'}),
+    ('kjv verses by Strong\'s number', VERSES, {'strongsNumbers': 'H4714'}),
+    ('kjv-data ?query= (regex search)', VERSES, {'text': {'$regex': 'egypt', '$options': 'i'}}),
+    ('etymology-tree', ETYMOLOGY, {'chain': 1}),
+    ('strongs_search candidates', STRONGS_SEARCH, {'t': {'$regex': 'father'}, '_id': {'$in': [1, 3]}}),
+    ('strongs_search candidates by language', STRONGS_SEARCH,
+     {'t': {'$regex': 'father'}, '_id': {'$in': [1, 3]}, 'language': 'heb'}),
+    # needles shorter than a trigram have no candidate list
+    ('strongs_search short needle', STRONGS_SEARCH, {'t': {'$regex': 'ab'}}),
+)
+
+
+def collection_names(strongs: str, verses: str) -> Dict[str, str]:
+    """Collection role -> collection name for the configured Strong's and verses collections."""
+    from backend.etymology_index import table_name
+    from backend.kjv_index import counts_collection_name
+    from backend.strongs_index import side_collection_names
+    return {
+        STRONGS: strongs,
+        VERSES: verses,
+        ETYMOLOGY: table_name(strongs),
+        STRONGS_SEARCH: side_collection_names(strongs)[1],
+        VERSES_STRONGS: counts_collection_name(verses),
+    }
+
+
+def fingerprint() -> str:
+    """Changes whenever INDEXES does."""
+    return hashlib.sha1(repr(INDEXES).encode('utf-8')).hexdigest()[:16]
+
+
+def _key_of(keys: Iterable[Tuple[str, object]]) -> tuple:
+    """Comparable form of an index key; text indexes compare by their fields."""
+    keys = list(keys)
+    text = sorted(field for field, kind in keys if kind == 'text')
+    if text:
+        return ('text', tuple(text))
+    return tuple((field, int(kind) if isinstance(kind, (int, float)) else kind) for field, kind in keys)
+
+
+def _existing_key(info: dict) -> tuple:
+    if any(field == '_fts' for field, _ in info['key']):
+        return ('text', tuple(sorted(info.get('weights', {}))))
+    return _key_of(info['key'])
+
+
+def _same_options(info: dict, options: dict) -> bool:
+    """Whether an existing index (index_information() entry) has the declared options."""
+    for option in ('unique', 'sparse'):
+        if bool(info.get(option)) != bool(options.get(option)):
+            return False
+    if info.get('partialFilterExpression') != options.get('partialFilterExpression'):
+        return False
+    if _existing_key(info)[0] == 'text':
+        if 'default_language' in options and info.get('default_language') != options['default_language']:
+            return False
+        fields = info.get('weights', {})
+        if fields != {field: options.get('weights', {}).get(field, 1) for field in fields}:
+            return False
+    return True
+
+
+def ensure_indexes(db, strongs: str = 'strongs', verses: str = 'verses',
+                   rebuild: bool = False, dry_run: bool = False) -> List[Tuple[str, str, str]]:
+    """Create missing indexes; returns (collection, index, status) rows.
+
+    status is created, exists, rebuilt, conflict (an index on the same keys
+    with other options, kept because rebuild=False), skipped (optional
+    collection not built yet) or an error message. With dry_run nothing is
+    changed and indexes that would be created are reported as missing.
+    """
+    from pymongo import IndexModel
+
+    names = collection_names(strongs, verses)
+    present = set(db.list_collection_names())
+    report = []
+    for role, keys, options in INDEXES:
+        name = names[role]
+        if role in OPTIONAL and name not in present:
+            report.append((name, options['name'], 'skipped'))
+            continue
+        collection = db[name]
+        try:
+            existing = collection.index_information() if name in present else {}
+            wanted = _key_of(keys)
+            same_key = [index_name for index_name, info in existing.items() if _existing_key(info) == wanted]
+            if any(_same_options(existing[index_name], options) for index_name in same_key):
+                report.append((name, options['name'], 'exists'))
+                continue
+            if wanted[0] == 'text':
+                # one text index per collection: a text index over other fields is in the way too
+                same_key = [index_name for index_name, info in existing.items() if _existing_key(info)[0] == 'text']
+            if same_key and (dry_run or not rebuild):
+                report.append((name, options['name'], f"conflict with {', '.join(same_key)}"))
+                continue
+            if dry_run:
+                report.append((name, options['name'], 'missing'))
+                continue
+            for index_name in same_key:
+                collection.drop_index(index_name)
+            collection.create_indexes([IndexModel(keys, **options)])
+            report.append((name, options['name'], 'rebuilt' if same_key else 'created'))
+        except Exception as e:
+            report.append((name, options['name'], f'error: {e}'))
+    return report
+
+
+def ensure_once(db, strongs: str = 'strongs', verses: str = 'verses') -> Optional[List[Tuple[str, str, str]]]:
+    """ensure_indexes() unless this version of INDEXES was already applied; returns its report or None."""
+    meta = db['app_meta']
+    try:
+        # side collections built since the last run change the version too
+        present = set(db.list_collection_names())
+        built = sorted(role for role, name in collection_names(strongs, verses).items()
+                       if role in OPTIONAL and name in present)
+        version = f"{fingerprint()}:{','.join(built)}"
+        done = meta.find_one({'_id': 'indexes'})
+        if done and done.get('version') == version:
+            return None
+        report = ensure_indexes(db, strongs, verses)
+        if not any(status.startswith(('error', 'conflict')) for _, _, status in report):
+            meta.update_one({'_id': 'indexes'}, {'$set': {'version': version}}, upsert=True)
+        for collection, index, status in report:
+            if status.startswith(('error', 'conflict')):
+                logging.warning(f"MongoDB index {collection}.{index}: {status} "
+                                f"(run python -m backend.mongo_indexes ensure)")
+            elif status not in ('exists', 'skipped'):
+                logging.info(f"MongoDB index {collection}.{index}: {status}")
+        return report
+    except Exception as e:
+        logging.warning(f"MongoDB index check failed: {e}")
+        return None
+
+
+def plan_stages(explain: dict) -> List[str]:
+    """Stage names of the winning plan in an explain() result (sharded and SBE layouts included)."""
+    stages = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if isinstance(node.get('stage'), str):
+                stages.append(node['stage'])
+            for key, value in node.items():
+                if key != 'rejectedPlans':
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(explain.get('queryPlanner', {}).get('winningPlan', {}))
+    return stages
+
+
+def check_query_plans(db, strongs: str = 'strongs', verses: str = 'verses') -> List[dict]:
+    """explain() every ROUTE_QUERIES entry; rows of {route, collection, stages, ok}.
+
+    ok is False for a COLLSCAN or a query MongoDB rejects; queries on side
+    collections that do not exist are skipped.
+    """
+    names = collection_names(strongs, verses)
+    present = set(db.list_collection_names())
+    rows = []
+    for route, role, query in ROUTE_QUERIES:
+        name = names[role]
+        if role in OPTIONAL and name not in present:
+            continue
+        row = {'route': route, 'collection': name}
+        try:
+            row['stages'] = plan_stages(db[name].find(query).explain())
+            row['ok'] = 'COLLSCAN' not in row['stages']
+        except Exception as e:
+            row['stages'] = []
+            row['error'] = str(e)
+            row['ok'] = False
+        rows.append(row)
+    return rows
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description='MongoDB index provisioning')
+    parser.add_argument('command', choices=['ensure', 'check'])
+    parser.add_argument('--no-rebuild', action='store_true',
+                        help='report indexes whose options differ instead of dropping and recreating them')
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+    from config import MONGODB_URI, DATABASE_NAME, STRONG_COLLECTION, KJV_COLLECTION
+    if not MONGODB_URI:
+        sys.exit('MONGODB_URI is not configured')
+    database = MongoClient(MONGODB_URI)[DATABASE_NAME]
+
+    if args.command == 'ensure':
+        failed = False
+        for collection, index, status in ensure_indexes(database, STRONG_COLLECTION, KJV_COLLECTION,
+                                                        rebuild=not args.no_rebuild):
+            failed = failed or status.startswith(('error', 'conflict'))
+            print(f"{'❌' if status.startswith(('error', 'conflict')) else '✅'} {collection}.{index}: {status}")
+        sys.exit(1 if failed else 0)
+
+    rows = check_query_plans(database, STRONG_COLLECTION, KJV_COLLECTION)
+    for row in rows:
+        detail = ' > '.join(row['stages']) or row.get('error', '')
+        print(f"{'✅' if row['ok'] else '❌'} {row['route']} ({row['collection']}): {detail}")
+    sys.exit(0 if all(row['ok'] for row in rows) else 1)
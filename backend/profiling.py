@@ -0,0 +1,289 @@
+"""
+Opt-in request profiling.
+
+A WSGI middleware around the Flask app profiles a request when
+  - it carries ?__profile=1 (or an X-Profile: 1 header) together with the
+    configured token (?__profile_token=... or X-Profile-Token), or
+  - it is picked by 1-in-N sampling (PROFILE_SAMPLE_EVERY).
+
+Profiles are stored in a bounded on-disk ring buffer under an ID generated
+here, so a client cannot pick (and overwrite) a stored profile; the ID is
+returned in an X-Profile-Id response header and the client's X-Request-ID,
+if any, is kept in the metadata. ?__profile=text returns the
+top of the profile as plain text instead of the normal response, which is
+handy with curl.
+
+pyinstrument is used when installed (speedscope JSON, sampling, low
+overhead); otherwise cProfile (.pstats, open with `python -m pstats` or
+snakeviz). Stored profiles are listed at /api/profiles and downloaded from
+/api/profiles/<id>, both behind the same token.
+"""
+
+from typing import List, Optional
+import cProfile
+import hmac
+import io
+import itertools
+import json
+import logging
+import marshal
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs
+
+try:  # optional: sampling profiler with speedscope output
+    from pyinstrument import Profiler as _PyinstrumentProfiler
+    from pyinstrument.renderers import SpeedscopeRenderer as _SpeedscopeRenderer
+except ImportError:  # pragma: no cover
+    _PyinstrumentProfiler = None
+    _SpeedscopeRenderer = None
+
+logger = logging.getLogger('profiling')
+
+_ID_RE = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+
+def _truthy(value: Optional[str]) -> bool:
+    return (value or '').lower() in ('1', 'true', 'yes', 'text')
+
+
+class ProfileStore:
+    """Ring buffer of profiles in one directory: <id>.json metadata + <id>.<ext> data."""
+
+    def __init__(self, directory: str, max_entries: int = 50):
+        self.directory = directory
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+
+    def _meta_path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f'{profile_id}.json')
+
+    def save(self, profile_id: str, data: bytes, ext: str, meta: dict) -> None:
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            meta = dict(meta, id=profile_id, file=f'{profile_id}.{ext}')
+            with open(os.path.join(self.directory, meta['file']), 'wb') as f:
+                f.write(data)
+            with open(self._meta_path(profile_id), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            self._trim()
+
+    def _trim(self) -> None:
+        entries = self._entries()
+        for meta in entries[self.max_entries:]:
+            for name in (f"{meta['id']}.json", meta.get('file')):
+                if name:
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+
+    def _entries(self) -> List[dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        entries.sort(key=lambda m: m.get('created', 0), reverse=True)
+        return entries
+
+    def list(self) -> List[dict]:
+        """Metadata of stored profiles, newest first."""
+        with self._lock:
+            return self._entries()
+
+    def get(self, profile_id: str):
+        """(metadata, path of the profile file) or None."""
+        if not _ID_RE.match(profile_id):
+            return None
+        try:
+            with open(self._meta_path(profile_id), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        path = os.path.join(self.directory, meta['file'])
+        return (meta, path) if os.path.exists(path) else None
+
+
+class _CProfileRun:
+    ext = 'pstats'
+
+    def __init__(self):
+        self._profiler = cProfile.Profile()
+
+    def start(self):
+        self._profiler.enable()
+
+    def stop(self):
+        self._profiler.disable()
+
+    def dump(self) -> bytes:
+        # same bytes pstats.Stats.dump_stats would write, without a temp file
+        self._profiler.create_stats()
+        return marshal.dumps(self._profiler.stats)
+
+    def text(self, limit: int = 40) -> str:
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+
+class _PyinstrumentRun:
+    ext = 'speedscope.json'
+
+    def __init__(self):
+        self._profiler = _PyinstrumentProfiler(async_mode='disabled')
+
+    def start(self):
+        self._profiler.start()
+
+    def stop(self):
+        self._profiler.stop()
+
+    def dump(self) -> bytes:
+        return self._profiler.output(renderer=_SpeedscopeRenderer()).encode('utf-8')
+
+    def text(self, limit: int = 40) -> str:
+        return self._profiler.output_text(unicode=True, color=False)
+
+
+class ProfilingMiddleware:
+    """WSGI middleware deciding per request whether to profile it."""
+
+    def __init__(self, wsgi_app, store: ProfileStore, token: Optional[str] = None, sample_every: int = 0):
+        self.wsgi_app = wsgi_app
+        self.store = store
+        self.token = token
+        self.sample_every = max(0, int(sample_every))
+        self._counter = itertools.count(1)
+        # cProfile (3.12+) and pyinstrument's setstatprofile allow one profiler at a time per process/thread;
+        # requests arriving while one is running are served unprofiled
+        self._busy = threading.Lock()
+
+    def _authorized(self, environ, query) -> bool:
+        if not self.token:
+            return False
+        supplied = (query.get('__profile_token') or [None])[0] or environ.get('HTTP_X_PROFILE_TOKEN') or ''
+        return hmac.compare_digest(supplied.encode('utf-8'), self.token.encode('utf-8'))
+
+    def __call__(self, environ, start_response):
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        flag = (query.get('__profile') or [None])[0] or environ.get('HTTP_X_PROFILE')
+        on_demand = _truthy(flag) and self._authorized(environ, query)
+        sampled = (not on_demand and self.sample_every > 0
+                   and not environ.get('PATH_INFO', '').startswith('/api/profiles')
+                   and next(self._counter) % self.sample_every == 0)
+        if not (on_demand or sampled):
+            return self.wsgi_app(environ, start_response)
+        if not self._busy.acquire(blocking=False):
+            return self.wsgi_app(environ, start_response)
+        try:
+            return self._profiled(environ, start_response, inline_text=on_demand and flag == 'text',
+                                  sampled=sampled)
+        finally:
+            self._busy.release()
+
+    def _profiled(self, environ, start_response, inline_text: bool, sampled: bool):
+        profile_id = uuid.uuid4().hex
+        request_id = environ.get('HTTP_X_REQUEST_ID', '')
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = list(headers)
+            captured['exc_info'] = exc_info
+            return lambda data: captured.setdefault('written', []).append(data)
+
+        run = _PyinstrumentRun() if _PyinstrumentProfiler is not None else _CProfileRun()
+        start = time.perf_counter()
+        run.start()
+        try:
+            app_iter = self.wsgi_app(environ, capture_start_response)
+            try:
+                # drain the body inside the profile so lazy responses are included
+                body = captured.get('written', []) + list(app_iter)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+        finally:
+            run.stop()
+        duration_ms = (time.perf_counter() - start) * 1000.0
+
+        meta = {
+            'method': environ.get('REQUEST_METHOD'),
+            'path': environ.get('PATH_INFO'),
+            'query': environ.get('QUERY_STRING', ''),
+            'status': captured.get('status'),
+            'duration_ms': round(duration_ms, 2),
+            'request_id': request_id if _ID_RE.match(request_id) else None,
+            'sampled': sampled,
+            'profiler': 'pyinstrument' if isinstance(run, _PyinstrumentRun) else 'cProfile',
+            'created': time.time(),
+        }
+        try:
+            self.store.save(profile_id, run.dump(), run.ext, meta)
+            logger.info(f"Stored profile {profile_id} for {meta['method']} {meta['path']} ({duration_ms:.1f} ms)")
+        except OSError:
+            logger.exception('Could not store profile')
+
+        if inline_text:
+            text = run.text().encode('utf-8')
+            start_response('200 OK', [('Content-Type', 'text/plain; charset=utf-8'),
+                                      ('Content-Length', str(len(text))),
+                                      ('X-Profile-Id', profile_id)])
+            return [text]
+        headers = captured.get('headers', []) + [('X-Profile-Id', profile_id)]
+        start_response(captured.get('status', '500 INTERNAL SERVER ERROR'), headers, captured.get('exc_info'))
+        return body
+
+
+def init_app(app, token: Optional[str] = None, sample_every: int = 0, directory: Optional[str] = None,
+             max_entries: int = 50) -> Optional[ProfileStore]:
+    """Install the profiling middleware and the /api/profiles routes.
+
+    Does nothing unless a token is configured or sampling is on.
+    """
+    if not token and not sample_every:
+        return None
+    from flask import abort, jsonify, request, send_file
+
+    store = ProfileStore(directory or _default_dir(), max_entries)
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app, store, token=token, sample_every=sample_every)
+
+    def _check_token():
+        supplied = request.headers.get('X-Profile-Token') or request.args.get('__profile_token') or ''
+        if not token or not hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8')):
+            abort(404)
+
+    def list_profiles():
+        _check_token()
+        return jsonify(store.list())
+
+    def get_profile(profile_id):
+        _check_token()
+        found = store.get(profile_id)
+        if found is None:
+            abort(404)
+        meta, path = found
+        mimetype = 'application/json' if path.endswith('.json') else 'application/octet-stream'
+        return send_file(path, mimetype=mimetype, as_attachment=True, download_name=os.path.basename(path))
+
+    app.add_url_rule('/api/profiles', 'list_profiles', list_profiles)
+    app.add_url_rule('/api/profiles/<profile_id>', 'get_profile', get_profile)
+    return store
+
+
+def _default_dir() -> str:
+    # /tmp is the only writable location on Vercel
+    return os.path.join(tempfile.gettempdir(), 'quantum-calendar-profiles')
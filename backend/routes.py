@@ -6,16 +6,53 @@ from config import GEOAPIFY_API_KEY
 from cachetools import TTLCache
 from backend.calendar import get_calendar_for_year
 from backend.astronomy.years import get_multi_year_calendar_data
-from backend.etymology_api import etymology_chain_handler
+from backend.etymology_api import etymology_chain_handler, etymology_chains_handler
+from backend.etymology_api import etymology_tree_handler, etymology_tree_args
+from backend.timing import span
+from backend.metrics import CACHE_REQUESTS
+from backend.singleflight import SingleFlight, SingleFlightTimeout
+from backend.http_cache import (http_cached, CachePolicy, current_period_policy, known_timezone, local_today,
+                                mark_degraded)
+from backend.encoding import ndjson_response
+from backend.strongs_store import get_store as get_strongs_store, parse_number
+from backend.strongs_store import FIELDS as STRONGS_FIELDS, SUMMARY_FIELDS as STRONGS_SUMMARY_FIELDS
+from backend.field_selection import parse_fields, mongo_projection, select_all
+from backend.strongs_index import mongo_index_available, mongo_search
+from backend.hebrew_search import get_index as get_hebrew_index
+from backend.kjv_index import get_index as get_kjv_index, DEFAULT_PATH as KJV_DEFAULT_PATH
+from backend.kjv_index import mongo_index_available as kjv_mongo_index_available, mongo_search as kjv_mongo_search
+from backend.kjv_index import regex_search as kjv_regex_search
 from config import ASTRO_API_BASE
+from config import SINGLEFLIGHT_DIR, SINGLEFLIGHT_TIMEOUT, SINGLEFLIGHT_SHARE_TTL
 
 api = Blueprint('api', __name__)
 
 # Cache geocoding responses for 1 hour to reduce API usage and latency
 _geocode_cache = TTLCache(maxsize=256, ttl=3600)
 
+# Concurrent identical calendar/sun requests share one computation (see backend/singleflight.py)
+_sun_flight = SingleFlight('sunevents', SINGLEFLIGHT_DIR, SINGLEFLIGHT_TIMEOUT, SINGLEFLIGHT_SHARE_TTL)
+_calendar_flight = SingleFlight('calendar', SINGLEFLIGHT_DIR, SINGLEFLIGHT_TIMEOUT, SINGLEFLIGHT_SHARE_TTL)
+_multiyear_flight = SingleFlight('multiyear', SINGLEFLIGHT_DIR, SINGLEFLIGHT_TIMEOUT, SINGLEFLIGHT_SHARE_TTL)
+
+def _sunevents_cache_policy():
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    tzname = request.args.get('tz', type=str)
+    date_str = request.args.get('date', type=str)
+    if lat is None or lon is None or not date_str or not known_timezone(tzname):
+        return None
+    from datetime import datetime
+    date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+    key = ('sunevents', lat, lon, tzname, date_obj, request.args.get('name', type=str, default=None))
+    if date_obj < local_today(tzname):
+        return CachePolicy(key, immutable=True)
+    return current_period_policy(key, lat, lon, tzname)
+
+
 # Sun events endpoint for frontend side panel
 @api.route('/api/sunevents')
+@http_cached(_sunevents_cache_policy)
 def api_sunevents():
     try:
         lat = request.args.get('lat', type=float)
@@ -31,8 +68,17 @@ def api_sunevents():
             date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
         except Exception:
             return jsonify({'error': 'Invalid date format, expected YYYY-MM-DD'}), 400
-        plain_text, json_data = get_sun_events_for_date(lat, lon, tzname, date_obj, location_name)
+        plain_text, json_data = _sun_flight.do(
+            (lat, lon, tzname, date_obj.isoformat(), location_name),
+            lambda: get_sun_events_for_date(lat, lon, tzname, date_obj, location_name),
+        )
+        moon_percent = json_data.get('moon_percent') or {}
+        if moon_percent.get('today_dawn') is None or moon_percent.get('tomorrow_dawn') is None:
+            # astro-service failure (or no dawn to measure at): not worth keeping for a year
+            mark_degraded()
         return jsonify({'text': plain_text, 'data': json_data})
+    except SingleFlightTimeout as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -51,7 +97,23 @@ def api_timezone():
         return jsonify({'error': str(e)}), 500
 
 
+def _calendar_cache_policy():
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    tzname = request.args.get('tz', type=str)
+    if lat is None or lon is None or not known_timezone(tzname):
+        return None
+    from datetime import datetime
+    import pytz
+    from backend.astronomy.year import find_prev_next_new_year
+    # the calendar only changes when the year anchor does
+    prev_anchor, next_anchor = find_prev_next_new_year(datetime.now(pytz.UTC))
+    key = ('calendar', lat, lon, tzname, prev_anchor.isoformat())
+    return current_period_policy(key, lat, lon, tzname, expires_at=next_anchor)
+
+
 @api.route('/api/calendar')
+@http_cached(_calendar_cache_policy)
 def api_calendar():
     try:
         lat = request.args.get('lat', type=float)
@@ -64,7 +126,7 @@ def api_calendar():
             logging.error("Missing or invalid parameters")
             return jsonify({"error": "Missing or invalid parameters"}), 400
 
-        data = get_calendar_for_year(lat, lon, tzname)
+        data = _calendar_flight.do((lat, lon, tzname), lambda: get_calendar_for_year(lat, lon, tzname))
         if not data or "months" not in data:
             logging.error("Calendar data generation failed")
             return jsonify({"error": "Calendar data generation failed"}), 500
@@ -72,13 +134,31 @@ def api_calendar():
         logging.info(f"Calendar data generated for lat={lat}, lon={lon}, tz={tzname}")
         return jsonify(data)
 
+    except SingleFlightTimeout as e:
+        logging.warning(str(e))
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         logging.exception("Exception in /api/calendar")
         return jsonify({"error": str(e)}), 500
 
 
+def _multiyear_cache_policy():
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    tzname = request.args.get('tz', type=str)
+    start_year = request.args.get('start_year', type=int)
+    end_year = request.args.get('end_year', type=int)
+    if lat is None or lon is None or start_year is None or end_year is None or not known_timezone(tzname):
+        return None
+    key = ('multiyear', lat, lon, tzname, start_year, end_year)
+    if end_year < local_today(tzname).year:
+        return CachePolicy(key, immutable=True)
+    return current_period_policy(key, lat, lon, tzname)
+
+
 # Multi-year calendar endpoint
 @api.route('/api/multiyear-calendar')
+@http_cached(_multiyear_cache_policy)
 def api_multiyear_calendar():
     try:
         lat = request.args.get('lat', type=float)
@@ -93,19 +173,21 @@ def api_multiyear_calendar():
             logging.error("Missing or invalid parameters for multiyear calendar")
             return jsonify({"error": "Missing or invalid parameters"}), 400
 
-        data = get_multi_year_calendar_data(start_year, end_year, lat, lon, tzname)
+        # datetimes are serialized as ISO 8601 by the JSON provider (backend/encoding.py)
+        data = _multiyear_flight.do(
+            (lat, lon, tzname, start_year, end_year),
+            lambda: get_multi_year_calendar_data(start_year, end_year, lat, lon, tzname),
+        )
         if not data:
             logging.error("Multi-year calendar data generation failed")
             return jsonify({"error": "Multi-year calendar data generation failed"}), 500
 
         logging.info(f"Multi-year calendar data generated for lat={lat}, lon={lon}, tz={tzname}, years={start_year}-{end_year}")
-        # Convert datetimes to isoformat for JSON
-        for year in data:
-            for month in year['months']:
-                if month['start']:
-                    month['start'] = month['start'].isoformat()
         return jsonify(data)
 
+    except SingleFlightTimeout as e:
+        logging.warning(str(e))
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         logging.exception("Exception in /api/multiyear-calendar")
         return jsonify({"error": str(e)}), 500
@@ -125,13 +207,16 @@ def api_geocode():
 
         # Try cache first
         if q in _geocode_cache:
+            CACHE_REQUESTS.labels('geocode', 'hit').inc()
             data = _geocode_cache[q]
         else:
-            resp = requests.get(
-                'https://api.geoapify.com/v1/geocode/search',
-                params={'text': q, 'limit': 5, 'format': 'json', 'apiKey': api_key},
-                timeout=10,
-            )
+            CACHE_REQUESTS.labels('geocode', 'miss').inc()
+            with span('geocode'):
+                resp = requests.get(
+                    'https://api.geoapify.com/v1/geocode/search',
+                    params={'text': q, 'limit': 5, 'format': 'json', 'apiKey': api_key},
+                    timeout=10,
+                )
             resp.raise_for_status()
             data = resp.json() if resp.headers.get('content-type', '').startswith('application/json') else {}
             _geocode_cache[q] = data
@@ -221,23 +306,18 @@ def serve_hebrew_strongs():
 def serve_kjv_verses():
     """Enhanced fallback JSON implementation with production error handling"""
     try:
-        import json
-        import os
-        
         print("📁 FALLBACK: Loading KJV verses from JSON file")
         
         # Get query parameters for JSON fallback
         query_text = request.args.get('query', '').strip()
         limit = request.args.get('limit', 100, type=int)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        prefix = request.args.get('match', 'prefix') != 'word'
         
-        # Try to load JSON data
-        data_dir = os.path.join(os.path.dirname(__file__), 'data')
-        verses_file = os.path.join(data_dir, 'verses.json')
-        
-        print(f"📁 FALLBACK: Looking for file: {verses_file}")
-        
-        if not os.path.exists(verses_file):
-            print(f"❌ FALLBACK: File not found: {verses_file}")
+        # Resident verses with an inverted index (backend/kjv_index.py), built once per process
+        index = get_kjv_index()
+        if index is None:
+            print(f"❌ FALLBACK: File not found: {KJV_DEFAULT_PATH}")
             print("📁 FALLBACK: This is expected in production deployment")
             
             # Return empty results for production
@@ -248,49 +328,13 @@ def serve_kjv_verses():
                 'message': 'Data source unavailable in production environment'
             })
         
-        with open(verses_file, 'r') as f:
-            all_data = json.load(f)
-        
-        print(f"📊 FALLBACK: JSON loaded with {len(all_data)} verses")
-        
+        result = index.search(query_text, offset, limit, prefix)
+        print(f"📊 FALLBACK: Search for '{query_text}' found {result['totalVerses']} verses")
         if query_text:
-            # Filter JSON data by text content
-            filtered = []
-            for entry in all_data:
-                text = entry.get('text', '').lower()
-                if query_text.lower() in text:
-                    filtered.append(entry)
-                    if len(filtered) >= limit:
-                        break
-            
-            # Count Strong's number frequencies
-            strongs_freq = {}
-            for verse in filtered:
-                strongs_list = verse.get('strongsNumbers', [])
-                for strongs_num in strongs_list:
-                    strongs_freq[strongs_num] = strongs_freq.get(strongs_num, 0) + 1
-            
-            # Sort Strong's numbers by frequency (descending)
-            sorted_strongs = sorted(strongs_freq.items(), key=lambda x: x[1], reverse=True)
-            print(f"📊 FALLBACK: Search for '{query_text}' found {len(filtered)} verses")
-            print(f"📊 FALLBACK: Found {len(sorted_strongs)} unique Strong's numbers")
-            if sorted_strongs:
-                print(f"📊 FALLBACK: Top 5 Strong's by frequency: {sorted_strongs[:5]}")
-            
-            return jsonify({
-                'verses': filtered,
-                'strongsFrequency': sorted_strongs,
-                'totalVerses': len(filtered)
-            })
-        else:
-            # Return first 'limit' entries
-            limited_data = all_data[:limit]
-            print(f"📊 FALLBACK: Returning {len(limited_data)} verses (no query)")
-            return jsonify({
-                'verses': limited_data,
-                'strongsFrequency': [],
-                'totalVerses': len(limited_data)
-            })
+            print(f"📊 FALLBACK: Found {len(result['strongsFrequency'])} unique Strong's numbers")
+            if result['strongsFrequency']:
+                print(f"📊 FALLBACK: Top 5 Strong's by frequency: {result['strongsFrequency'][:5]}")
+        return jsonify(result)
     
     except FileNotFoundError as e:
         print(f"❌ FALLBACK: File not found - {e}")
@@ -312,6 +356,25 @@ def serve_kjv_verses():
         }), 200  # Return 200 instead of 500 for graceful degradation
 
 
+
+def _next_page_link(results, limit):
+    """Link header for the list page after `results` (after=<last strongsNumber>); None on the last page."""
+    if limit <= 0 or len(results) < limit:
+        return None
+    from urllib.parse import urlencode
+    args = request.args.to_dict()
+    args['after'] = results[-1]['strongsNumber']
+    return f'<{request.path}?{urlencode(args)}>; rel="next"'
+
+
+def _strongs_list_response(results, limit, paged):
+    response = jsonify(results)
+    link = _next_page_link(results, limit) if paged else None
+    if link:
+        response.headers['Link'] = link
+    return response
+
+
 # MongoDB API endpoints for Strong's data
 @api.route('/api/strongs-data')
 def api_strongs_data():
@@ -326,7 +389,24 @@ def api_strongs_data():
         language = request.args.get('language', type=str)
         limit = request.args.get('limit', 100, type=int)
 
+        # ?fields=a,b / ?view=summary: only those fields, projected by MongoDB
+        try:
+            fields = parse_fields(request.args.get('fields'), request.args.get('view'),
+                                  STRONGS_FIELDS, STRONGS_SUMMARY_FIELDS, required=('strongsNumber',))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        # keyset pagination of lists: entries after this Strong's number, in numeric order
+        listing = not (query_param or strongs_num or search)
+        after = request.args.get('after')
+        if after is not None:
+            after = parse_number(after)
+            if after is None:
+                return jsonify({'error': 'Invalid after parameter (a Strong\'s number, e.g. after=H100)'}), 400
+            if not listing:
+                return jsonify({'error': 'after pages lists; it cannot be combined with query, search or strongs_num'}), 400
+
         query = {}
+        text_query = None
 
         # Handle 'query' parameter (e.g., 'H4714' or '4714')
         if query_param:
@@ -343,6 +423,7 @@ def api_strongs_data():
                         {'transliteration': {'$regex': query_param, '$options': 'i'}},
                         {'definitions': {'$regex': query_param, '$options': 'i'}}
                     ]
+                    text_query = query_param
                     print(f"DEBUG: Text searching for '{query_param}'")
             else:
                 try:
@@ -356,6 +437,7 @@ def api_strongs_data():
                         {'transliteration': {'$regex': query_param, '$options': 'i'}},
                         {'definitions': {'$regex': query_param, '$options': 'i'}}
                     ]
+                    text_query = query_param
                     print(f"DEBUG: Text searching for '{query_param}'")
         elif strongs_num:
             query['strongsNumber'] = strongs_num
@@ -366,6 +448,7 @@ def api_strongs_data():
                 {'transliteration': {'$regex': search, '$options': 'i'}},
                 {'definitions': {'$regex': search, '$options': 'i'}}
             ]
+            text_query = search
         
         if language:
             query['language'] = language
@@ -374,12 +457,41 @@ def api_strongs_data():
         if client is not None and db is not None:
             print("✓ DATA SOURCE: Using MongoDB Atlas for Strong's data (PRIMARY)")
             from config import STRONG_COLLECTION
+            # trigram side collections from python -m backend.strongs_index build-mongo
+            if text_query and mongo_index_available(db, STRONG_COLLECTION):
+                # precomputed trigram index: ranked, case/diacritic-insensitive, no collection scan
+                results = mongo_search(db, STRONG_COLLECTION, text_query, limit=limit, language=language,
+                                       fields=fields)
+                if request.args.get('format') == 'ndjson':
+                    return ndjson_response(results)
+                return jsonify(results)
             collection = db[STRONG_COLLECTION]
-            results = list(collection.find(query, {'_id': 0}).limit(limit))
-            return jsonify(results)
+            if listing:
+                # numeric order from the strongsNumber (or language + strongsNumber) index
+                if after is not None:
+                    query['strongsNumber'] = {'$gt': after}
+                cursor = collection.find(query, mongo_projection(fields)).sort('strongsNumber', 1).limit(limit)
+            else:
+                cursor = collection.find(query, mongo_projection(fields)).limit(limit)
+            if request.args.get('format') == 'ndjson':
+                return ndjson_response(cursor)
+            results = list(cursor)
+            return _strongs_list_response(results, limit, listing)
         else:
-            print("⚠️  DATA SOURCE: MongoDB not available, returning empty results")
-            return jsonify([])
+            print("⚠️  DATA SOURCE: MongoDB not available, using the resident Strong's lexicon (SECONDARY)")
+            store = get_strongs_store()
+            if 'strongsNumber' in query:
+                entry = store.get(query['strongsNumber'])
+                results = [entry] if entry is not None and (not language or entry['language'] == language) else []
+                results = select_all(results, fields)
+            elif query_param or search:
+                results = store.search(query_param or search, language=language, limit=limit, fields=fields)
+            else:
+                results = list(store.entries(language=language, limit=limit,
+                                             after=-1 if after is None else after, fields=fields))
+            if request.args.get('format') == 'ndjson':
+                return ndjson_response(results)
+            return _strongs_list_response(results, limit, listing)
 
     except Exception as e:
         logging.exception("Exception in /api/strongs-data")
@@ -394,11 +506,12 @@ def api_strongs_data():
 def api_hebrew_search():
     try:
         from flask import current_app
-        import re
+        from config import STRONG_COLLECTION, KJV_COLLECTION, HEBREW_INDEX_TTL
         
         # Get query parameters
         hebrew_query = request.args.get('query', '').strip()
         limit = request.args.get('limit', 20, type=int)
+        language = request.args.get('language', type=str)
         
         print(f"INFO: Hebrew search called with query='{hebrew_query}', limit={limit}")
         
@@ -406,68 +519,34 @@ def api_hebrew_search():
             return jsonify([])
         
         client, db = current_app.config.get('mongo_client'), current_app.config.get('mongo_db')
+        if client is None or db is None:
+            db = None
 
-        if client is not None and db is not None:
-            print("✓ DATA SOURCE: Using MongoDB Atlas for Hebrew word search (PRIMARY)")
-            from config import STRONG_COLLECTION
-            collection = db[STRONG_COLLECTION]
-            
-            # Search for Hebrew words that contain the query
-            # Try both exact match and regex match
-            query = {
-                '$or': [
-                    {'word': hebrew_query},  # Exact match first
-                    {'word': {'$regex': hebrew_query, '$options': 'i'}}  # Then regex match
-                ]
-            }
-            
-            print(f"DEBUG: Hebrew search query: {query}")
-            results = list(collection.find(query, {'_id': 0}).limit(limit))
-            print(f"INFO: Hebrew search found {len(results)} matches")
-            
-            if results:
-                print(f"DEBUG: First Hebrew match: H{results[0].get('strongsNumber')} - {results[0].get('word')} ({results[0].get('transliteration')})")
-                print(f"DEBUG: Language codes in results: {set(r.get('language') for r in results[:5])}")
-            else:
-                # Debug: Try to find any entries with Hebrew characters
-                debug_query = {'word': {'$regex': '[\u0590-\u05FF]'}}  # Hebrew Unicode range
-                debug_results = list(collection.find(debug_query, {'_id': 0}).limit(3))
-                print(f"DEBUG: Found {len(debug_results)} entries with Hebrew characters")
-                if debug_results:
-                    for r in debug_results:
-                        print(f"DEBUG: H{r.get('strongsNumber')} - {repr(r.get('word'))} ({r.get('transliteration')})")
-            
-            return jsonify(results)
-        
-        # Fallback to JSON file
-        print("⚠️  DATA SOURCE: Using JSON file fallback for Hebrew word search (SECONDARY)")
-        print("⚠️  Reason: MongoDB not available")
+        # Normalized prefix trie (backend/hebrew_search.py): pointing and final letters don't matter,
+        # results are ranked by KJV frequency; built once per process from MongoDB or strongs.json
         try:
-            import json
-            import os
-            
-            data_dir = os.path.join(os.path.dirname(__file__), 'data')
-            strongs_file = os.path.join(data_dir, 'strongs.json')
-            
-            with open(strongs_file, 'r') as f:
-                all_data = json.load(f)
-            
-            # Filter for Hebrew entries that match the query
-            filtered = []
-            for entry in all_data:
-                if (entry.get('language') == 'heb' and 
-                    entry.get('word') and 
-                    hebrew_query in entry.get('word', '')):
-                    filtered.append(entry)
-                    if len(filtered) >= limit:
-                        break
-            
-            print(f"INFO: JSON Hebrew search found {len(filtered)} matches")
-            return jsonify(filtered)
-            
+            index = get_hebrew_index(db, language, STRONG_COLLECTION, KJV_COLLECTION, HEBREW_INDEX_TTL)
         except Exception as e:
-            print(f"ERROR: JSON fallback failed: {e}")
-            return jsonify([])
+            print(f"⚠️  Reason: could not build the Hebrew index from MongoDB - {e}")
+            db = None
+            index = get_hebrew_index(None, language, ttl=HEBREW_INDEX_TTL)
+        with span('hebrew-lookup'):
+            numbers = index.search(hebrew_query, limit=limit)
+
+        if db is not None:
+            print("✓ DATA SOURCE: Using MongoDB Atlas for Hebrew word search (PRIMARY)")
+            docs = db[STRONG_COLLECTION].find({'strongsNumber': {'$in': numbers}}, {'_id': 0}) if numbers else []
+            by_number = {doc.get('strongsNumber'): doc for doc in docs}
+            results = [by_number[n] for n in numbers if n in by_number]
+        else:
+            print("⚠️  DATA SOURCE: Using JSON file fallback for Hebrew word search (SECONDARY)")
+            print("⚠️  Reason: MongoDB not available")
+            results = get_strongs_store().get_many(numbers)
+
+        print(f"INFO: Hebrew search found {len(results)} matches")
+        if results:
+            print(f"DEBUG: First Hebrew match: H{results[0].get('strongsNumber')} - {results[0].get('word')} ({results[0].get('transliteration')})")
+        return jsonify(results)
 
     except Exception as e:
         logging.exception("Exception in /api/hebrew-search")
@@ -479,9 +558,6 @@ def api_hebrew_search():
 # @api.route('/api/kjv-data')
 def api_kjv_data_disabled():
     try:
-        import os
-        import json
-        
         # Get query parameters - simplified to match app.py implementation
         query_text = request.args.get('query', '').strip()
         limit = request.args.get('limit', 100, type=int)
@@ -515,41 +591,21 @@ def api_kjv_data_disabled():
                 print(f"📊 MONGODB: Using database '{db.name if hasattr(db, 'name') else 'quantum-calendar'}'")
                 print(f"📊 MONGODB: Collection '{KJV_COLLECTION}' has ~{collection_count} documents")
                 
+                offset = max(request.args.get('offset', 0, type=int), 0)
+                if kjv_mongo_index_available(db, KJV_COLLECTION):
+                    # precomputed inverted index (python -m backend.kjv_index build-mongo)
+                    prefix = request.args.get('match', 'prefix') != 'word'
+                    return jsonify(kjv_mongo_search(db, KJV_COLLECTION, query_text, offset, limit, prefix))
+
+                # page, exact count and a server-side $group of strongsNumbers, run concurrently
+                result = kjv_regex_search(db, KJV_COLLECTION, query_text, offset, limit)
+                print(f"📊 MONGODB: Search for '{query_text}' found {result['totalVerses']} verses")
                 if query_text:
-                    # Search verses by text content
-                    regex = {"$regex": query_text, "$options": "i"}
-                    print(f"🔍 MONGODB: Searching with regex: {regex}")
-                    
-                    matched_verses = list(collection.find({
-                        "text": regex
-                    }, {'_id': 0}).limit(limit))
-                    
-                    print(f"📊 MONGODB: Search for '{query_text}' found {len(matched_verses)} verses")
-                    
-                    # Count Strong's number frequencies across matched verses
-                    strongs_freq = {}
-                    for verse in matched_verses:
-                        strongs_list = verse.get('strongsNumbers', [])
-                        for strongs_num in strongs_list:
-                            strongs_freq[strongs_num] = strongs_freq.get(strongs_num, 0) + 1
-                    
-                    # Sort Strong's numbers by frequency (descending)
-                    sorted_strongs = sorted(strongs_freq.items(), key=lambda x: x[1], reverse=True)
-                    print(f"📊 MONGODB: Found {len(sorted_strongs)} unique Strong's numbers")
-                    if sorted_strongs:
-                        print(f"📊 MONGODB: Top 5 Strong's by frequency: {sorted_strongs[:5]}")
-                    
-                    # Return verses with frequency-sorted Strong's numbers
-                    return jsonify({
-                        'verses': matched_verses,
-                        'strongsFrequency': sorted_strongs,
-                        'totalVerses': len(matched_verses)
-                    })
-                else:
-                    data = list(collection.find({}, {'_id': 0}).limit(limit))
-                    print(f"📊 MONGODB: Retrieved {len(data)} verses (no query)")
-                    return jsonify({'verses': data, 'strongsFrequency': [], 'totalVerses': len(data)})
-                    
+                    print(f"📊 MONGODB: Found {len(result['strongsFrequency'])} unique Strong's numbers")
+                    if result['strongsFrequency']:
+                        print(f"📊 MONGODB: Top 5 Strong's by frequency: {result['strongsFrequency'][:5]}")
+                return jsonify(result)
+
             except Exception as mongo_error:
                 print(f"❌ MONGODB: Operation failed - {mongo_error}")
                 print(f"❌ MONGODB: Error type: {type(mongo_error).__name__}")
@@ -578,6 +634,27 @@ def api_etymology_chain():
     """Build complete etymological chain from a Strong's number to its primitive root"""
     return etymology_chain_handler()
 
+def _etymology_tree_cache_policy():
+    from config import ETYMOLOGY_CACHE_TTL
+    args = etymology_tree_args()
+    if args is None:
+        return None
+    return CachePolicy(('etymology-tree',) + args, max_age=ETYMOLOGY_CACHE_TTL)
+
+
+# All words derived from a root (reverse etymology index)
+@api.route('/api/etymology-tree')
+@http_cached(_etymology_tree_cache_policy)
+def api_etymology_tree():
+    """Derivative tree of a Strong's number: ?root=H<n>[&max_depth=N][&format=compact|full]"""
+    return etymology_tree_handler()
+
+# Etymology chains for many Strong's numbers in one request
+@api.route('/api/etymology-chains', methods=['GET', 'POST'])
+def api_etymology_chains():
+    """Chains for a comma-separated (GET) or JSON (POST) list of Strong's numbers"""
+    return etymology_chains_handler()
+
 # Debug endpoint to compare MongoDB state between local and production
 @api.route('/api/debug-mongodb')
 def debug_mongodb():
@@ -619,7 +696,7 @@ def debug_mongodb():
                 "strong_collection_count": strong_collection.estimated_document_count(),
             })
             
-            # Test specific searches
+            # Test specific searches (the /api/kjv-data regex match on the text index, and the multikey index)
             egypt_results = list(kjv_collection.find({"text": {"$regex": "egypt", "$options": "i"}}, {'_id': 0}).limit(5))
             mizraim_results = list(kjv_collection.find({"text": {"$regex": "mizraim", "$options": "i"}}, {'_id': 0}).limit(5))
             h4714_results = list(kjv_collection.find({"strongsNumbers": "H4714"}, {'_id': 0}).limit(5))
@@ -631,6 +708,13 @@ def debug_mongodb():
                 "sample_verse": h4714_results[0] if h4714_results else None,
             })
             
+            # Indexes that are missing or differ from backend/mongo_indexes.py
+            from backend.mongo_indexes import ensure_indexes
+            debug_info["index_problems"] = []
+            for name, index, status in ensure_indexes(db, STRONG_COLLECTION, KJV_COLLECTION, dry_run=True):
+                if status not in ('exists', 'skipped'):
+                    debug_info["index_problems"].append(f"{name}.{index}: {status}")
+            
             # Check sample document structure
             sample_doc = kjv_collection.find_one({}, {'_id': 0})  # Exclude ObjectId
             if sample_doc:
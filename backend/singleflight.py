@@ -0,0 +1,229 @@
+"""
+Single-flight request coalescing.
+
+SingleFlight.do(key, fn) runs fn once for all callers that ask for the same
+key at the same time and hands every one of them the same result (or
+re-raises the same exception). Within a process this is a dict of
+in-flight calls guarded by events. With a lock directory, identical
+computations are also coalesced across processes (gunicorn workers): the
+first worker takes an fcntl lock on <key>.lock and computes; a worker that
+finds the lock taken marks the key as waited on (<key>.wait) and polls.
+Only then does the first worker write its result next to the lock, as
+JSON, and the waiting workers pick it up instead of recomputing, as long as
+it is younger than `share_ttl` seconds.
+
+Shared results are plain JSON (datetimes become ISO strings, tuples lists),
+which is what the callers send back anyway. The lock directory must be
+private: it is created 0700 and cross-process coalescing is turned off if
+it (or the directory it is in) is not owned by this user or is accessible
+to others.
+
+Callers must treat the result as read-only, since it is shared.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Optional
+import hashlib
+import json
+import logging
+import os
+import stat
+import threading
+import time
+
+try:  # POSIX only; elsewhere coalescing stays per-process
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from backend.encoding import json_default
+from backend.metrics import Counter
+from backend.timing import span
+
+SINGLEFLIGHT_CALLS = Counter(
+    'singleflight_calls_total',
+    'Coalesced computations by group and role (leader computed, follower waited in-process, shared from another worker).',
+    ('group', 'role'))
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised when waiting on another caller's computation takes longer than the timeout."""
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent identical computations of one kind (a "group")."""
+
+    def __init__(self, group: str, lock_dir: Optional[str] = None, timeout: float = 60.0,
+                 share_ttl: float = 5.0, poll_interval: float = 0.02):
+        self.group = group
+        self.lock_dir = os.path.join(lock_dir, group) if (lock_dir and fcntl is not None) else None
+        self.timeout = timeout
+        self.share_ttl = share_ttl
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._writes = 0
+        self._dir_checked: Optional[bool] = None
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            SINGLEFLIGHT_CALLS.labels(self.group, 'follower').inc()
+            with span('singleflight-wait'):
+                if not call.done.wait(self.timeout):
+                    raise SingleFlightTimeout(f"{self.group}: timed out after {self.timeout:g}s waiting for {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    # -------------------------------
+    # Cross-process coalescing
+    # -------------------------------
+    def _private_dir(self) -> bool:
+        """Create the lock directory 0700 and check nobody else can write to it (once)."""
+        if self._dir_checked is None:
+            ok = True
+            try:
+                # makedirs() does not apply the mode to missing parents
+                os.makedirs(os.path.dirname(self.lock_dir), mode=0o700, exist_ok=True)
+                os.makedirs(self.lock_dir, mode=0o700, exist_ok=True)
+                for path in (os.path.dirname(self.lock_dir), self.lock_dir):
+                    info = os.lstat(path)
+                    if (not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid()
+                            or info.st_mode & 0o077):
+                        ok = False
+            except OSError:
+                ok = False
+            if not ok:
+                logging.warning("singleflight: lock dir %s is not a private directory of this user "
+                                "(it must be 0700); coalescing in-process only", self.lock_dir)
+            self._dir_checked = ok
+        return self._dir_checked
+
+    def _run(self, key, fn):
+        if self.lock_dir is None or not self._private_dir():
+            SINGLEFLIGHT_CALLS.labels(self.group, 'leader').inc()
+            return fn()
+
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        lock_path = os.path.join(self.lock_dir, digest + '.lock')
+        wait_path = os.path.join(self.lock_dir, digest + '.wait')
+        result_path = os.path.join(self.lock_dir, digest + '.json')
+        try:
+            lock_file = open(lock_path, 'a+b')
+        except OSError:
+            logging.warning("singleflight: lock dir %s unusable; coalescing in-process only", self.lock_dir)
+            SINGLEFLIGHT_CALLS.labels(self.group, 'leader').inc()
+            return fn()
+
+        with lock_file:
+            waited = self._acquire(lock_file, key, wait_path)
+            try:
+                if waited:
+                    shared = self._read_shared(result_path)
+                    if shared is not None:
+                        SINGLEFLIGHT_CALLS.labels(self.group, 'shared').inc()
+                        return shared[0]
+                SINGLEFLIGHT_CALLS.labels(self.group, 'leader').inc()
+                result = fn()
+                # only worth a file write when another worker queued up behind this one
+                if os.path.exists(wait_path):
+                    self._write_shared(result_path, result)
+                    try:
+                        os.remove(wait_path)
+                    except OSError:
+                        pass
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _acquire(self, lock_file, key, wait_path) -> bool:
+        """Take the exclusive lock; returns True if another process held it first."""
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return False
+        except BlockingIOError:
+            pass
+        try:
+            # tell the holder to share its result
+            with open(wait_path, 'a'):
+                pass
+        except OSError:
+            pass
+        deadline = time.monotonic() + self.timeout
+        with span('singleflight-wait'):
+            while True:
+                time.sleep(self.poll_interval)
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return True
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise SingleFlightTimeout(
+                            f"{self.group}: timed out after {self.timeout:g}s waiting for another worker on {key!r}")
+
+    def _read_shared(self, path):
+        try:
+            if time.time() - os.path.getmtime(path) > self.share_ttl:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return (json.load(f),)
+        except (OSError, ValueError):
+            return None
+
+    def _write_shared(self, path, result) -> None:
+        tmp = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(result, f, default=json_default, ensure_ascii=False)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            # results that are not JSON are simply not shared across workers
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._prune()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - max(60.0, self.share_ttl * 10)
+        try:
+            names = os.listdir(self.lock_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.lock_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,294 @@
+"""
+Trigram index for Strong's text search.
+
+Text queries against `word`, `transliteration` and `definitions` have one
+match rule, wherever they run: the query, folded, must be a substring of
+one of the folded fields. Folding means
+
+  - Unicode case-folding;
+  - NFKD decomposition with combining marks and modifier letters removed,
+    so transliterations match without diacritics ('ʼâb' -> 'ab',
+    'bᵉrîyth' -> 'beriyth') and pointed Hebrew matches unpointed words;
+  - runs of spaces collapsed to one (the definitions use double spaces).
+
+TrigramIndex keeps a posting list (array of Strong's numbers) per trigram
+of the folded fields. A search intersects the posting lists of the query's
+trigrams, starting with the shortest, and then verifies each candidate
+against the folded text, so results are exactly those of a full scan.
+Queries shorter than three folded characters have no trigram and fall
+back to scanning the folded text.
+
+Matches are ranked: an exact field match first, then a match at the start
+of a field, at the start of a word, and anywhere; ties go to the earlier
+field (word, transliteration, definitions), then to the lower number.
+
+The same index can be precomputed into MongoDB (build_mongo_index): a
+`<strongs>_ngrams` collection ({_id: trigram, numbers: [...]}) and a
+`<strongs>_search` collection ({_id: number, language, t: [folded fields]}).
+mongo_search() then answers a query with an indexed lookup of the posting
+lists and a regex verification restricted to the candidates' _ids.
+
+    python -m backend.strongs_index build-mongo    # (re)build the side collections
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from array import array
+from collections import defaultdict
+import heapq
+import re
+import unicodedata
+
+from cachetools import TTLCache
+
+NGRAM = 3
+# field order doubles as the tie-break in ranking
+FIELDS = ('word', 'transliteration', 'definitions')
+
+_DROPPED_CATEGORIES = frozenset(('Mn', 'Me', 'Lm', 'Sk'))
+_SPACES_RE = re.compile(r'[ \t]+')
+
+
+def fold(text: Optional[str]) -> str:
+    """Case-, diacritic- and spacing-insensitive form of `text` (newlines are kept)."""
+    if not text:
+        return ''
+    if text.isascii():
+        return _SPACES_RE.sub(' ', text.lower())
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    stripped = ''.join(ch for ch in decomposed if unicodedata.category(ch) not in _DROPPED_CATEGORIES)
+    return _SPACES_RE.sub(' ', stripped)
+
+
+def fold_query(text: Optional[str]) -> str:
+    return ' '.join(fold(text).split())
+
+
+def trigrams(folded: str) -> set:
+    return {folded[i:i + NGRAM] for i in range(len(folded) - NGRAM + 1)}
+
+
+def _match_rank(needle: str, fields: Sequence[str]) -> Optional[Tuple[int, int]]:
+    """(quality, field) of the best match of `needle` in `fields`; lower is better, None if no match."""
+    best = None
+    for field_index, text in enumerate(fields):
+        pos = text.find(needle)
+        if pos < 0:
+            continue
+        if text == needle:
+            quality = 0
+        elif pos == 0:
+            quality = 1
+        else:
+            quality = 3
+            while pos >= 0:
+                if not text[pos - 1].isalnum():
+                    quality = 2
+                    break
+                pos = text.find(needle, pos + 1)
+        rank = (quality, field_index)
+        if best is None or rank < best:
+            best = rank
+            if quality == 0:
+                break
+    return best
+
+
+class TrigramIndex:
+    """Trigram posting lists over the folded text fields of numbered documents."""
+
+    def __init__(self, documents: Iterable[Tuple[int, Sequence[str]]]):
+        """documents: (number, (word, transliteration, definitions)) pairs, unfolded.
+
+        Definitions may be one string per definition joined with newlines.
+        """
+        self._texts: Dict[int, Tuple[str, ...]] = {}
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for number, fields in documents:
+            folded = tuple(fold(f) for f in fields)
+            self._texts[number] = folded
+            for gram in trigrams('\n'.join(folded)):
+                postings[gram].append(number)
+        # sorted, typed arrays: 4 bytes per posting instead of a pointer to an int object
+        self._postings: Dict[str, array] = {g: array('I', sorted(ns)) for g, ns in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def folded(self, number: int) -> Optional[Tuple[str, ...]]:
+        return self._texts.get(number)
+
+    def postings(self) -> Dict[str, array]:
+        return self._postings
+
+    def candidates(self, needle: str) -> Iterable[int]:
+        """Numbers that contain every trigram of the folded `needle` (a superset of the matches)."""
+        grams = trigrams(needle)
+        if not grams:
+            return self._texts.keys()
+        lists = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return ()
+            lists.append(posting)
+        lists.sort(key=len)
+        found = set(lists[0])
+        for posting in lists[1:]:
+            found.intersection_update(posting)
+            if not found:
+                break
+        return found
+
+    def search(self, query: str, limit: Optional[int] = None,
+               accept: Optional[Callable[[int], bool]] = None) -> List[int]:
+        """Ranked numbers whose fields contain the folded `query`.
+
+        accept: optional filter on the number (e.g. by language), applied before ranking.
+        """
+        needle = fold_query(query)
+        if not needle:
+            return []
+        ranked = []
+        for number in self.candidates(needle):
+            if accept is not None and not accept(number):
+                continue
+            rank = _match_rank(needle, self._texts[number])
+            if rank is not None:
+                ranked.append((rank[0], rank[1], number))
+        if limit is not None and limit < len(ranked):
+            ranked = heapq.nsmallest(limit, ranked)
+        else:
+            ranked.sort()
+        return [number for _, _, number in ranked]
+
+
+# -------------------------------
+# MongoDB side collections
+# -------------------------------
+def side_collection_names(source: str) -> Tuple[str, str]:
+    """(ngrams, search) collection names for a Strong's collection."""
+    return f'{source}_ngrams', f'{source}_search'
+
+
+def build_mongo_index(db, source: str, batch_size: int = 1000) -> Tuple[int, int]:
+    """Rebuild the side collections of `source` from its documents; returns (trigrams, documents).
+
+    Collections are written under temporary names and renamed over the old
+    ones, so searches keep working while the index is rebuilt.
+    """
+    from pymongo import InsertOne
+
+    ngrams_name, search_name = side_collection_names(source)
+    docs = db[source].find({}, {'_id': 0, 'strongsNumber': 1, 'language': 1, 'word': 1,
+                                'transliteration': 1, 'definitions': 1})
+    languages: Dict[int, Optional[str]] = {}
+
+    def fields():
+        for doc in docs:
+            number = doc.get('strongsNumber')
+            if not isinstance(number, int) or number in languages:
+                continue
+            languages[number] = doc.get('language')
+            definitions = doc.get('definitions') or []
+            if isinstance(definitions, str):
+                definitions = [definitions]
+            yield number, (doc.get('word') or '', doc.get('transliteration') or '', '\n'.join(definitions))
+
+    index = TrigramIndex(fields())
+
+    def write(name, documents):
+        db.drop_collection(f'{name}_tmp')
+        # create it up front so the rename works even when nothing is inserted
+        tmp = db.create_collection(f'{name}_tmp')
+        batch = []
+        for document in documents:
+            batch.append(InsertOne(document))
+            if len(batch) >= batch_size:
+                tmp.bulk_write(batch, ordered=False)
+                batch = []
+        if batch:
+            tmp.bulk_write(batch, ordered=False)
+        tmp.rename(name, dropTarget=True)
+
+    write(ngrams_name, ({'_id': gram, 'numbers': list(numbers)} for gram, numbers in index.postings().items()))
+    write(search_name, ({'_id': number, 'language': languages[number], 't': list(index.folded(number))}
+                        for number in languages))
+    db[search_name].create_index('language')
+    return len(index.postings()), len(languages)
+
+
+_available_cache = TTLCache(maxsize=8, ttl=300)
+
+
+def mongo_index_available(db, source: str) -> bool:
+    """Whether the side collections of `source` exist (checked at most every five minutes)."""
+    available = _available_cache.get(source)
+    if available is None:
+        ngrams_name, search_name = side_collection_names(source)
+        try:
+            names = set(db.list_collection_names(filter={'name': {'$in': [ngrams_name, search_name]}}))
+        except Exception:
+            return False
+        available = _available_cache[source] = names == {ngrams_name, search_name}
+    return available
+
+
+def mongo_search(db, source: str, query: str, limit: int = 100, language: Optional[str] = None,
+                 fields: Optional[Sequence[str]] = None) -> List[dict]:
+    """Ranked documents of `source` matching `query`, using the precomputed side collections.
+
+    `fields` limits the returned documents to those fields (strongsNumber is always fetched).
+    """
+    needle = fold_query(query)
+    if not needle or limit <= 0:
+        return []
+    ngrams_name, search_name = side_collection_names(source)
+
+    criteria: dict = {'t': {'$regex': re.escape(needle)}}
+    grams = trigrams(needle)
+    if grams:
+        lists = [doc['numbers'] for doc in db[ngrams_name].find({'_id': {'$in': list(grams)}})]
+        if len(lists) < len(grams):
+            return []
+        lists.sort(key=len)
+        found = set(lists[0])
+        for numbers in lists[1:]:
+            found.intersection_update(numbers)
+        if not found:
+            return []
+        criteria['_id'] = {'$in': list(found)}
+    if language:
+        criteria['language'] = language
+
+    ranked = []
+    for doc in db[search_name].find(criteria, {'t': 1}):
+        rank = _match_rank(needle, doc['t'])
+        if rank is not None:
+            ranked.append((rank[0], rank[1], doc['_id']))
+    top = [number for _, _, number in heapq.nsmallest(limit, ranked)]
+    if not top:
+        return []
+    from backend.field_selection import mongo_projection
+    projection = mongo_projection(None if fields is None else ('strongsNumber', *fields))
+    by_number = {doc['strongsNumber']: doc for doc in db[source].find({'strongsNumber': {'$in': top}}, projection)}
+    return [by_number[n] for n in top if n in by_number]
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description="Strong's trigram index")
+    parser.add_argument('command', choices=['build-mongo'])
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+    from config import MONGODB_URI, DATABASE_NAME, STRONG_COLLECTION
+    if not MONGODB_URI:
+        sys.exit('MONGODB_URI is not configured')
+    client = MongoClient(MONGODB_URI)
+    gram_count, doc_count = build_mongo_index(client[DATABASE_NAME], STRONG_COLLECTION)
+    print(f"✅ Indexed {doc_count} entries of '{STRONG_COLLECTION}' ({gram_count} trigrams) "
+          f"into {', '.join(side_collection_names(STRONG_COLLECTION))}")
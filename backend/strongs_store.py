@@ -0,0 +1,313 @@
+"""
+Resident Strong's lexicon.
+
+backend/data/strongs.json (8,674 entries, ~4 MB) used to be json.load()ed and
+scanned on every request that could not reach MongoDB. get_store() parses it
+once per process into a StrongsStore:
+
+  - one compact row (tuple) per entry, indexed by strongsNumber in a dict,
+    so get(n) is a single lookup;
+  - definitions joined into one string per entry instead of a list of
+    strings, and repeated values (language, keys of `notes`) interned;
+  - a trigram index for text search (backend/strongs_index.py), built on
+    first use.
+
+With STRONGS_CACHE set, the rows are also written to a pickle there; later
+processes load that instead of parsing the JSON, as long as the source
+file's size and mtime still match. Since unpickling runs code, the cache is
+only read when the file and its directory belong to this user and nobody
+else can write to them; it is off by default.
+
+get()/entries() build fresh top-level dicts in the shape of the JSON (and of
+the Mongo documents, without `_id`), or with only the requested `fields`. Nested values such as `notes` are shared
+between calls, so callers must treat them as read-only.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from bisect import bisect_right
+import json
+import logging
+import os
+import pickle
+import stat
+import sys
+import threading
+
+from backend.strongs_index import TrigramIndex
+from backend.timing import span
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'data', 'strongs.json')
+# bump when the row layout changes so stale caches are ignored
+CACHE_FORMAT = 1
+
+# row layout; anything else in a document goes into the trailing `extra` dict
+_NUMBER, _WORD, _LANGUAGE, _TRANSLITERATION, _PART_OF_SPEECH, _DEFINITIONS, _NOTES, _EXTRA = range(8)
+_DEFINITION_SEP = '\n'
+_SKIPPED_KEYS = ('_id', 'strongsNumber', 'word', 'language', 'transliteration', 'partOfSpeech', 'definitions', 'notes')
+
+Row = Tuple[int, str, str, str, str, str, Optional[dict], Optional[dict]]
+
+# fields ?fields= may select (backend/field_selection.py), and those of ?view=summary
+FIELDS = ('strongsNumber', 'word', 'language', 'transliteration', 'partOfSpeech', 'definitions', 'notes',
+          'greekReferences')
+SUMMARY_FIELDS = ('strongsNumber', 'word', 'transliteration')
+
+
+def parse_number(value) -> Optional[int]:
+    """Strong's number from 1234, '1234', 'H1234' or 'h1234'; None if it is not one."""
+    if isinstance(value, int):
+        return value
+    text = str(value or '').strip()
+    if text[:1] in ('H', 'h'):
+        text = text[1:]
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+def _private_file(path: str) -> bool:
+    """Whether `path` and its directory are owned by this user and writable by nobody else."""
+    try:
+        for target in (os.path.dirname(os.path.abspath(path)), path):
+            info = os.lstat(target)
+            if info.st_uid != os.getuid() or info.st_mode & 0o022:
+                return False
+        return stat.S_ISREG(os.lstat(path).st_mode)
+    except OSError:
+        return False
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _compact_notes(notes):
+    if not isinstance(notes, dict):
+        return notes
+    return {sys.intern(k): v for k, v in notes.items()}
+
+
+def _row(doc: dict) -> Optional[Row]:
+    number = parse_number(doc.get('strongsNumber'))
+    if number is None:
+        return None
+    definitions = doc.get('definitions') or []
+    if isinstance(definitions, str):
+        definitions = [definitions]
+    extra = {k: v for k, v in doc.items() if k not in _SKIPPED_KEYS} or None
+    return (
+        number,
+        doc.get('word') or '',
+        _intern(doc.get('language') or ''),
+        doc.get('transliteration') or '',
+        doc.get('partOfSpeech') or '',
+        _DEFINITION_SEP.join(definitions),
+        _compact_notes(doc.get('notes')),
+        extra,
+    )
+
+
+_FIELD_VALUES = {
+    'strongsNumber': lambda row: row[_NUMBER],
+    'word': lambda row: row[_WORD],
+    'language': lambda row: row[_LANGUAGE],
+    'transliteration': lambda row: row[_TRANSLITERATION],
+    'partOfSpeech': lambda row: row[_PART_OF_SPEECH],
+    'definitions': lambda row: row[_DEFINITIONS].split(_DEFINITION_SEP) if row[_DEFINITIONS] else [],
+    'notes': lambda row: row[_NOTES],
+}
+
+
+def _document(row: Row, fields: Optional[Sequence[str]] = None) -> dict:
+    if fields is not None:
+        # only the selected fields, so a summary never splits definitions
+        doc = {name: _FIELD_VALUES[name](row) for name in fields if name in _FIELD_VALUES}
+        if row[_EXTRA]:
+            doc.update((name, row[_EXTRA][name]) for name in fields if name in row[_EXTRA])
+        return doc
+    doc = {
+        'strongsNumber': row[_NUMBER],
+        'word': row[_WORD],
+        'language': row[_LANGUAGE],
+        'transliteration': row[_TRANSLITERATION],
+        'partOfSpeech': row[_PART_OF_SPEECH],
+        'definitions': row[_DEFINITIONS].split(_DEFINITION_SEP) if row[_DEFINITIONS] else [],
+        'notes': row[_NOTES],
+    }
+    if row[_EXTRA]:
+        doc.update(row[_EXTRA])
+    return doc
+
+
+class StrongsStore:
+    """In-memory Strong's lexicon indexed by strongsNumber."""
+
+    def __init__(self, rows: Iterable[Row]):
+        self._rows: Dict[int, Row] = {}
+        for row in rows:
+            # first occurrence wins, like find_one() on an unordered collection would usually return
+            self._rows.setdefault(row[_NUMBER], row)
+        # file order, which is what the JSON fallbacks used to return
+        self._order: List[int] = list(self._rows)
+        # numeric order, for after= pages
+        self._sorted: List[int] = sorted(self._rows)
+        self._text_index: Optional[TrigramIndex] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[dict]) -> 'StrongsStore':
+        return cls(row for row in map(_row, docs) if row is not None)
+
+    @classmethod
+    def from_json(cls, path: str = DEFAULT_PATH) -> 'StrongsStore':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_documents(json.load(f))
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH, cache_path: Optional[str] = None) -> 'StrongsStore':
+        """Load from the compact cache when it matches `path`, else parse the JSON (and write the cache)."""
+        info = os.stat(path)
+        signature = (CACHE_FORMAT, os.path.abspath(path), info.st_size, info.st_mtime_ns)
+        if cache_path and _private_file(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    cached_signature, rows = pickle.load(f)
+                if cached_signature == signature:
+                    return cls(rows)
+            except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+                pass
+        store = cls.from_json(path)
+        if cache_path:
+            store._write_cache(cache_path, signature)
+        return store
+
+    def _write_cache(self, cache_path: str, signature) -> None:
+        tmp = f'{cache_path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(cache_path) or '.', mode=0o700, exist_ok=True)
+            with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+                pickle.dump((signature, [self._rows[n] for n in self._order]), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache_path)
+        except OSError:
+            logging.warning("strongs: could not write the lexicon cache %s", cache_path)
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    # -------------------------------
+    # Lookups
+    # -------------------------------
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, number) -> bool:
+        return parse_number(number) in self._rows
+
+    def numbers(self) -> List[int]:
+        return list(self._order)
+
+    def get(self, number, fields: Optional[Sequence[str]] = None) -> Optional[dict]:
+        """The entry for 1234 / '1234' / 'H1234', or None; only `fields` when given."""
+        row = self._rows.get(parse_number(number))
+        return _document(row, fields) if row is not None else None
+
+    def get_many(self, numbers: Iterable, fields: Optional[Sequence[str]] = None) -> List[dict]:
+        """Entries for `numbers` in the given order, skipping unknown ones."""
+        rows = (self._rows.get(parse_number(n)) for n in numbers)
+        return [_document(row, fields) for row in rows if row is not None]
+
+    def entries(self, language: Optional[str] = None, limit: Optional[int] = None,
+                after: Optional[int] = None, fields: Optional[Sequence[str]] = None) -> Iterator[dict]:
+        """Entries in file order, optionally of one language ('heb', 'arc', 'x-pn').
+
+        With `after`, entries with a greater strongsNumber in numeric order
+        (keyset pagination: pass the last number of the previous page).
+        """
+        order = self._order if after is None else self._sorted[bisect_right(self._sorted, after):]
+        produced = 0
+        for number in order:
+            if limit is not None and produced >= limit:
+                return
+            row = self._rows[number]
+            if language and row[_LANGUAGE] != language:
+                continue
+            produced += 1
+            yield _document(row, fields)
+
+    # -------------------------------
+    # Search
+    # -------------------------------
+    def find_word(self, fragment: str, language: Optional[str] = None, limit: int = 20) -> List[dict]:
+        """Entries whose Hebrew `word` contains `fragment`."""
+        found = []
+        if not fragment or limit <= 0:
+            return found
+        for number in self._order:
+            row = self._rows[number]
+            if fragment in row[_WORD] and (not language or row[_LANGUAGE] == language):
+                found.append(_document(row))
+                if len(found) >= limit:
+                    break
+        return found
+
+    def text_index(self) -> TrigramIndex:
+        """Trigram index over word/transliteration/definitions, built on first use."""
+        index = self._text_index
+        if index is None:
+            with self._lock:
+                if self._text_index is None:
+                    with span('strongs-index'):
+                        self._text_index = TrigramIndex(
+                            (n, (row[_WORD], row[_TRANSLITERATION], row[_DEFINITIONS]))
+                            for n, row in self._rows.items()
+                        )
+                index = self._text_index
+        return index
+
+    def search(self, query: str, language: Optional[str] = None, limit: int = 100,
+               fields: Optional[Sequence[str]] = None) -> List[dict]:
+        """Ranked matches of `query` in word, transliteration or definitions.
+
+        Matching is case- and diacritic-insensitive (see backend/strongs_index.py).
+        A query that is a Strong's number ('H1234' or '1234') returns that entry.
+        """
+        query = (query or '').strip()
+        if not query or limit <= 0:
+            return []
+        number = parse_number(query)
+        if number is not None:
+            row = self._rows.get(number)
+            return [_document(row, fields)] if row is not None and (not language or row[_LANGUAGE] == language) else []
+        accept = None
+        if language:
+            rows = self._rows
+            accept = lambda n: rows[n][_LANGUAGE] == language
+        return [_document(self._rows[n], fields) for n in self.text_index().search(query, limit, accept)]
+
+
+_store: Optional[StrongsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> StrongsStore:
+    """The process-wide store, loaded on first use."""
+    global _store
+    store = _store
+    if store is None:
+        with _store_lock:
+            if _store is None:
+                from config import STRONGS_JSON_PATH, STRONGS_CACHE
+                with span('strongs-load'):
+                    _store = StrongsStore.load(STRONGS_JSON_PATH or DEFAULT_PATH, STRONGS_CACHE or None)
+                logging.info(f"Loaded {len(_store)} Strong's entries")
+            store = _store
+    return store
+
+
+def reset_store() -> None:
+    """Drop the loaded store (the next get_store() reloads it)."""
+    global _store
+    with _store_lock:
+        _store = None
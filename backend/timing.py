@@ -0,0 +1,190 @@
+"""
+Per-request phase timing.
+
+Code marks phases with span()/timed() and counts events with count(). While
+a request is active, totals are accumulated per phase name and sent back as
+a Server-Timing header (visible in the browser devtools network tab), and
+optionally logged as one JSON line per request. Outside a request (scripts,
+background jobs) span() and count() do nothing beyond a context-var lookup,
+so the instrumentation can stay on in production.
+
+Spans nest and are inclusive: a 'dawn-cycles' span includes the 'dawn'
+spans solved inside it.
+"""
+
+from typing import Dict, Optional
+import contextvars
+import functools
+import json
+import logging
+import time
+
+logger = logging.getLogger('timing')
+
+_current: contextvars.ContextVar = contextvars.ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """Accumulated span durations (ms) and counters for one request."""
+
+    __slots__ = ('start', 'spans', 'counters')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: Dict[str, list] = {}
+        self.counters: Dict[str, int] = {}
+
+    def add(self, name: str, ms: float, n: int = 1) -> None:
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [ms, n]
+        else:
+            entry[0] += ms
+            entry[1] += n
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000.0
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: spans with dur/calls, counters as desc-only metrics."""
+        parts = [f'total;dur={self.elapsed_ms():.1f}']
+        for name, (ms, n) in self.spans.items():
+            parts.append(f'{name};dur={ms:.1f};desc="{n}x"')
+        for name, n in self.counters.items():
+            parts.append(f'{name};desc="{n}"')
+        return ', '.join(parts)
+
+    def as_dict(self) -> dict:
+        return {
+            'total_ms': round(self.elapsed_ms(), 2),
+            'spans': {name: {'ms': round(ms, 2), 'calls': n} for name, (ms, n) in self.spans.items()},
+            'counters': dict(self.counters),
+        }
+
+
+def begin() -> RequestTiming:
+    """Start collecting for the current request/thread; returns the collector."""
+    timing = RequestTiming()
+    _current.set(timing)
+    return timing
+
+
+def end() -> Optional[RequestTiming]:
+    """Stop collecting; returns what was collected (None if nothing was active)."""
+    timing = _current.get()
+    _current.set(None)
+    return timing
+
+
+def current() -> Optional[RequestTiming]:
+    return _current.get()
+
+
+def add(name: str, ms: float, n: int = 1) -> None:
+    """Record an externally measured duration (e.g. from a driver event)."""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(name, ms, n)
+
+
+def count(name: str, n: int = 1) -> None:
+    timing = _current.get()
+    if timing is not None:
+        timing.count(name, n)
+
+
+class span:
+    """Context manager timing one phase: `with span('astro'): ...`."""
+
+    __slots__ = ('name', '_timing', '_start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self._timing = _current.get()
+        if self._timing is not None:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._timing is not None:
+            self._timing.add(self.name, (time.perf_counter() - self._start) * 1000.0)
+        return False
+
+
+def timed(name: str):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+try:
+    from pymongo import monitoring as _mongo_monitoring
+
+    class MongoCommandTimer(_mongo_monitoring.CommandListener):
+        """Adds every MongoDB command's server round trip to the 'mongo' span."""
+
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            add('mongo', event.duration_micros / 1000.0)
+
+        def failed(self, event):
+            add('mongo', event.duration_micros / 1000.0)
+            count('mongo-errors')
+except ImportError:  # pragma: no cover
+    MongoCommandTimer = None
+
+
+def init_app(app, header: bool = True, log_json: bool = False) -> None:
+    """Collect timings for every request of a Flask app.
+
+    header: add a Server-Timing header to responses
+    log_json: log one JSON line per request on the 'timing' logger
+    """
+    from flask import request
+
+    if not (header or log_json):
+        return
+
+    @app.before_request
+    def _timing_begin():
+        begin()
+
+    @app.after_request
+    def _timing_finish(response):
+        timing = end()
+        if timing is None:
+            return response
+        if header:
+            response.headers['Server-Timing'] = timing.server_timing()
+        if log_json:
+            record = {'method': request.method, 'path': request.path, 'status': response.status_code}
+            record.update(timing.as_dict())
+            logger.info(json.dumps(record, separators=(',', ':')))
+        return response
+
+    @app.teardown_request
+    def _timing_teardown(exc):
+        # after_request is skipped on unhandled errors; don't leak into the next request
+        _current.set(None)
+
+    # time JSON encoding of responses (jsonify) as its own phase
+    provider = app.json
+    build = provider.response
+
+    def response(*args, **kwargs):
+        with span('json'):
+            return build(*args, **kwargs)
+
+    provider.response = response
@@ -0,0 +1,24 @@
+"""End-to-end request benchmarks through the Flask test client."""
+
+import pytest
+
+from benchmarks.conftest import TEMPERATE
+
+
+@pytest.fixture(scope='module')
+def client():
+    from app import app
+    app.config['TESTING'] = True
+    with app.test_client() as c:
+        yield c
+
+
+def bench_select_location(benchmark, client):
+    name, lat, lon, _ = TEMPERATE
+    payload = {'lat': lat, 'lon': lon, 'name': name, 'year': 2025}
+
+    def post():
+        return client.post('/select-location', json=payload)
+
+    response = benchmark(post)
+    assert response.status_code == 200
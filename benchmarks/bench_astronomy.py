@@ -0,0 +1,37 @@
+"""Benchmarks for the sun/moon/year calculations behind every calendar request."""
+
+import pytest
+
+from backend.astronomy.sun import get_event_with_fallback
+from backend.astronomy.moon import find_prev_next_full_moon, find_first_dawn_after, count_dawn_cycles
+from backend.astronomy.years import get_multi_year_calendar_data
+
+from benchmarks.conftest import EVENT_CASES, REFERENCE_UTC, TEMPERATE
+
+
+@pytest.mark.parametrize('case', sorted(EVENT_CASES))
+def bench_get_event_with_fallback(benchmark, case):
+    (_, lat, lon, tzname), day = EVENT_CASES[case]
+    result = benchmark(get_event_with_fallback, 'dawn', lat, lon, tzname, day)
+    assert len(result) == 2
+
+
+def bench_find_prev_next_full_moon(benchmark, full_moon_data):
+    prev_full, next_full = benchmark(find_prev_next_full_moon, REFERENCE_UTC)
+    assert prev_full < REFERENCE_UTC < next_full
+
+
+def bench_count_dawn_cycles(benchmark, full_moon_data):
+    _, lat, lon, tzname = TEMPERATE
+    prev_full, next_full = find_prev_next_full_moon(REFERENCE_UTC)
+    start, _ = find_first_dawn_after(prev_full, lat, lon, tzname)
+    end, _ = find_first_dawn_after(next_full, lat, lon, tzname)
+    days = benchmark(count_dawn_cycles, start, end, lat, lon, tzname)
+    assert days in (29, 30)
+
+
+@pytest.mark.parametrize('years', [1, 3, 10])
+def bench_get_multi_year_calendar_data(benchmark, full_moon_data, years):
+    _, lat, lon, tzname = TEMPERATE
+    result = benchmark(get_multi_year_calendar_data, 2024, 2024 + years - 1, lat, lon, tzname)
+    assert len(result) == years
@@ -0,0 +1,25 @@
+"""One month-length heatmap render at reduced resolution (10° grid, 400 px)."""
+
+from datetime import datetime
+
+import pytz
+
+from backend.astronomy import projection
+from backend.astronomy.map import generate_lunar_heatmaps as heatmaps
+
+FULL_MOON = pytz.UTC.localize(datetime(2025, 3, 14, 6, 54, 35, 375838))
+
+
+def bench_month_length_heatmap(benchmark, full_moon_data, monkeypatch, tmp_path):
+    monkeypatch.setattr(heatmaps, 'LAT_STEP', 10.0)
+    monkeypatch.setattr(heatmaps, 'LON_STEP', 10.0)
+    monkeypatch.setattr(heatmaps, 'SIZE_PX', 400)
+    monkeypatch.setattr(heatmaps, 'GRID_DIR', str(tmp_path / 'grids'))
+    monkeypatch.setattr(projection, 'CACHE_DIR', str(tmp_path / 'projection'))
+    out = tmp_path / 'heatmap.png'
+
+    result = benchmark.pedantic(
+        heatmaps.generate_heatmap_for_date, args=(FULL_MOON, str(out)),
+        kwargs={'vectors': False}, rounds=3, iterations=1,
+    )
+    assert result == str(out) and out.exists()
@@ -0,0 +1,64 @@
+"""KJV inverted index: build time and per-query latency.
+
+Uses backend/data/verses.json when it exists; otherwise a seeded synthetic
+corpus of the same size (31,102 verses, ~25 words and ~12 Strong's numbers
+each) so the numbers stay comparable between machines without the data.
+"""
+
+import os
+import random
+
+import pytest
+
+from backend.kjv_index import DEFAULT_PATH, KjvIndex
+
+VERSES = 31102
+_WORDS = ('and the of unto that he shall lord his for they be is him not them it with all thou '
+          'thy was god which my me said but ye their have will thee from as are when this out were '
+          'upon man by you israel king son up there hath then people came had house on into her '
+          'egypt egyptians pharaoh moses land children day earth go hand').split()
+
+
+def _synthetic():
+    rng = random.Random(1611)
+    return [{'book': 'Synthetic', 'chapter': i // 30 + 1, 'verse': i % 30 + 1,
+             'text': ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(10, 40))),
+             'strongsNumbers': [f'H{rng.randint(1, 8674)}' for _ in range(rng.randint(4, 20))]}
+            for i in range(VERSES)]
+
+
+@pytest.fixture(scope='module')
+def verses():
+    if os.path.exists(DEFAULT_PATH):
+        import json
+        with open(DEFAULT_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return _synthetic()
+
+
+@pytest.fixture(scope='module')
+def index(verses):
+    # no result cache: every round does the full lookup and count
+    return KjvIndex(verses, cache_size=0)
+
+
+def bench_kjv_index_build(benchmark, verses):
+    built = benchmark.pedantic(KjvIndex, args=(verses,), rounds=3, iterations=1)
+    benchmark.extra_info['words'] = len(built.words())
+    assert len(built) == len(verses)
+
+
+def bench_kjv_common_word(benchmark, index):
+    # every matching verse is counted for the frequencies, not just the page
+    result = benchmark(index.search, 'the', 0, 20)
+    assert result['totalVerses'] > 20
+
+
+def bench_kjv_prefix(benchmark, index):
+    result = benchmark(index.search, 'egypt', 0, 20)
+    assert result['strongsFrequency']
+
+
+def bench_kjv_phrase(benchmark, index):
+    result = benchmark(index.search, 'the land of', 0, 20)
+    assert 0 < len(result['verses']) <= 20
@@ -0,0 +1,114 @@
+"""Resident Strong's lexicon: load time, memory footprint and per-query latency.
+
+Memory is measured with tracemalloc and attached to the load benchmarks as
+extra_info (`resident_bytes`), next to the size of the plain json.load()
+result the JSON fallbacks used to build on every request.
+"""
+
+import json
+import tracemalloc
+
+import pytest
+
+from backend.strongs_store import DEFAULT_PATH, StrongsStore
+
+
+def _allocated(build):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        obj = build()
+        return obj, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def _json_load():
+    with open(DEFAULT_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='module')
+def store():
+    s = StrongsStore.from_json()
+    s.text_index()  # built once, on the first text search
+    return s
+
+
+def bench_json_load_per_request(benchmark):
+    """What each Mongo-less request used to pay before any filtering."""
+    _, size = _allocated(_json_load)
+    benchmark.extra_info['resident_bytes'] = size
+    data = benchmark.pedantic(_json_load, rounds=5, iterations=1)
+    assert len(data) == 8674
+
+
+def bench_store_from_json(benchmark):
+    store, size = _allocated(StrongsStore.from_json)
+    benchmark.extra_info['resident_bytes'] = size
+    result = benchmark.pedantic(StrongsStore.from_json, rounds=5, iterations=1)
+    assert len(result) == len(store) == 8674
+
+
+def bench_store_from_cache(benchmark, tmp_path):
+    cache = str(tmp_path / 'strongs.pickle')
+    StrongsStore.load(DEFAULT_PATH, cache)
+    result = benchmark.pedantic(StrongsStore.load, args=(DEFAULT_PATH, cache), rounds=5, iterations=1)
+    assert len(result) == 8674
+
+
+def bench_get_by_number(benchmark, store):
+    entry = benchmark(store.get, 'H3001')
+    assert entry['strongsNumber'] == 3001
+
+
+def bench_find_hebrew_word(benchmark, store):
+    found = benchmark(store.find_word, 'אב', 'heb', 20)
+    assert found
+
+
+def bench_text_index_build(benchmark):
+    store = StrongsStore.from_json()
+    index = benchmark.pedantic(lambda: StrongsStore(store._rows.values()).text_index(), rounds=3, iterations=1)
+    benchmark.extra_info['trigrams'] = len(index.postings())
+
+
+def bench_text_search(benchmark, store):
+    found = benchmark(store.search, 'father', None, 100)
+    assert found
+
+
+def bench_text_search_transliteration(benchmark, store):
+    # diacritic-insensitive: matches yâbêsh
+    found = benchmark(store.search, 'yabesh', None, 100)
+    assert [e['strongsNumber'] for e in found] == [3001, 3002, 3003]
+
+
+def bench_text_search_short_query(benchmark, store):
+    # under three characters there is no trigram; this is the scan fallback
+    found = benchmark(store.search, 'ab', None, 20)
+    assert len(found) == 20
+
+
+@pytest.fixture(scope='module')
+def hebrew_trie(store):
+    from backend.hebrew_search import HebrewTrie
+    return HebrewTrie((e['strongsNumber'], e['word']) for e in store.entries())
+
+
+def bench_hebrew_trie_build(benchmark, store):
+    from backend.hebrew_search import HebrewTrie
+    words = [(e['strongsNumber'], e['word']) for e in store.entries()]
+    trie = benchmark.pedantic(HebrewTrie, args=(words,), rounds=3, iterations=1)
+    assert len(trie) == len(words)
+
+
+def bench_hebrew_prefix_pointed(benchmark, hebrew_trie):
+    # type-ahead with niqqud and a final letter: matches the unpointed מלך
+    found = benchmark(hebrew_trie.search, 'מֶלֶךְ', 20)
+    assert 4428 in found
+
+
+def bench_hebrew_no_match(benchmark, hebrew_trie):
+    # worst case: no prefix match, so the infix scan runs as well
+    assert benchmark(hebrew_trie.search, 'זזזז', 20) == []
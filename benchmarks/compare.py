@@ -0,0 +1,115 @@
+"""
+Compare two saved benchmark runs and flag regressions.
+
+    python -m benchmarks.compare                      # latest run vs the one before
+    python -m benchmarks.compare --baseline 0003      # latest run vs run 0003
+    python -m benchmarks.compare OLD.json NEW.json --threshold 0.2 --stat median
+
+Runs are the JSON files pytest-benchmark writes with --benchmark-autosave
+(benchmarks/history/<machine>/NNNN_*.json). Exits with status 1 when any
+benchmark's statistic (default: min) grew by more than --threshold (default 15%).
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history')
+
+
+def saved_runs(history_dir=HISTORY_DIR):
+    """Saved run files, oldest first (pytest-benchmark numbers them NNNN_...)."""
+    paths = glob.glob(os.path.join(history_dir, '*', '*.json'))
+    return sorted(paths, key=lambda p: (os.path.basename(p), os.path.getmtime(p)))
+
+
+def resolve_run(ref, runs):
+    """A run path from a file path or a run number prefix such as '0003'."""
+    if os.path.exists(ref):
+        return ref
+    matches = [p for p in runs if os.path.basename(p).startswith(ref)]
+    if not matches:
+        raise SystemExit(f"No saved run matches {ref!r}")
+    return matches[-1]
+
+
+def load_stats(path, stat):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {b['fullname']: b['stats'][stat] for b in data.get('benchmarks', [])}
+
+
+def compare(baseline, current, threshold=0.15):
+    """Rows (name, old, new, change, status) for every benchmark in either run."""
+    rows = []
+    for name in sorted(set(baseline) | set(current)):
+        old, new = baseline.get(name), current.get(name)
+        if old is None or new is None:
+            rows.append((name, old, new, None, 'new' if old is None else 'removed'))
+            continue
+        change = (new - old) / old if old else 0.0
+        if change > threshold:
+            status = 'REGRESSION'
+        elif change < -threshold:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((name, old, new, change, status))
+    return rows
+
+
+def _fmt_seconds(value):
+    if value is None:
+        return '-'
+    if value < 1e-3:
+        return f'{value * 1e6:.1f}us'
+    if value < 1:
+        return f'{value * 1e3:.2f}ms'
+    return f'{value:.3f}s'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two saved benchmark runs.')
+    parser.add_argument('runs', nargs='*', help='baseline and current run (paths or NNNN prefixes)')
+    parser.add_argument('--baseline', help='baseline run (default: the run before the current one)')
+    parser.add_argument('--history', default=HISTORY_DIR, help='pytest-benchmark storage directory')
+    parser.add_argument('--stat', default='min', choices=['min', 'max', 'mean', 'median'])
+    parser.add_argument('--threshold', type=float, default=0.15, help='relative slowdown that counts as a regression')
+    args = parser.parse_args(argv)
+
+    runs = saved_runs(args.history)
+    if len(args.runs) == 2:
+        base_path, cur_path = (resolve_run(r, runs) for r in args.runs)
+    else:
+        cur_path = resolve_run(args.runs[0], runs) if args.runs else (runs[-1] if runs else None)
+        if cur_path is None:
+            raise SystemExit(f"No saved runs in {args.history}; run `python -m pytest benchmarks --benchmark-autosave` first")
+        if args.baseline:
+            base_path = resolve_run(args.baseline, runs)
+        else:
+            earlier = [p for p in runs if p != cur_path and os.path.basename(p) < os.path.basename(cur_path)]
+            if not earlier:
+                raise SystemExit('Need at least two saved runs to compare')
+            base_path = earlier[-1]
+
+    rows = compare(load_stats(base_path, args.stat), load_stats(cur_path, args.stat), args.threshold)
+    print(f"baseline: {os.path.basename(base_path)}")
+    print(f"current:  {os.path.basename(cur_path)}")
+    print(f"stat: {args.stat}, threshold: {args.threshold:.0%}\n")
+    width = max([len(r[0]) for r in rows] + [9])
+    print(f"{'benchmark':<{width}}  {'baseline':>10}  {'current':>10}  {'change':>8}  status")
+    for name, old, new, change, status in rows:
+        change_s = '-' if change is None else f'{change:+.1%}'
+        print(f"{name:<{width}}  {_fmt_seconds(old):>10}  {_fmt_seconds(new):>10}  {change_s:>8}  {status}")
+
+    regressions = [r for r in rows if r[4] == 'REGRESSION']
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Shared fixtures for the performance benchmarks (pytest-benchmark).
+
+Inputs are fixed (locations, dates, full moons) so runs are comparable over
+time. Runs saved with --benchmark-autosave go to benchmarks/history/ as JSON;
+compare the last two with `python -m benchmarks.compare`.
+"""
+
+import os
+import sys
+from datetime import date, datetime
+
+import pytest
+import pytz
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+HISTORY_DIR = os.path.join(BENCH_DIR, 'history')
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+# (name, lat, lon, tzname)
+TEMPERATE = ('Jerusalem', 31.7683, 35.2137, 'Asia/Jerusalem')
+POLAR = ('Longyearbyen', 78.2232, 15.6267, 'Arctic/Longyearbyen')
+
+# get_event_with_fallback cases: the temperate path returns on the first try,
+# polar summer/winter walk the whole fallback chain
+EVENT_CASES = {
+    'temperate': (TEMPERATE, date(2025, 3, 20)),
+    'polar_summer': (POLAR, date(2025, 6, 21)),
+    'polar_winter': (POLAR, date(2025, 12, 21)),
+}
+
+# A fixed reference instant (between the 2025-03-14 and 2025-04-13 full moons)
+REFERENCE_UTC = pytz.UTC.localize(datetime(2025, 3, 20, 12, 0, 0))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # keep saved runs next to the suite regardless of the working directory
+    if getattr(config.option, 'benchmark_storage', None) == 'file://./.benchmarks':
+        config.option.benchmark_storage = 'file://' + HISTORY_DIR
+
+
+@pytest.fixture(scope='session')
+def full_moon_data():
+    """Load the CSV-backed full moon / new year tables once per session."""
+    from backend.data import load_full_moon_times, load_new_years_days
+    load_full_moon_times()
+    load_new_years_days()
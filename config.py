@@ -14,6 +14,58 @@ if not GEOAPIFY_API_KEY:
 # Defaults to local dev port; set in Vercel to your deployed service URL
 ASTRO_API_BASE = os.getenv("ASTRO_API_BASE", "http://localhost:8001")
 
+# In-process heatmap job queue (see backend/jobs.py). Rendering is CPU-bound,
+# so keep the pool small; the queue bound caps memory for full backfills.
+HEATMAP_JOB_WORKERS = int(os.getenv("HEATMAP_JOB_WORKERS", "1"))
+HEATMAP_JOB_MAX_QUEUED = int(os.getenv("HEATMAP_JOB_MAX_QUEUED", "2000"))
+# Render each month from an adjacent month's class grid when one is saved.
+# Faster but approximate (small islands can be missed), so off by default
+HEATMAP_INCREMENTAL = os.getenv("HEATMAP_INCREMENTAL", "0").lower() in ("1", "true", "yes")
+
+# Per-request phase timing (backend/timing.py): Server-Timing response header
+# and, optionally, one JSON log line per request on the "timing" logger
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1").lower() in ("1", "true", "yes")
+SERVER_TIMING_LOG = os.getenv("SERVER_TIMING_LOG", "0").lower() in ("1", "true", "yes")
+
+# Prometheus-style /metrics (backend/metrics.py); scrapes must send
+# "Authorization: Bearer <METRICS_TOKEN>". Served only when a token is set,
+# unless METRICS_ENABLED=1 explicitly opens it without one
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1" if METRICS_TOKEN else "0").lower() in ("1", "true", "yes")
+
+# Opt-in request profiling (backend/profiling.py): ?__profile=1 with PROFILE_TOKEN,
+# and/or every PROFILE_SAMPLE_EVERY-th request (0 = off) into a ring buffer of
+# PROFILE_MAX_ENTRIES profiles under PROFILE_DIR (default: <tmp>/quantum-calendar-profiles)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN") or None
+PROFILE_SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR") or None
+PROFILE_MAX_ENTRIES = int(os.getenv("PROFILE_MAX_ENTRIES", "50"))
+
+# Single-flight coalescing of identical calendar/sun computations (backend/singleflight.py).
+# SINGLEFLIGHT_DIR holds the cross-worker lock/result files (default "" = per-process only);
+# it must be a directory only this user can access (created 0700 when missing)
+SINGLEFLIGHT_DIR = os.getenv("SINGLEFLIGHT_DIR", "")
+SINGLEFLIGHT_TIMEOUT = float(os.getenv("SINGLEFLIGHT_TIMEOUT", "60"))
+SINGLEFLIGHT_SHARE_TTL = float(os.getenv("SINGLEFLIGHT_SHARE_TTL", "5"))
+
+# Response encoding (backend/encoding.py): JSON_ENCODER is auto|orjson|stdlib;
+# JSON/text bodies of at least COMPRESS_MIN_SIZE bytes are gzip/brotli-compressed
+JSON_ENCODER = os.getenv("JSON_ENCODER", "auto")
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+
+# Resident Strong's lexicon (backend/strongs_store.py) used when MongoDB is unavailable.
+# STRONGS_CACHE is a precompiled row cache, a pickle (default "" = always parse STRONGS_JSON_PATH);
+# point it into a directory only the app's user can write. Anything else is ignored.
+STRONGS_JSON_PATH = os.getenv("STRONGS_JSON_PATH") or None
+STRONGS_CACHE = os.getenv("STRONGS_CACHE", "")
+# /api/hebrew-search type-ahead trie (backend/hebrew_search.py) is rebuilt after this many seconds
+HEBREW_INDEX_TTL = float(os.getenv("HEBREW_INDEX_TTL", "3600"))
+# /api/etymology-tree: server-side result cache and Cache-Control max-age, in seconds
+ETYMOLOGY_CACHE_TTL = int(os.getenv("ETYMOLOGY_CACHE_TTL", "3600"))
+# Create the indexes declared in backend/mongo_indexes.py after connecting (once per change)
+MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "1").lower() in ("1", "true", "yes")
+
 # MongoDB Atlas configuration
 import os
 from datetime import timedelta
@@ -226,20 +226,40 @@ document.addEventListener('DOMContentLoaded', function() {
         }
 
         if (currentContainer) {
-            // Check if image exists by trying to load it
-            const img = new Image();
-            img.onload = function() {
-                currentContainer.innerHTML = `<img src="${imagePath}" alt="Lunar month heatmap" style="width: 100%; height: auto; border-radius: 8px;">`;
-                console.log('Heatmap loaded successfully:', imagePath);
+            // Prefer the projected SVG (<name>.svg next to the PNG): smaller and sharp at any zoom.
+            // Months rendered before vectors were exported only have the PNG.
+            const svgPath = imagePath.replace(/\.png$/, '.svg');
+            const showImage = function(src) {
+                if (src === svgPath) {
+                    // The SVG holds only the translucent classes; the shared base map sits underneath
+                    currentContainer.innerHTML = `<div style="position: relative;">` +
+                        `<img src="/static/img/map/base-map.jpg" alt="Lunar month heatmap" style="width: 100%; height: auto; border-radius: 8px; display: block;">` +
+                        `<img src="${src}" alt="" style="position: absolute; top: 0; left: 0; width: 100%; height: 100%; border-radius: 8px;">` +
+                        `</div>`;
+                } else {
+                    currentContainer.innerHTML = `<img src="${src}" alt="Lunar month heatmap" style="width: 100%; height: auto; border-radius: 8px;">`;
+                }
+                console.log('Heatmap loaded successfully:', src);
 
                 // Render location pins after image loads
                 setTimeout(renderLocationPins, 100);
             };
+            const img = new Image();
+            img.onload = function() {
+                showImage(svgPath);
+            };
             img.onerror = function() {
-                console.log('Heatmap not found, showing fallback:', imagePath);
-                showHeatmapFallback();
+                const pngImg = new Image();
+                pngImg.onload = function() {
+                    showImage(imagePath);
+                };
+                pngImg.onerror = function() {
+                    console.log('Heatmap not found, showing fallback:', imagePath);
+                    showHeatmapFallback();
+                };
+                pngImg.src = imagePath;
             };
-            img.src = imagePath;
+            img.src = svgPath;
         } else {
             console.error('Could not find or create current-heatmap container element');
         }
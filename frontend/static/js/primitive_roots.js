@@ -20,7 +20,7 @@ class PrimitiveRootsAnalyzer {
         try {
             // Load the complete Strong's dataset and KJV verses from backend
             console.log('Attempting to load from API...');
-            const strongsResponse = await fetch('/api/strongs-data?limit=100');
+            const strongsResponse = await fetch('/api/strongs-data?limit=100&fields=strongsNumber,word,language,transliteration,partOfSpeech,definitions');
             const versesResponse = await fetch('/api/kjv-data?limit=100');
             
             if (strongsResponse.ok) {
@@ -0,0 +1,154 @@
+"""
+Local stand-in for astro-service (see astro-service/app/main.py).
+
+Serves the same endpoints with cheap closed-form approximations instead of
+Skyfield, plus configurable latency and error rate, so the Flask app can be
+load-tested without the real service:
+
+    python -m loadtest.fake_astro --port 8001 --latency-ms 40 --jitter-ms 20 --error-rate 0.01
+
+Values are plausible, not accurate; only response shape and timing matter.
+"""
+
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import argparse
+import json
+import math
+import random
+import threading
+import time
+
+SYNODIC_DAYS = 29.530588853
+# a reference new moon (2000-01-06 18:14 UTC)
+NEW_MOON_EPOCH = datetime(2000, 1, 6, 18, 14, tzinfo=timezone.utc)
+
+
+def _parse_iso(s):
+    return datetime.fromisoformat(s.replace('Z', '+00:00')).astimezone(timezone.utc)
+
+
+def moon_percent(dt):
+    age = ((dt - NEW_MOON_EPOCH).total_seconds() / 86400.0) % SYNODIC_DAYS
+    return (1.0 - math.cos(2.0 * math.pi * age / SYNODIC_DAYS)) / 2.0 * 100.0
+
+
+def sun_subpoint(dt):
+    doy = dt.timetuple().tm_yday
+    lat = 23.44 * math.sin(2.0 * math.pi * (doy - 81) / 365.0)
+    hours = dt.hour + dt.minute / 60.0 + dt.second / 3600.0
+    lon = ((12.0 - hours) * 15.0 + 180.0) % 360.0 - 180.0
+    return lat, lon
+
+
+def moon_subpoint(dt):
+    age = ((dt - NEW_MOON_EPOCH).total_seconds() / 86400.0) % SYNODIC_DAYS
+    sun_lat, sun_lon = sun_subpoint(dt)
+    lon = (sun_lon - 360.0 * age / SYNODIC_DAYS + 180.0) % 360.0 - 180.0
+    lat = 5.1 * math.sin(2.0 * math.pi * age / 27.2122) + sun_lat * math.cos(2.0 * math.pi * age / SYNODIC_DAYS)
+    return lat, lon
+
+
+class FakeAstroServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=None):
+        super().__init__(address, _Handler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def draw(self):
+        """(delay seconds, fail?) for one request."""
+        with self._rng_lock:
+            self.requests += 1
+            delay = max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) / 1000.0 if self.jitter_ms else self.latency_ms / 1000.0
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'fake-astro/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        delay, fail = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self._send(503, {'detail': 'injected failure'})
+        try:
+            if url.path == '/health':
+                return self._send(200, {'ok': True})
+            isos = params.get('iso') or []
+            if url.path == '/illumination/moon-batch':
+                return self._send(200, [{'iso': s, 'percent': moon_percent(_parse_iso(s))} for s in isos])
+            if not isos:
+                return self._send(422, {'detail': 'iso is required'})
+            iso = isos[0]
+            dt = _parse_iso(iso)
+            if url.path == '/illumination/moon':
+                return self._send(200, {'iso': iso, 'percent': moon_percent(dt)})
+            if url.path == '/position/sun':
+                lat, lon = sun_subpoint(dt)
+                return self._send(200, {'iso': iso, 'lat': lat, 'lon': lon})
+            if url.path == '/position/moon':
+                lat, lon = moon_subpoint(dt)
+                return self._send(200, {'iso': iso, 'lat': lat, 'lon': lon})
+        except ValueError as e:
+            return self._send(422, {'detail': str(e)})
+        return self._send(404, {'detail': 'Not Found'})
+
+
+def start_fake_astro(host='127.0.0.1', port=0, **kwargs):
+    """Start a FakeAstroServer on a daemon thread; port 0 picks a free port."""
+    server = FakeAstroServer((host, port), **kwargs)
+    thread = threading.Thread(target=server.serve_forever, name='fake-astro', daemon=True)
+    thread.start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fake astro-service for load tests.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='mean added latency per request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='std-dev of the added latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with 503')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+    server = FakeAstroServer((args.host, args.port), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                             error_rate=args.error_rate, seed=args.seed)
+    print(f"🛰️  fake astro-service on {server.base_url} (latency {args.latency_ms}±{args.jitter_ms} ms, errors {args.error_rate:.1%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,648 @@
+"""
+In-memory stand-in for the parts of pymongo the app uses.
+
+MemoryMongoClient()[db][collection] supports find / find_one (filters with
+$or/$and/$nor, $regex/$options, $in/$nin, $exists, $eq/$ne, $gt/$gte/$lt/$lte,
+array-contains matching and dotted paths; include/exclude and $slice
+projections; limit/skip/sort cursors), count_documents, aggregate ($match,
+$project, $unwind, $group with $sum/$avg/$min/$max/$first/$last/$push/
+$addToSet, $sort, $skip, $limit, $count), insert_one/insert_many,
+update_one/replace_one/delete_many, bulk_write (pymongo InsertOne,
+ReplaceOne, UpdateOne/UpdateMany with $set/$unset/$inc, DeleteOne/
+DeleteMany), create_index/index_information and rename. Databases support
+create_collection/drop_collection and list_collection_names(filter=...),
+which, like MongoDB, only lists collections that were created or written
+to. admin.command('ping') answers. An optional per-operation latency mimics
+an Atlas round trip. Used by the load-test harness so routes backed by
+MongoDB can run offline.
+"""
+
+import copy
+import itertools
+import json
+import operator
+import os
+import re
+import threading
+import time
+
+_MISSING = object()
+
+
+def _resolve(doc, path):
+    """Values at a dotted path; lists fan out like MongoDB's implicit array traversal."""
+    values = [doc]
+    for part in path.split('.'):
+        nxt = []
+        for v in values:
+            if isinstance(v, dict):
+                if part in v:
+                    nxt.append(v[part])
+            elif isinstance(v, list):
+                if part.isdigit() and int(part) < len(v):
+                    nxt.append(v[int(part)])
+                else:
+                    nxt.extend(item[part] for item in v if isinstance(item, dict) and part in item)
+        values = nxt
+    return values
+
+
+def _candidates(values):
+    # a field matches if the value itself or any array element matches
+    for v in values:
+        yield v
+        if isinstance(v, list):
+            yield from v
+
+
+def _regex(spec, options=''):
+    if isinstance(spec, re.Pattern):
+        return spec
+    flags = 0
+    for ch in options or '':
+        flags |= {'i': re.IGNORECASE, 'm': re.MULTILINE, 's': re.DOTALL, 'x': re.VERBOSE}.get(ch, 0)
+    return re.compile(spec, flags)
+
+
+def _compare(a, b, op):
+    try:
+        return op(a, b)
+    except TypeError:
+        return False
+
+
+def _match_operator(values, op, arg, spec):
+    cands = list(_candidates(values))
+    if op == '$eq':
+        return any(v == arg for v in cands)
+    if op == '$ne':
+        return not any(v == arg for v in cands)
+    if op == '$in':
+        return any(v == a or (isinstance(a, re.Pattern) and isinstance(v, str) and a.search(v)) for v in cands for a in arg)
+    if op == '$nin':
+        return not any(v == a for v in cands for a in arg)
+    if op == '$exists':
+        return bool(values) == bool(arg)
+    if op == '$regex':
+        rx = _regex(arg, spec.get('$options', ''))
+        return any(isinstance(v, str) and rx.search(v) for v in cands)
+    if op == '$options':
+        return True
+    if op in ('$gt', '$gte', '$lt', '$lte'):
+        fn = {'$gt': operator.gt, '$gte': operator.ge, '$lt': operator.lt, '$lte': operator.le}[op]
+        return any(_compare(v, arg, fn) for v in cands if not isinstance(v, list))
+    if op == '$size':
+        return any(isinstance(v, list) and len(v) == arg for v in values)
+    if op == '$elemMatch':
+        return any(isinstance(v, list) and any(isinstance(e, dict) and matches(e, arg) for e in v) for v in values)
+    if op == '$not':
+        return not _match_field(values, arg)
+    raise NotImplementedError(f"MemoryCollection does not support {op}")
+
+
+def _match_field(values, spec):
+    if isinstance(spec, dict) and spec and all(k.startswith('$') for k in spec):
+        return all(_match_operator(values, op, arg, spec) for op, arg in spec.items())
+    if isinstance(spec, re.Pattern):
+        return any(isinstance(v, str) and spec.search(v) for v in _candidates(values))
+    if spec is None:
+        return not values or any(v is None for v in values)
+    return any(v == spec for v in _candidates(values))
+
+
+def matches(doc, query):
+    """True when doc satisfies a MongoDB-style filter."""
+    for key, spec in (query or {}).items():
+        if key == '$or':
+            if not any(matches(doc, q) for q in spec):
+                return False
+        elif key == '$and':
+            if not all(matches(doc, q) for q in spec):
+                return False
+        elif key == '$nor':
+            if any(matches(doc, q) for q in spec):
+                return False
+        elif not _match_field(_resolve(doc, key), spec):
+            return False
+    return True
+
+
+def _slice(value, arg):
+    if not isinstance(value, list):
+        return value
+    if isinstance(arg, (list, tuple)):
+        skip, n = arg
+        start = skip if skip >= 0 else max(0, len(value) + skip)
+        return value[start:start + n]
+    return value[:arg] if arg >= 0 else value[arg:]
+
+
+def _apply_slices(doc, slices):
+    for path, arg in slices.items():
+        parts = path.split('.')
+        target = doc
+        for part in parts[:-1]:
+            target = target.get(part) if isinstance(target, dict) else None
+        if isinstance(target, dict) and parts[-1] in target:
+            target[parts[-1]] = _slice(target[parts[-1]], arg)
+    return doc
+
+
+def project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    if isinstance(projection, (list, tuple)):
+        projection = {k: 1 for k in projection}
+    slices = {k: v['$slice'] for k, v in projection.items() if isinstance(v, dict) and '$slice' in v}
+    if slices:
+        # a $slice field is included with an inclusion projection, and leaves the rest alone otherwise
+        rest = {k: v for k, v in projection.items() if k not in slices}
+        if any(v for k, v in rest.items() if k != '_id'):
+            rest.update((k, 1) for k in slices)
+        return _apply_slices(project(doc, rest) if rest else copy.deepcopy(doc), slices)
+    include = {k for k, v in projection.items() if v and k != '_id'}
+    if include:
+        out = {}
+        if projection.get('_id', 1) and '_id' in doc:
+            out['_id'] = doc['_id']
+        for path in include:
+            src, dst = doc, out
+            parts = path.split('.')
+            for i, part in enumerate(parts):
+                if not isinstance(src, dict) or part not in src:
+                    break
+                if i == len(parts) - 1:
+                    dst[part] = copy.deepcopy(src[part])
+                else:
+                    src = src[part]
+                    dst = dst.setdefault(part, {})
+        return out
+    out = copy.deepcopy(doc)
+    for path, v in projection.items():
+        if v:
+            continue
+        parts = path.split('.')
+        target = out
+        for part in parts[:-1]:
+            target = target.get(part) if isinstance(target, dict) else None
+        if isinstance(target, dict):
+            target.pop(parts[-1], None)
+    return out
+
+
+def _sort_key_value(v):
+    # None sorts first, then numbers, then strings (close to BSON order)
+    return (v is not None, isinstance(v, str), v if v is not None else 0)
+
+
+def _sort_key(path):
+    def key(doc):
+        values = _resolve(doc, path)
+        return _sort_key_value(values[0] if values else None)
+    return key
+
+
+def _evaluate(doc, expr):
+    """Value of an aggregation expression: '$path', {field: expr} or a literal."""
+    if isinstance(expr, str) and expr.startswith('$'):
+        values = _resolve(doc, expr[1:])
+        return values[0] if values else None
+    if isinstance(expr, dict):
+        if any(k.startswith('$') for k in expr):
+            raise NotImplementedError(f"MemoryCollection does not support expression {expr!r}")
+        return {k: _evaluate(doc, v) for k, v in expr.items()}
+    return expr
+
+
+def _freeze(value):
+    # group keys may be dicts or lists
+    if isinstance(value, dict):
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _accumulate(op, values):
+    if op == '$sum':
+        return sum(v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool))
+    if op == '$avg':
+        numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+        return sum(numbers) / len(numbers) if numbers else None
+    if op in ('$min', '$max'):
+        present = [v for v in values if v is not None]
+        return (min if op == '$min' else max)(present, key=_sort_key_value) if present else None
+    if op == '$first':
+        return values[0] if values else None
+    if op == '$last':
+        return values[-1] if values else None
+    if op == '$push':
+        return list(values)
+    if op == '$addToSet':
+        out = []
+        for v in values:
+            if v not in out:
+                out.append(v)
+        return out
+    raise NotImplementedError(f"MemoryCollection does not support accumulator {op}")
+
+
+def _group(docs, spec):
+    groups = {}
+    for doc in docs:
+        key = _evaluate(doc, spec['_id'])
+        groups.setdefault(_freeze(key), (key, []))[1].append(doc)
+    out = []
+    for key, members in groups.values():
+        result = {'_id': key}
+        for field, accumulator in spec.items():
+            if field == '_id':
+                continue
+            (op, expr), = accumulator.items()
+            result[field] = _accumulate(op, [_evaluate(doc, expr) for doc in members])
+        out.append(result)
+    return out
+
+
+def _unwind(docs, spec):
+    if isinstance(spec, str):
+        spec = {'path': spec}
+    path = spec['path'][1:]
+    keep_empty = spec.get('preserveNullAndEmptyArrays', False)
+    parts = path.split('.')
+    for doc in docs:
+        values = _resolve(doc, path)
+        value = values[0] if values else None
+        if not isinstance(value, list):
+            if value is not None or keep_empty:
+                yield doc
+            continue
+        for item in value or ([_MISSING] if keep_empty else []):
+            out = copy.deepcopy(doc)
+            target = out
+            for part in parts[:-1]:
+                target = target[part]
+            if item is _MISSING:
+                # an empty array is kept as a document without the field
+                del target[parts[-1]]
+            else:
+                target[parts[-1]] = item
+            yield out
+
+
+def _sort_docs(docs, spec):
+    docs = list(docs)
+    for path, direction in reversed(list(spec.items())):
+        docs.sort(key=_sort_key(path), reverse=direction < 0)
+    return docs
+
+
+def run_pipeline(docs, pipeline):
+    """Documents out of an aggregation pipeline over `docs` (see the module docstring for the stages)."""
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == '$match':
+            docs = [d for d in docs if matches(d, spec)]
+        elif name == '$project':
+            docs = [project(d, spec) for d in docs]
+        elif name == '$unwind':
+            docs = list(_unwind(docs, spec))
+        elif name == '$group':
+            docs = _group(docs, spec)
+        elif name == '$sort':
+            docs = _sort_docs(docs, spec)
+        elif name == '$skip':
+            docs = list(docs)[spec:]
+        elif name == '$limit':
+            docs = list(docs)[:spec]
+        elif name == '$count':
+            docs = list(docs)
+            docs = [{spec: len(docs)}] if docs else []
+        else:
+            raise NotImplementedError(f"MemoryCollection does not support the {name} stage")
+    return list(docs)
+
+
+class MemoryCursor:
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._skip = 0
+        self._limit = 0
+        self._sort = []
+
+    def limit(self, n):
+        self._limit = int(n or 0)
+        return self
+
+    def skip(self, n):
+        self._skip = int(n or 0)
+        return self
+
+    def sort(self, key_or_list, direction=1):
+        if isinstance(key_or_list, str):
+            self._sort = [(key_or_list, direction)]
+        else:
+            self._sort = list(key_or_list)
+        return self
+
+    def __iter__(self):
+        self._collection._wait()
+        docs = self._collection._docs
+        if self._sort:
+            docs = [d for d in docs if matches(d, self._query)]
+            for path, direction in reversed(self._sort):
+                docs.sort(key=_sort_key(path), reverse=direction < 0)
+            it = iter(docs)
+        else:
+            it = (d for d in docs if matches(d, self._query))
+        stop = self._skip + self._limit if self._limit else None
+        for doc in itertools.islice(it, self._skip, stop):
+            yield project(doc, self._projection)
+
+
+class _InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class _InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+
+class _WriteResult:
+    def __init__(self):
+        self.inserted_count = self.matched_count = self.modified_count = 0
+        self.deleted_count = self.upserted_count = 0
+        self.upserted_id = None
+
+
+def _apply_update(doc, update):
+    """doc after an update document ($set/$unset/$inc) or a replacement."""
+    if not any(k.startswith('$') for k in update):
+        replaced = copy.deepcopy(update)
+        if '_id' in doc:
+            replaced['_id'] = doc['_id']
+        return replaced
+    doc = copy.deepcopy(doc)
+    for op, fields in update.items():
+        for path, value in fields.items():
+            parts = path.split('.')
+            target = doc
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            if op == '$set':
+                target[parts[-1]] = copy.deepcopy(value)
+            elif op == '$unset':
+                target.pop(parts[-1], None)
+            elif op == '$inc':
+                target[parts[-1]] = target.get(parts[-1], 0) + value
+            else:
+                raise NotImplementedError(f"MemoryCollection does not support {op}")
+    return doc
+
+
+def _upserted(query, update):
+    """New document for an upsert: the filter's equality fields plus the update."""
+    base = {k: v for k, v in query.items() if not k.startswith('$') and not isinstance(v, dict)}
+    return _apply_update(base, update)
+
+
+class MemoryCollection:
+    def __init__(self, name, docs=None, latency_ms=0.0, database=None):
+        self.name = name
+        self._docs = list(docs or [])
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.latency_ms = latency_ms
+        self.database = database
+        # MongoDB creates a collection on its first write (or create_collection)
+        self.created = docs is not None
+        self._indexes = {'_id_': {'key': [('_id', 1)]}}
+
+    def _wait(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+    def find(self, filter=None, projection=None):
+        return MemoryCursor(self, filter or {}, projection)
+
+    def find_one(self, filter=None, projection=None):
+        for doc in self.find(filter, projection).limit(1):
+            return doc
+        return None
+
+    def count_documents(self, filter=None):
+        self._wait()
+        return sum(1 for d in self._docs if matches(d, filter or {}))
+
+    def estimated_document_count(self):
+        return len(self._docs)
+
+    def aggregate(self, pipeline, **kwargs):
+        self._wait()
+        return iter(run_pipeline(self._docs, pipeline))
+
+    def _new_id(self, doc):
+        if '_id' not in doc:
+            doc['_id'] = f"mem{next(self._ids):020d}"
+        return doc['_id']
+
+    def insert_one(self, doc):
+        self._wait()
+        doc = copy.deepcopy(doc)
+        with self._lock:
+            inserted = self._new_id(doc)
+            self._docs = self._docs + [doc]
+        return _InsertOneResult(inserted)
+
+    def insert_many(self, docs):
+        self._wait()
+        docs = [copy.deepcopy(d) for d in docs]
+        with self._lock:
+            ids = [self._new_id(d) for d in docs]
+            self._docs = self._docs + docs
+            self.created = True
+        return _InsertManyResult(ids)
+
+    def _write(self, docs, result, kind, query, update=None, upsert=False, multi=False):
+        """Apply one write to the list `docs` in place, counting it in `result`."""
+        hits = [i for i, d in enumerate(docs) if matches(d, query)]
+        if not multi:
+            hits = hits[:1]
+        if kind == 'delete':
+            for i in reversed(hits):
+                del docs[i]
+            result.deleted_count += len(hits)
+            return
+        if not hits:
+            if upsert:
+                doc = _upserted(query, update)
+                result.upserted_id = self._new_id(doc)
+                result.upserted_count += 1
+                docs.append(doc)
+            return
+        for i in hits:
+            if kind == 'replace' and any(k.startswith('$') for k in update):
+                raise ValueError('replacement document must not contain update operators')
+            new = _apply_update(docs[i], update)
+            result.matched_count += 1
+            result.modified_count += new != docs[i]
+            docs[i] = new
+
+    def _commit(self, ops):
+        self._wait()
+        result = _WriteResult()
+        with self._lock:
+            docs = list(self._docs)
+            for kind, args in ops:
+                if kind == 'insert':
+                    doc = copy.deepcopy(args)
+                    self._new_id(doc)
+                    docs.append(doc)
+                    result.inserted_count += 1
+                else:
+                    self._write(docs, result, kind, *args)
+            self._docs = docs
+            self.created = True
+        return result
+
+    def update_one(self, filter, update, upsert=False):
+        return self._commit([('update', (filter, update, upsert, False))])
+
+    def update_many(self, filter, update, upsert=False):
+        return self._commit([('update', (filter, update, upsert, True))])
+
+    def replace_one(self, filter, replacement, upsert=False):
+        return self._commit([('replace', (filter, replacement, upsert, False))])
+
+    def delete_one(self, filter):
+        return self._commit([('delete', (filter,))])
+
+    def delete_many(self, filter):
+        return self._commit([('delete', (filter, None, False, True))])
+
+    def bulk_write(self, requests, ordered=True):
+        """pymongo InsertOne/ReplaceOne/UpdateOne/UpdateMany/DeleteOne/DeleteMany requests."""
+        ops = []
+        for request in requests:
+            kind = type(request).__name__
+            if kind == 'InsertOne':
+                ops.append(('insert', request._doc))
+            elif kind in ('ReplaceOne', 'UpdateOne', 'UpdateMany'):
+                ops.append(('replace' if kind == 'ReplaceOne' else 'update',
+                            (request._filter, request._doc, bool(request._upsert), kind == 'UpdateMany')))
+            elif kind in ('DeleteOne', 'DeleteMany'):
+                ops.append(('delete', (request._filter, None, False, kind == 'DeleteMany')))
+            else:
+                raise NotImplementedError(f"MemoryCollection does not support {kind}")
+        return self._commit(ops)
+
+    def create_index(self, keys, **kwargs):
+        """Records the index (it is not used for lookups); returns its name."""
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        name = kwargs.get('name') or '_'.join(f'{field}_{direction}' for field, direction in keys)
+        with self._lock:
+            self._indexes[name] = dict({k: v for k, v in kwargs.items() if k != 'name'}, key=list(keys))
+            self.created = True
+        return name
+
+    def index_information(self):
+        return copy.deepcopy(self._indexes)
+
+    def rename(self, new_name, dropTarget=False):
+        self.database._rename(self.name, new_name, dropTarget)
+
+
+class MemoryDatabase:
+    def __init__(self, name, latency_ms=0.0):
+        self.name = name
+        self.latency_ms = latency_ms
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(name, latency_ms=self.latency_ms, database=self)
+            return self._collections[name]
+
+    def list_collection_names(self, filter=None):
+        return [name for name, collection in list(self._collections.items())
+                if collection.created and matches({'name': name}, filter or {})]
+
+    def add_collection(self, name, docs):
+        with self._lock:
+            self._collections[name] = MemoryCollection(name, list(docs or []), latency_ms=self.latency_ms,
+                                                       database=self)
+        return self._collections[name]
+
+    def create_collection(self, name):
+        return self.add_collection(name, [])
+
+    def drop_collection(self, name):
+        with self._lock:
+            self._collections.pop(name, None)
+
+    def _rename(self, old, new, drop_target=False):
+        with self._lock:
+            if new in self._collections and self._collections[new].created and not drop_target:
+                raise ValueError(f"target namespace {new} exists")
+            collection = self._collections.pop(old)
+            collection.name = new
+            self._collections[new] = collection
+
+
+class _Admin:
+    def command(self, name, *args, **kwargs):
+        if name == 'ping':
+            return {'ok': 1.0}
+        raise NotImplementedError(f"admin command {name!r}")
+
+
+class MemoryMongoClient:
+    def __init__(self, latency_ms=0.0):
+        self.latency_ms = latency_ms
+        self.admin = _Admin()
+        self._dbs = {}
+
+    def __getitem__(self, name):
+        if name not in self._dbs:
+            self._dbs[name] = MemoryDatabase(name, latency_ms=self.latency_ms)
+        return self._dbs[name]
+
+    def close(self):
+        pass
+
+
+def _from_extended_json(value):
+    # mongoexport-style {"$oid": ...} ids become plain strings
+    if isinstance(value, dict):
+        if len(value) == 1 and '$oid' in value:
+            return value['$oid']
+        return {k: _from_extended_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_from_extended_json(v) for v in value]
+    return value
+
+
+def load_json_documents(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        # some exports wrap the list, e.g. {"verses": [...]}
+        data = next((v for v in data.values() if isinstance(v, list)), [])
+    return [_from_extended_json(d) for d in data]
+
+
+def memory_database(database_name, collections, latency_ms=0.0):
+    """(client, db) with each {collection: json_path} loaded; missing files give empty collections."""
+    client = MemoryMongoClient(latency_ms=latency_ms)
+    db = client[database_name]
+    for name, path in collections.items():
+        docs = load_json_documents(path) if path and os.path.exists(path) else []
+        db.add_collection(name, docs)
+    return client, db
@@ -0,0 +1,323 @@
+"""
+Closed-loop load test for the Flask app, runnable offline.
+
+By default the app is served in-process (werkzeug, threaded) with the
+stand-ins from loadtest.stand_ins: a fake astro-service and an in-memory
+MongoDB loaded from backend/data/strongs.json. Point --target at a running
+server (e.g. gunicorn loadtest.wsgi:app) to measure a real worker pool.
+
+Each of --concurrency workers picks an endpoint from --mix by weight,
+sends the request, waits for the response and repeats until --duration
+expires. The report gives count, errors, RPS and p50/p95/p99/max latency
+per endpoint.
+
+    python -m loadtest.run --mix "sunevents=3,calendar=1,strongs_search=2" -c 8 -d 30
+    python -m loadtest.run --astro-latency-ms 80 --astro-error-rate 0.05 --json report.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+import requests
+
+LOCATIONS = [
+    (31.7683, 35.2137, 'Asia/Jerusalem'),
+    (51.5074, -0.1278, 'Europe/London'),
+    (40.7128, -74.0060, 'America/New_York'),
+    (-33.8688, 151.2093, 'Australia/Sydney'),
+    (35.6762, 139.6503, 'Asia/Tokyo'),
+    (64.1466, -21.9426, 'Atlantic/Reykjavik'),
+]
+
+SEARCH_TERMS = ['love', 'light', 'water', 'king', 'father', 'earth', 'spirit', 'bread']
+HEBREW_TERMS = ['אב', 'אור', 'מים', 'מלך', 'ארץ', 'רוח']
+KJV_TERMS = ['beginning', 'light', 'shepherd', 'covenant', 'mercy']
+
+DEFAULT_MIX = 'sunevents=4,calendar=2,current_dawn=2,strongs=2,strongs_search=2,hebrew_search=1,etymology=1,health=1'
+
+
+def _location(rng):
+    return rng.choice(LOCATIONS)
+
+
+def _sunevents(rng):
+    lat, lon, tz = _location(rng)
+    day = date(2025, 1, 1) + timedelta(days=rng.randrange(365))
+    return 'GET', '/api/sunevents', {'lat': lat, 'lon': lon, 'tz': tz, 'date': day.isoformat()}, None
+
+
+def _calendar(rng):
+    lat, lon, tz = _location(rng)
+    return 'GET', '/api/calendar', {'lat': lat, 'lon': lon, 'tz': tz}, None
+
+
+def _multiyear(rng):
+    lat, lon, tz = _location(rng)
+    start = rng.choice([2024, 2025])
+    return 'GET', '/api/multiyear-calendar', {'lat': lat, 'lon': lon, 'tz': tz,
+                                              'start_year': start, 'end_year': start + 1}, None
+
+
+def _current_dawn(rng):
+    lat, lon, tz = _location(rng)
+    return 'GET', '/api/current-dawn', {'lat': lat, 'lon': lon, 'tz': tz}, None
+
+
+def _select_location(rng):
+    lat, lon, _ = _location(rng)
+    return 'POST', '/select-location', None, {'lat': lat, 'lon': lon, 'name': 'loadtest', 'year': 2025}
+
+
+def _strongs(rng):
+    return 'GET', '/api/strongs-data', {'strongs_num': rng.randint(1, 8674)}, None
+
+
+def _strongs_search(rng):
+    return 'GET', '/api/strongs-data', {'search': rng.choice(SEARCH_TERMS), 'limit': 20}, None
+
+
+def _hebrew_search(rng):
+    return 'GET', '/api/hebrew-search', {'query': rng.choice(HEBREW_TERMS), 'limit': 20}, None
+
+
+def _etymology(rng):
+    return 'GET', '/api/etymology-chain', {'strongs': rng.randint(1, 8674)}, None
+
+
+def _kjv(rng):
+    return 'GET', '/api/kjv-data', {'query': rng.choice(KJV_TERMS), 'limit': 20}, None
+
+
+def _health(rng):
+    return 'GET', '/api/health', None, None
+
+
+# name -> request factory(rng) returning (method, path, params, json_body)
+ENDPOINTS = {
+    'sunevents': _sunevents,
+    'calendar': _calendar,
+    'multiyear': _multiyear,
+    'current_dawn': _current_dawn,
+    'select_location': _select_location,
+    'strongs': _strongs,
+    'strongs_search': _strongs_search,
+    'hebrew_search': _hebrew_search,
+    'etymology': _etymology,
+    'kjv': _kjv,
+    'health': _health,
+}
+
+
+def parse_mix(text):
+    """'sunevents=3,calendar=1' -> {'sunevents': 3.0, 'calendar': 1.0}."""
+    mix = {}
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight) if weight else 1.0
+    mix = {k: v for k, v in mix.items() if v > 0}
+    if not mix:
+        raise ValueError('mix has no endpoints with positive weight')
+    return mix
+
+
+def percentile(sorted_values, p):
+    """Linear-interpolated percentile of an ascending list (p in 0..100)."""
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class Recorder:
+    """Thread-safe per-endpoint latency samples (seconds) and error counts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+        self.statuses = {}
+
+    def record(self, name, seconds, status):
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+            self.statuses.setdefault(name, {})
+            self.statuses[name][status] = self.statuses[name].get(status, 0) + 1
+            if not isinstance(status, int) or status >= 400:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, elapsed):
+        rows = {}
+        every = []
+        for name, values in sorted(self.samples.items()):
+            values = sorted(values)
+            every.extend(values)
+            rows[name] = _row(values, self.errors.get(name, 0), elapsed)
+            rows[name]['statuses'] = {str(k): v for k, v in sorted(self.statuses[name].items(), key=str)}
+        rows['ALL'] = _row(sorted(every), sum(self.errors.values()), elapsed)
+        return rows
+
+
+def _row(values, errors, elapsed):
+    ms = lambda v: None if v is None else round(v * 1000.0, 2)
+    return {
+        'count': len(values),
+        'errors': errors,
+        'rps': round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+        'p50_ms': ms(percentile(values, 50)),
+        'p95_ms': ms(percentile(values, 95)),
+        'p99_ms': ms(percentile(values, 99)),
+        'max_ms': ms(values[-1] if values else None),
+    }
+
+
+def _worker(base_url, mix, deadline, seed, recorder, timeout):
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        method, path, params, body = ENDPOINTS[name](rng)
+        start = time.perf_counter()
+        try:
+            resp = session.request(method, base_url + path, params=params, json=body, timeout=timeout)
+            resp.content  # read the full body before stopping the clock
+            status = resp.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        recorder.record(name, time.perf_counter() - start, status)
+
+
+def run_load(base_url, mix, concurrency=4, duration=10.0, seed=0, timeout=30.0, warmup=1.0):
+    """Drive base_url with `concurrency` closed-loop workers; returns (summary, elapsed)."""
+    if warmup > 0:
+        _worker(base_url, mix, time.perf_counter() + warmup, seed - 1, Recorder(), timeout)
+    recorder = Recorder()
+    start = time.perf_counter()
+    deadline = start + duration
+    threads = [
+        threading.Thread(target=_worker, args=(base_url, mix, deadline, seed + i, recorder, timeout), daemon=True)
+        for i in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return recorder.summary(elapsed), elapsed
+
+
+@contextlib.contextmanager
+def local_server(app, host='127.0.0.1', port=0):
+    """Serve a WSGI app on a background thread; yields the base URL."""
+    from werkzeug.serving import make_server
+    server = make_server(host, port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_port}"
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+def format_report(summary, elapsed, concurrency, mix):
+    lines = [
+        f"Load test: {elapsed:.1f}s, concurrency {concurrency}, mix "
+        + ', '.join(f"{k}={v:g}" for k, v in mix.items()),
+        f"{'endpoint':<16}{'count':>8}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    fmt = lambda v: '-' if v is None else f"{v:.1f}"
+    for name, row in summary.items():
+        if name == 'ALL':
+            lines.append('-' * 81)
+        lines.append(
+            f"{name:<16}{row['count']:>8}{row['errors']:>8}{row['rps']:>9.1f}"
+            f"{fmt(row['p50_ms']):>10}{fmt(row['p95_ms']):>10}{fmt(row['p99_ms']):>10}{fmt(row['max_ms']):>10}"
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help=f"endpoint=weight list (endpoints: {', '.join(ENDPOINTS)})")
+    parser.add_argument('-c', '--concurrency', type=int, default=4)
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help='seconds of measured load')
+    parser.add_argument('--warmup', type=float, default=1.0, help='seconds of unmeasured load first')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout in seconds')
+    parser.add_argument('--target', help='base URL of a running server (default: serve in-process)')
+    parser.add_argument('--astro-url', help='use this astro-service instead of the fake one')
+    parser.add_argument('--astro-latency-ms', type=float, default=None)
+    parser.add_argument('--astro-jitter-ms', type=float, default=None)
+    parser.add_argument('--astro-error-rate', type=float, default=None)
+    parser.add_argument('--mongo-latency-ms', type=float, default=None)
+    parser.add_argument('--json', metavar='PATH', help='also write the report as JSON')
+    parser.add_argument('--verbose', action='store_true', help="keep the app's request logging on stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    fake = None
+    with contextlib.ExitStack() as stack:
+        if args.target:
+            base_url = args.target.rstrip('/')
+        else:
+            from loadtest.stand_ins import create_app
+            app, fake = create_app(
+                astro_url=args.astro_url,
+                astro_latency_ms=args.astro_latency_ms,
+                astro_jitter_ms=args.astro_jitter_ms,
+                astro_error_rate=args.astro_error_rate,
+                mongo_latency_ms=args.mongo_latency_ms,
+            )
+            logging.getLogger('werkzeug').setLevel(logging.WARNING)
+            base_url = stack.enter_context(local_server(app))
+        print(f"🚀 Load testing {base_url} for {args.duration:g}s with {args.concurrency} workers")
+        if not args.verbose:
+            # the routes print and log per request; keep that out of the report
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+            logging.getLogger().setLevel(logging.WARNING)
+        summary, elapsed = run_load(base_url, mix, args.concurrency, args.duration, args.seed,
+                                    args.timeout, args.warmup)
+
+    print(format_report(summary, elapsed, args.concurrency, mix))
+    if fake is not None:
+        print(f"Fake astro-service: {fake.requests} requests, {fake.errors} injected errors")
+        fake.shutdown()
+    if args.json:
+        report = {
+            'target': base_url,
+            'duration_s': round(elapsed, 3),
+            'concurrency': args.concurrency,
+            'mix': mix,
+            'endpoints': summary,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Build the Flask app wired to local stand-ins instead of external services.
+
+  - astro-service -> loadtest.fake_astro (started in-process unless a URL is given)
+  - MongoDB Atlas -> loadtest.memory_mongo, loaded from backend/data/strongs.json
+    (and backend/data/verses.json when present)
+
+Settings come from arguments or LOADTEST_* environment variables, so the
+same app can be served by gunicorn through loadtest/wsgi.py.
+"""
+
+import logging
+import os
+
+from loadtest.fake_astro import start_fake_astro
+from loadtest.memory_mongo import memory_database
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_ROOT, 'backend', 'data')
+
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return float(default)
+
+
+def create_app(astro_url=None, astro_latency_ms=None, astro_jitter_ms=None, astro_error_rate=None,
+               mongo_latency_ms=None, strongs_path=None, kjv_path=None):
+    """Import app.py with stand-ins in place. Returns (flask_app, fake_astro_server or None)."""
+    astro_url = astro_url or os.getenv('LOADTEST_ASTRO_URL')
+    astro_latency_ms = _env_float('LOADTEST_ASTRO_LATENCY_MS', 30) if astro_latency_ms is None else astro_latency_ms
+    astro_jitter_ms = _env_float('LOADTEST_ASTRO_JITTER_MS', 10) if astro_jitter_ms is None else astro_jitter_ms
+    astro_error_rate = _env_float('LOADTEST_ASTRO_ERROR_RATE', 0) if astro_error_rate is None else astro_error_rate
+    mongo_latency_ms = _env_float('LOADTEST_MONGO_LATENCY_MS', 0) if mongo_latency_ms is None else mongo_latency_ms
+    strongs_path = strongs_path or os.getenv('LOADTEST_STRONGS_JSON', os.path.join(DATA_DIR, 'strongs.json'))
+    kjv_path = kjv_path or os.getenv('LOADTEST_KJV_JSON', os.path.join(DATA_DIR, 'verses.json'))
+
+    fake = None
+    if not astro_url:
+        fake = start_fake_astro(latency_ms=astro_latency_ms, jitter_ms=astro_jitter_ms, error_rate=astro_error_rate)
+        astro_url = fake.base_url
+
+    # config.py and sun.py read these at import time
+    os.environ['ASTRO_API_BASE'] = astro_url
+    os.environ['MONGODB_URI'] = ''
+    os.environ['DATABASE_URL'] = ''
+
+    import app as app_module
+    import backend.routes
+    import backend.astronomy.sun
+    # in case config was imported before the environment was set
+    backend.routes.ASTRO_API_BASE = astro_url
+    backend.astronomy.sun.ASTRO_API_BASE = astro_url
+
+    from config import DATABASE_NAME, STRONG_COLLECTION, KJV_COLLECTION
+    client, db = memory_database(DATABASE_NAME, {
+        STRONG_COLLECTION: strongs_path,
+        KJV_COLLECTION: kjv_path,
+    }, latency_ms=mongo_latency_ms)
+    # app.py reads the module globals, blueprints read app.config
+    app_module.mongo_client, app_module.mongo_db = client, db
+    app_module.app.config['mongo_client'] = client
+    app_module.app.config['mongo_db'] = db
+    app_module.ensure_data_loaded()
+
+    logging.info(f"Load-test app: astro={astro_url}, strongs={db[STRONG_COLLECTION].estimated_document_count()} docs, "
+                 f"verses={db[KJV_COLLECTION].estimated_document_count()} docs")
+    return app_module.app, fake
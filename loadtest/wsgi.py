@@ -0,0 +1,12 @@
+"""
+WSGI entry point with stand-ins, for sizing real worker pools:
+
+    gunicorn -w 4 --threads 2 -b 127.0.0.1:5001 loadtest.wsgi:app
+    python -m loadtest.run --target http://127.0.0.1:5001
+
+Each worker starts its own fake astro-service unless LOADTEST_ASTRO_URL is set.
+"""
+
+from loadtest.stand_ins import create_app
+
+app, _fake_astro = create_app()
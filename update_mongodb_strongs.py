@@ -1,15 +1,46 @@
 #!/usr/bin/env python3
 """
 Update MongoDB with Enhanced Strong's Data
-Replaces the existing strongs collection with comprehensive data from enhanced_strongs.json
+Brings the strongs collection in line with enhanced_strongs.json, writing only what changed
+
+Each entry is hashed (canonical JSON without _id, strongsNumber normalized
+to an int, so "H1" and "1" count as 1) and compared with the hashes stored in
+`<collection>_hashes`. The file is read twice: the first pass only hashes and
+counts, and nothing is written when it finds entries without a valid or with
+a repeated strongsNumber (unless --allow-skipped), since their stored
+counterparts would otherwise be deleted as missing. The second pass sends
+the added and changed entries as unordered ReplaceOne upserts in batches of
+1000, several batches at a time; entries no longer in the file are deleted.
+
+The stored hashes only reflect what this script wrote. Without a hash
+collection, or when its size differs from the collection's, the stored
+documents are hashed instead; edits made in place by other tools keep the
+count and go unnoticed unless --rehash forces that. Large files are streamed
+with ijson when it is installed.
+
+    python update_mongodb_strongs.py [--file PATH] [--dry-run] [--workers 4] [--backup] [--keep-missing]
+                                     [--rehash] [--allow-skipped]
 """
 
+import argparse
+import hashlib
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, OperationFailure
 
+try:
+    import ijson
+except ImportError:  # optional: the whole file is parsed at once without it
+    ijson = None
+
+DEFAULT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'data', 'enhanced_strongs.json')
+BATCH_SIZE = 1000
+# changed entries listed field by field in a dry run
+REPORT_LIMIT = 20
+
 def connect_to_mongodb():
     """Connect to MongoDB Atlas using the same approach as the main app"""
     
@@ -40,23 +71,203 @@ def connect_to_mongodb():
         print(f"❌ Failed to connect to MongoDB: {e}")
         return None
 
-def load_enhanced_data(file_path):
-    """Load the enhanced Strong's data from JSON file"""
+def hashes_collection_name(collection_name):
+    """Side collection of {_id: strongsNumber, hash} for the last imported version of each entry"""
+    return f"{collection_name}_hashes"
+
+def normalized_entry(entry, number):
+    """The document to store: without _id, with the integer strongsNumber"""
+    content = {key: value for key, value in entry.items() if key != '_id'}
+    content['strongsNumber'] = number
+    return content
+
+def entry_hash(entry):
+    """Hash of a normalized entry; _id is ignored so file and stored documents compare equal"""
+    content = {key: value for key, value in entry.items() if key != '_id'}
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+def iter_enhanced_data(file_path):
+    """Yield the entries of the enhanced Strong's JSON array, streamed when ijson is available"""
     
-    try:
-        print(f"📁 Loading enhanced data from {file_path}...")
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        print(f"✅ Loaded {len(data)} entries")
-        return data
+    print(f"📁 Reading enhanced data from {file_path}{' (streaming)' if ijson else ''}...")
+    with open(file_path, 'rb') as f:
+        if ijson:
+            yield from ijson.items(f, 'item', use_float=True)
+        else:
+            yield from json.load(f)
+
+def load_stored_hashes(db, collection_name, rehash=False):
+    """strongsNumber -> hash of what the collection holds now, and whether the documents were hashed"""
     
-    except FileNotFoundError:
-        print(f"❌ File not found: {file_path}")
-        return None
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON decode error: {e}")
-        return None
+    stored_count = db[collection_name].count_documents({})
+    if not rehash:
+        hashes = {doc['_id']: doc['hash'] for doc in db[hashes_collection_name(collection_name)].find({}, {'hash': 1})}
+        if len(hashes) == stored_count:
+            print(f"📋 {stored_count} stored entries, hashes from '{hashes_collection_name(collection_name)}'")
+            return hashes, False
+        print(f"📋 {stored_count} stored entries, {len(hashes)} stored hashes")
+    
+    # first import, --rehash, or the collection was changed by something else: hash the documents themselves
+    print(f"🔍 Hashing the {stored_count} stored documents...")
+    hashes = {doc['strongsNumber']: entry_hash(doc)
+              for doc in db[collection_name].find({'strongsNumber': {'$exists': True}}, {'_id': 0})}
+    return hashes, True
+
+def _numbered(entries):
+    """(strongsNumber or None, entry) for each entry; numbers like "H1" and "1" become 1"""
+    from backend.strongs_store import parse_number
+    for entry in entries:
+        number = parse_number(entry.get('strongsNumber')) if isinstance(entry, dict) else None
+        yield (number if number is not None and number > 0 else None), entry
+
+def diff_entries(entries, stored, summary):
+    """First pass: {strongsNumber: hash} of the entries that are new or differ from `stored`.
+
+    Counts go into `summary` (added, changed, unchanged, invalid, duplicate,
+    the numbers seen, and the first REPORT_LIMIT changed documents for the
+    dry-run report); entries are consumed one at a time and not kept.
+    """
+    seen = summary.setdefault('seen', set())
+    sample = summary.setdefault('sample', {})
+    pending = {}
+    for number, entry in _numbered(entries):
+        if number is None:
+            summary['invalid'] += 1
+            continue
+        if number in seen:
+            summary['duplicate'] += 1
+            continue
+        seen.add(number)
+        doc = normalized_entry(entry, number)
+        digest = entry_hash(doc)
+        previous = stored.get(number)
+        if previous == digest:
+            summary['unchanged'] += 1
+            continue
+        summary['added' if previous is None else 'changed'] += 1
+        summary.setdefault('changed_numbers' if previous else 'added_numbers', []).append(number)
+        if previous and len(sample) < REPORT_LIMIT:
+            sample[number] = doc
+        pending[number] = digest
+    return pending
+
+def pending_entries(entries, pending):
+    """Second pass: (strongsNumber, document, hash) for the entries diff_entries() found changed"""
+    remaining = dict(pending)
+    for number, entry in _numbered(entries):
+        # the first occurrence of a number wins, as in the first pass
+        if remaining.pop(number, None) is None:
+            continue
+        doc = normalized_entry(entry, number)
+        yield number, doc, entry_hash(doc)
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def write_batch(db, collection_name, batch):
+    """Upsert one batch of (number, document, hash) and record the new hashes; returns documents written"""
+    from pymongo import ReplaceOne, UpdateOne
+    
+    result = db[collection_name].bulk_write(
+        [ReplaceOne({'strongsNumber': number}, doc, upsert=True) for number, doc, _ in batch], ordered=False)
+    # hashes only after the documents are in, so a failed batch is retried by the next run
+    db[hashes_collection_name(collection_name)].bulk_write(
+        [UpdateOne({'_id': number}, {'$set': {'hash': digest}}, upsert=True) for number, _, digest in batch],
+        ordered=False)
+    return result.upserted_count + result.modified_count
+
+def apply_changes(db, collection_name, changes, workers=4, batch_size=BATCH_SIZE):
+    """Send `changes` in unordered bulk batches, `workers` at a time; returns documents written"""
+    
+    written = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='strongs-import') as pool:
+        pending = set()
+        for number, batch in enumerate(_batches(changes, batch_size), 1):
+            # bounded in flight, so a streamed file is never held in memory whole
+            while len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        written += future.result()
+                    except Exception as e:
+                        failed += 1
+                        print(f"❌ Batch failed: {e}")
+            pending.add(pool.submit(write_batch, db, collection_name, batch))
+            print(f"   Submitted batch {number} ({len(batch)} entries)")
+        for future in pending:
+            try:
+                written += future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ Batch failed: {e}")
+    if failed:
+        raise OperationFailure(f"{failed} batch(es) failed; rerun to retry them")
+    return written
+
+def remove_missing(db, collection_name, numbers):
+    """Delete entries no longer in the source file, and their hashes"""
+    
+    numbers = sorted(numbers)
+    deleted = 0
+    for i in range(0, len(numbers), BATCH_SIZE):
+        chunk = numbers[i:i + BATCH_SIZE]
+        deleted += db[collection_name].delete_many({'strongsNumber': {'$in': chunk}}).deleted_count
+        db[hashes_collection_name(collection_name)].delete_many({'_id': {'$in': chunk}})
+    return deleted
+
+def rebuild_hashes(db, collection_name, hashes):
+    """Replace the hash collection with `hashes` (after hashing the stored documents)"""
+    from pymongo import ReplaceOne
+    
+    target = db[hashes_collection_name(collection_name)]
+    target.delete_many({})
+    items = sorted(hashes.items())
+    for i in range(0, len(items), BATCH_SIZE):
+        target.bulk_write([ReplaceOne({'_id': number}, {'hash': digest}, upsert=True)
+                           for number, digest in items[i:i + BATCH_SIZE]], ordered=False)
+
+def _short(value, width=60):
+    text = json.dumps(value, ensure_ascii=False, default=str)
+    return text if len(text) <= width else text[:width - 1] + '…'
+
+def print_diff_report(db, collection_name, summary, removed):
+    """Dry-run report: counts, then field-level differences for the first REPORT_LIMIT changed entries"""
+    
+    print("\n📋 Dry run: nothing was written")
+    for label in ('added', 'changed', 'unchanged'):
+        print(f"   {label}: {summary[label]}")
+    print(f"   removed: {len(removed)}{' (kept: --keep-missing)' if summary.get('keep_missing') else ''}")
+    if summary['invalid'] or summary['duplicate']:
+        print(f"   skipped: {summary['invalid']} without a valid strongsNumber, {summary['duplicate']} duplicates")
+    
+    if summary.get('added_numbers'):
+        print(f"\n➕ Added: {', '.join(f'H{n}' for n in summary['added_numbers'][:REPORT_LIMIT])}"
+              f"{' …' if len(summary['added_numbers']) > REPORT_LIMIT else ''}")
+    if removed:
+        print(f"➖ Removed: {', '.join(f'H{n}' for n in sorted(removed)[:REPORT_LIMIT])}"
+              f"{' …' if len(removed) > REPORT_LIMIT else ''}")
+    
+    changed = summary.get('changed_numbers', [])[:REPORT_LIMIT]
+    if not changed:
+        return
+    print(f"\n✏️ Changed{f' (first {REPORT_LIMIT})' if summary['changed'] > REPORT_LIMIT else ''}:")
+    current = {doc['strongsNumber']: doc
+               for doc in db[collection_name].find({'strongsNumber': {'$in': changed}}, {'_id': 0})}
+    for number in changed:
+        old, new = current.get(number, {}), summary['sample'][number]
+        fields = sorted(field for field in set(old) | set(new) if old.get(field) != new.get(field))
+        print(f"   H{number}: {', '.join(fields) or '(value types only)'}")
+        for field in fields[:3]:
+            print(f"      {field}: {_short(old.get(field))} → {_short(new.get(field))}")
 
 def backup_existing_collection(db, collection_name):
     """Create a backup of the existing collection"""
@@ -87,40 +298,76 @@ def backup_existing_collection(db, collection_name):
         print(f"❌ Backup failed: {e}")
         return False
 
-def update_strongs_collection(db, collection_name, enhanced_data):
-    """Replace the strongs collection with enhanced data"""
+def plan_update(db, collection_name, read_entries, rehash=False, keep_missing=False):
+    """Read-only first pass over `read_entries()`: the diff summary plus what to write and delete.
+
+    Returns the summary dict (with 'pending' and 'removed'), or None on failure.
+    """
     
+    summary = {'added': 0, 'changed': 0, 'unchanged': 0, 'invalid': 0, 'duplicate': 0,
+               'written': 0, 'deleted': 0, 'keep_missing': keep_missing}
     try:
-        # Clear the existing collection
-        print(f"🗑️ Clearing existing '{collection_name}' collection...")
-        db[collection_name].drop()
-        
-        # Insert enhanced data
-        print(f"📥 Inserting {len(enhanced_data)} enhanced entries...")
-        
-        # Insert in batches for better performance
-        batch_size = 500
-        for i in range(0, len(enhanced_data), batch_size):
-            batch = enhanced_data[i:i + batch_size]
-            db[collection_name].insert_many(batch)
-            print(f"   Inserted batch {i//batch_size + 1}/{(len(enhanced_data) + batch_size - 1)//batch_size}")
-        
-        # Verify the insertion
-        final_count = db[collection_name].count_documents({})
-        print(f"✅ Successfully inserted {final_count} documents")
-        
-        # Create indexes for better performance
-        print("🔍 Creating indexes...")
-        db[collection_name].create_index("strongsNumber")
-        db[collection_name].create_index("word")
-        db[collection_name].create_index("transliteration")
-        print("✅ Indexes created")
+        stored, rehashed = load_stored_hashes(db, collection_name, rehash)
+        summary['stored'] = stored if rehashed else None
+        summary['pending'] = diff_entries(read_entries(), stored, summary)
+        summary['removed'] = set(stored) - summary['seen']
+        return summary
+    except Exception as e:
+        print(f"❌ Diff failed: {e}")
+        return None
+
+def check_plan(summary, allow_skipped=False):
+    """Whether the planned update is safe to apply; prints why not"""
+    
+    if (summary['invalid'] or summary['duplicate']) and not allow_skipped:
+        print(f"❌ {summary['invalid']} entries without a valid strongsNumber and {summary['duplicate']} duplicates; "
+              f"their stored versions would be deleted or left stale. Fix the file or pass --allow-skipped")
+        return False
+    if not summary['seen'] and summary['removed'] and not summary['keep_missing']:
+        print("❌ The file has no entries; refusing to delete the whole collection")
+        return False
+    return True
+
+def update_strongs_collection(db, collection_name, read_entries, summary, workers=4):
+    """Apply a plan_update() summary: upsert the pending entries (second pass) and delete removed ones.
+
+    Returns the summary, or None if the update failed.
+    """
+    
+    try:
+        # the unique strongsNumber index first: every upsert looks its entry up by it
+        print("🔍 Ensuring indexes...")
+        from backend.mongo_indexes import ensure_indexes
+        from config import KJV_COLLECTION
+        for name, index, status in ensure_indexes(db, collection_name, KJV_COLLECTION, rebuild=True):
+            if name == collection_name and status != 'exists':
+                print(f"   {name}.{index}: {status}")
         
-        return True
+        if summary['stored'] is not None:
+            rebuild_hashes(db, collection_name, summary['stored'])
+        
+        if summary['pending']:
+            print(f"📤 Upserting {len(summary['pending'])} changed entries in batches of {BATCH_SIZE} "
+                  f"({workers} at a time)...")
+            changes = pending_entries(read_entries(), summary['pending'])
+            summary['written'] = apply_changes(db, collection_name, changes, workers)
+        print(f"✅ {summary['added']} added, {summary['changed']} changed, {summary['unchanged']} unchanged")
+        if summary['invalid'] or summary['duplicate']:
+            print(f"⚠️ Skipped {summary['invalid']} entries without a valid strongsNumber "
+                  f"and {summary['duplicate']} duplicates")
+        
+        removed = summary['removed']
+        if removed and not summary['keep_missing']:
+            summary['deleted'] = remove_missing(db, collection_name, removed)
+            print(f"🗑️ Removed {summary['deleted']} entries no longer in the source file")
+        elif removed:
+            print(f"⚠️ Kept {len(removed)} entries no longer in the source file")
+        
+        return summary
         
     except Exception as e:
         print(f"❌ Update failed: {e}")
-        return False
+        return None
 
 def verify_enhanced_data(db, collection_name):
     """Verify the enhanced data is properly loaded"""
@@ -162,17 +409,39 @@ def verify_enhanced_data(db, collection_name):
         print(f"❌ Verification failed: {e}")
         return False
 
+def refresh_verse_counts(db, verses_collection):
+    """Rebuild the per-Strong's verse counts used for /api/kjv-data and Hebrew search ranking"""
+    
+    try:
+        from backend.kjv_index import build_strongs_counts, counts_collection_name
+        print(f"\n📊 Counting Strong's numbers in '{verses_collection}'...")
+        counted = build_strongs_counts(db, verses_collection)
+        print(f"✅ '{counts_collection_name(verses_collection)}' has counts for {counted} Strong's numbers")
+        return True
+    
+    except Exception as e:
+        print(f"❌ Verse count refresh failed: {e}")
+        return False
+
 def main():
     """Main function to update MongoDB with enhanced Strong's data"""
     
-    print("🚀 Starting MongoDB update with enhanced Strong's data...")
+    parser = argparse.ArgumentParser(description="Import enhanced Strong's data into MongoDB, writing only what changed")
+    parser.add_argument('--file', default=DEFAULT_FILE, help='enhanced Strong\'s JSON array (default: %(default)s)')
+    parser.add_argument('--dry-run', action='store_true', help='report what would change without writing')
+    parser.add_argument('--workers', type=int, default=4, help='bulk batches in flight at once (default: %(default)s)')
+    parser.add_argument('--backup', action='store_true', help='copy the collection to <collection>_backup first ($out)')
+    parser.add_argument('--keep-missing', action='store_true', help='keep entries that are no longer in the file')
+    parser.add_argument('--rehash', action='store_true',
+                        help='hash the stored documents instead of trusting <collection>_hashes (catches edits by other tools)')
+    parser.add_argument('--allow-skipped', action='store_true',
+                        help='write even if some entries have no valid or a repeated strongsNumber')
+    args = parser.parse_args()
     
-    # File paths
-    enhanced_file = '/Users/m/calendar.heyyou.eth/Quantum-Calendar/backend/data/enhanced_strongs.json'
+    print("🚀 Starting MongoDB update with enhanced Strong's data...")
     
-    # Load enhanced data
-    enhanced_data = load_enhanced_data(enhanced_file)
-    if not enhanced_data:
+    if not os.path.exists(args.file):
+        print(f"❌ File not found: {args.file}")
         return
     
     # Connect to MongoDB
@@ -189,30 +458,47 @@ def main():
         print(f"🔗 Connected to database: {db.name}")
         print(f"📊 Target collection: {collection_name}")
         
-        # Backup existing collection
-        if not backup_existing_collection(db, collection_name):
+        # first pass: nothing is written until the whole file has been diffed
+        read_entries = lambda: iter_enhanced_data(args.file)
+        summary = plan_update(db, collection_name, read_entries, rehash=args.rehash, keep_missing=args.keep_missing)
+        if summary is None:
+            print("❌ Update failed")
+            return
+        if args.dry_run:
+            print_diff_report(db, collection_name, summary, summary['removed'])
+            check_plan(summary, args.allow_skipped)
+            return
+        if not check_plan(summary, args.allow_skipped):
+            return
+        
+        # Full copy only on request: the update never touches unchanged entries
+        if args.backup and not backup_existing_collection(db, collection_name):
             print("❌ Backup failed, aborting update")
             return
         
-        # Update with enhanced data
-        if not update_strongs_collection(db, collection_name, enhanced_data):
+        summary = update_strongs_collection(db, collection_name, read_entries, summary, workers=max(1, args.workers))
+        if summary is None:
             print("❌ Update failed")
             return
         
-        # Verify the update
-        if not verify_enhanced_data(db, collection_name):
+        if not summary['written'] and not summary['deleted']:
+            print("\n✨ Strong's collection already up to date")
+        elif not verify_enhanced_data(db, collection_name):
             print("❌ Verification failed")
             return
+        else:
+            # derived collections built from the Strong's entries are not diffed here
+            print("ℹ️ Rebuild the side collections if they exist: python -m backend.etymology_index build-mongo, "
+                  "python -m backend.strongs_index build-mongo")
+        
+        # Refresh the materialized Strong's frequencies (not fatal: /api/kjv-data counts per query without them)
+        from config import KJV_COLLECTION
+        refresh_verse_counts(db, KJV_COLLECTION)
         
         print("\n🎉 MongoDB update completed successfully!")
-        print("✨ Your Strong's collection now includes:")
-        print("   - Complete etymology information with references")
-        print("   - Greek cross-references")
-        print("   - Enhanced explanations with formatting")
-        print("   - Full morphological data")
         
     finally:
         client.close()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()